@@ -2,11 +2,11 @@ import sys
 
 import flask.cli
 
-from .app import create_flask_app
+from .app import create_cli_app
 
 
 def main() -> None:
-    flask.cli.FlaskGroup(create_app=create_flask_app).main(
+    flask.cli.FlaskGroup(create_app=create_cli_app).main(
         args=sys.argv[1:], prog_name=f"python -m {__package__}"
     )
 
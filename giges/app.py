@@ -1,20 +1,32 @@
 import logging
 import os
 import sys
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional
 
 import connexion
-import sentry_sdk
 import structlog
 from connexion.apps.flask_app import FlaskApp
 from connexion.resolver import RestyResolver
 from flask import Flask
-from flask_migrate import Migrate
-from sentry_sdk.integrations.aws_lambda import AwsLambdaIntegration
-from sentry_sdk.integrations.flask import FlaskIntegration
+
+from giges.spec import load_specification
+from giges.startup import phase
+from giges.validation import VALIDATOR_MAP
 
 SETTINGS_VARIABLE_NAME = "GIGES_SETTINGS"
 
+# Commands of the Flask CLI, imported only when run
+CLI_COMMANDS = {
+    "asana": "giges.cli.asana:asana_cli",
+    "build-spec": "giges.cli.startup:build_spec",
+    "fake": "giges.cli.fake:fake_cli",
+    "loadgen": "giges.cli.loadgen:loadgen",
+    "report": "giges.cli.report:report_cli",
+    "startup-profile": "giges.cli.startup:startup_profile",
+    "team": "giges.cli.team:team_cli",
+}
+
 
 class App(FlaskApp):
     def create_app(self) -> Flask:
@@ -48,6 +60,12 @@ def configure_logging() -> None:
 
 def configure_sentry(app: Flask) -> None:
     if app.config["SENTRY_URI"]:
+        # Imported here so the environments without Sentry do not load it
+        # pylint: disable=import-outside-toplevel
+        import sentry_sdk
+        from sentry_sdk.integrations.aws_lambda import AwsLambdaIntegration
+        from sentry_sdk.integrations.flask import FlaskIntegration
+
         sentry_sdk.init(
             dsn=app.config["SENTRY_URI"],
             environment=app.config["ENVIRONMENT"],
@@ -55,8 +73,26 @@ def configure_sentry(app: Flask) -> None:
         )
 
 
+def configure_cli(app: Flask) -> None:
+    """
+    Set up the database migrations and the commands of the Flask CLI, not
+    needed to serve giges.
+
+    :param app: the Flask app
+    """
+    # Imported here as serving giges does not need alembic nor the CLI
+    # pylint: disable=import-outside-toplevel
+    from flask_migrate import Migrate
+
+    from giges.cli import LazyGroup
+    from giges.db import db
+
+    Migrate(app, db)
+    app.cli = LazyGroup(app.name, lazy_commands=CLI_COMMANDS)
+
+
 def create_connexion_app(
-    settings_object: Optional[Any] = None, **kwargs: int
+    settings_object: Optional[Any] = None, cli: bool = True, **kwargs: int
 ) -> connexion.App:
     if settings_object is None:
         settings_object = os.getenv(SETTINGS_VARIABLE_NAME)
@@ -68,41 +104,61 @@ def create_connexion_app(
                 f"Set this variable and make it point to a configuration file"
             )
 
-    connexion_app = App(__package__, specification_dir="schemas/")
-    flask_app = connexion_app.app
-    flask_app.config.from_object(settings_object)
-    flask_app.config.update(**kwargs)
-
-    connexion_app.add_api(
-        "api.yml",
-        validate_responses=True,
-        strict_validation=False,
-        resolver=RestyResolver("giges.handlers"),
-    )
-
-    from .db import db
+    timings: Dict[str, float] = {}
+    with phase(timings, "settings"):
+        connexion_app = App(__package__, specification_dir="schemas/")
+        flask_app = connexion_app.app
+        flask_app.config.from_object(settings_object)
+        flask_app.config.update(**kwargs)
+
+    with phase(timings, "specification"):
+        specification = load_specification()
+
+    with phase(timings, "api"):
+        connexion_app.add_api(
+            specification,
+            validate_responses=flask_app.config["RESPONSE_VALIDATION_RATE"]
+            > 0,
+            strict_validation=False,
+            validator_map=VALIDATOR_MAP,
+            resolver=RestyResolver("giges.handlers"),
+        )
 
-    db.init_app(flask_app)
-    db.app = flask_app
+    with phase(timings, "database"):
+        from .db import db
 
-    Migrate(flask_app, db)
+        db.init_app(flask_app)
+        db.app = flask_app
 
-    configure_logging()
-    configure_sentry(flask_app)
+    with phase(timings, "logging"):
+        configure_logging()
 
-    # Import CLI packages here to avoid circular requires
-    from giges.cli.asana import (  # pylint: disable=import-outside-toplevel
-        asana_cli,
-    )
-    from giges.cli.team import (  # pylint: disable=import-outside-toplevel
-        team_cli,
-    )
+    with phase(timings, "sentry"):
+        configure_sentry(flask_app)
 
-    flask_app.cli.add_command(asana_cli)
-    flask_app.cli.add_command(team_cli)
+    if cli:
+        with phase(timings, "cli"):
+            configure_cli(flask_app)
 
+    flask_app.extensions["startup"] = timings
     return connexion_app
 
 
+@lru_cache(maxsize=None)
 def create_flask_app() -> Flask:
+    """
+    Build the app serving giges, once per process, so the Lambda handler
+    and the scheduled tasks share it.
+
+    :return: the Flask app, without the CLI
+    """
+    return create_connexion_app(cli=False).app
+
+
+def create_cli_app() -> Flask:
+    """
+    Build the app behind the giges command line.
+
+    :return: the Flask app, with the CLI
+    """
     return create_connexion_app().app
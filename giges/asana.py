@@ -0,0 +1,82 @@
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from giges.ratelimit import get_limiter
+
+if TYPE_CHECKING:
+    from giges.asana_client import RateLimitedClient
+
+_client: Optional["RateLimitedClient"] = None
+_client_lock = threading.Lock()
+
+
+def create_client() -> "RateLimitedClient":
+    """
+    Return the Asana sdk object shared by the whole process.
+
+    It is created on first use and kept afterwards, also between warm
+    Lambda invocations, so its pool of keep-alive connections spares the
+    TCP and TLS handshakes of every call to Asana. The Asana sdk is only
+    imported then, so cold starts not calling Asana do not pay for it.
+
+    :return: the asana client itself
+    """
+    global _client
+
+    # Imported here to keep the Asana sdk out of the cold start
+    from giges.asana_client import (  # pylint: disable=import-outside-toplevel
+        RateLimitedClient,
+    )
+
+    token = current_app.config["ASANA_TOKEN"]
+    with _client_lock:
+        if _client is None or _client.session.token["access_token"] != token:
+            _client = RateLimitedClient.access_token(token)
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=current_app.config["ASANA_POOL_SIZE"],
+            )
+            _client.session.mount("https://", adapter)
+            _client.session.mount("http://", adapter)
+        _client.options["base_url"] = current_app.config["ASANA_BASE_URL"]
+        _client.options["max_retries"] = current_app.config[
+            "RATE_LIMIT_MAX_RETRIES"
+        ]
+        _client.limiter = get_limiter("asana")
+        _client.backoff = (
+            current_app.config["RATE_LIMIT_BACKOFF_SECONDS"],
+            current_app.config["RATE_LIMIT_BACKOFF_MAX_SECONDS"],
+        )
+        return _client
+
+
+def connection_stats() -> Dict[str, int]:
+    """
+    Count the connections opened and reused by the shared Asana client.
+
+    :return: the amount of requests sent, connections opened and reused
+    """
+    opened = sent = 0
+    if _client is not None:
+        pools = _client.session.get_adapter("https://").poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            opened += pool.num_connections
+            sent += pool.num_requests
+    return {"requests": sent, "opened": opened, "reused": sent - opened}
+
+
+def projection(*consumers: Iterable[str]) -> List[str]:
+    """
+    Merge the fields read by different consumers of an Asana resource.
+
+    The result goes into the ``fields`` option of a request, so Asana
+    only computes and sends those fields instead of the whole resource.
+
+    :param consumers: the dotted paths of the fields read by each consumer
+    :return: the sorted list of unique fields
+    """
+    return sorted({field for fields in consumers for field in fields})
@@ -0,0 +1,32 @@
+from typing import Any
+
+import asana
+from asana.error import RateLimitEnforcedError, RetryableAsanaError
+
+from giges.ratelimit import TokenBucket
+
+
+class RateLimitedClient(asana.Client):
+    """
+    Asana client taking a token from the shared Asana bucket before each
+    request, including the retries.
+
+    Rate limited requests pause the bucket for the Retry-After asked by
+    Asana, server errors are retried after a jittered backoff.
+    """
+
+    limiter = TokenBucket(0)
+    backoff = (1.0, 60.0)
+
+    def request(self, method: str, path: str, **options: Any) -> Any:
+        self.limiter.acquire()
+        return super().request(method, path, **options)
+
+    def _handle_retryable_error(
+        self, e: RetryableAsanaError, retry_count: int
+    ) -> None:
+        if isinstance(e, RateLimitEnforcedError):
+            self.limiter.pause(e.retry_after)
+        else:
+            self.limiter.backoff(retry_count, *self.backoff)
+        self.limiter.acquire()
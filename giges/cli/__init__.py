@@ -0,0 +1,34 @@
+from typing import Any, Dict, List, Optional
+
+import click
+from flask.cli import AppGroup
+from werkzeug.utils import import_string
+
+
+class LazyGroup(AppGroup):
+    """
+    Flask CLI group importing each command only when it is run, so the
+    commands do not slow down the startup of the others.
+    """
+
+    def __init__(
+        self, *args: Any, lazy_commands: Dict[str, str], **kwargs: Any
+    ):
+        """
+        :param lazy_commands: the import path of each command, like
+                              ``giges.cli.team:team_cli``, by name
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
+
+    def get_command(
+        self, ctx: click.Context, cmd_name: str
+    ) -> Optional[click.Command]:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            self.add_command(
+                import_string(self.lazy_commands[cmd_name]), cmd_name
+            )
+        return super().get_command(ctx, cmd_name)
@@ -1,23 +1,26 @@
 import json
-from typing import Dict, Generator, List, Union
+import time
+from datetime import datetime, timezone
+from typing import Dict, Generator, List, Tuple, Union
 
-import asana
 import click
 import iso8601
 from flask import current_app
 from flask.cli import with_appcontext
 
+from giges.asana import create_client
 from giges.db import db
+from giges.handlers.asana import (
+    flush_dirty_tasks,
+    invalidate_webhook,
+    prune_fingerprints,
+    search_events,
+    serialize_event,
+)
 from giges.models.asana import Project, ResourceTypeEnum, Webhook
-
-
-def create_client() -> asana.Client:
-    """
-    Initialize and return an Asana sdk object.
-
-    :return: the asana client itself
-    """
-    return asana.Client.access_token(current_app.config["ASANA_TOKEN"])
+from giges.tasks.backfill import backfill_project
+from giges.tasks.sync import sync_projects
+from giges.tasks.worker import drain_deliveries
 
 
 def print_response(response: Union[Generator, List, Dict]) -> None:
@@ -79,6 +82,7 @@ def _register_webhook(
         webhook.project = project
     db.session.add(webhook)
     db.session.commit()
+    invalidate_webhook(path)
 
     response = client.webhooks.create(
         resource=resource,
@@ -310,3 +314,163 @@ def delete_webhook(webhook_id: str) -> None:
     """
     client = create_client()
     print_response(client.webhooks.delete_by_id(webhook_id))
+
+
+@asana_cli.command(help="Handle the queued Asana webhook deliveries")
+@click.option(
+    "--concurrency",
+    type=int,
+    default=None,
+    help="Number of threads working the queue",
+)
+@click.option(
+    "--follow",
+    is_flag=True,
+    default=False,
+    help="Keep polling the queue instead of exiting when it is empty",
+)
+@click.option(
+    "--interval",
+    type=float,
+    default=5.0,
+    help="Seconds to wait between polls when following the queue",
+)
+@with_appcontext
+def worker(
+    concurrency: int = None, follow: bool = False, interval: float = 5.0
+) -> None:
+    """
+    Drain the queue of webhook deliveries stored by the handlers.
+
+    :param concurrency: the number of threads working the queue
+    :param follow: if True, keeps waiting for new deliveries
+    :param interval: the seconds between polls when following
+    """
+    while True:
+        processed = drain_deliveries(concurrency)
+        if processed:
+            print(f"{processed} deliveries processed")
+        if not follow:
+            break
+        time.sleep(interval)
+
+
+@asana_cli.command(help="Forget old fingerprints of received webhooks")
+@with_appcontext
+def prune_webhook_fingerprints() -> None:
+    """
+    Delete the fingerprints of webhook deliveries and events received
+    before the deduplication window.
+    """
+    print(f"{prune_fingerprints()} fingerprints deleted")
+
+
+@asana_cli.command(help="Retrieve the tasks changed by Asana webhooks")
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Flush all dirty tasks without waiting for the quiet period",
+)
+@with_appcontext
+def flush_tasks(force: bool = False) -> None:
+    """
+    Retrieve and save the tasks marked as dirty by the webhook handlers.
+
+    :param force: if True, does not wait for the tasks to stop changing
+    """
+    print(f"{flush_dirty_tasks(force)} tasks flushed")
+
+
+@asana_cli.command(help="Synchronize the tasks from the Asana events")
+@click.argument("project_ids", nargs=-1)
+@click.option(
+    "--follow",
+    is_flag=True,
+    default=False,
+    help="Keep polling the events instead of exiting",
+)
+@click.option(
+    "--interval",
+    type=float,
+    default=30.0,
+    help="Seconds to wait between polls when following the events",
+)
+@with_appcontext
+def sync(
+    project_ids: Tuple[str, ...] = (),
+    follow: bool = False,
+    interval: float = 30.0,
+) -> None:
+    """
+    Read the events of the projects since their last sync token, to catch
+    up with the changes that the webhooks missed.
+
+    :param project_ids: the external (Asana) IDs of the projects,
+                        all the known projects by default
+    :param follow: if True, keeps polling the events
+    :param interval: the seconds between polls when following
+    """
+    while True:
+        processed = sync_projects(project_ids)
+        if processed:
+            print(f"{processed} events synchronized")
+        if not follow:
+            break
+        time.sleep(interval)
+
+
+@asana_cli.command(help="Save all the tasks of an Asana project")
+@click.argument("project_id", required=True)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=None,
+    help="Number of tasks saved in each transaction",
+)
+@with_appcontext
+def backfill(project_id: str, batch_size: int = None) -> None:
+    """
+    Retrieve every task of a project and save it, for boards whose tasks
+    were never touched by a webhook.
+
+    :param project_id: the external (Asana) ID of the project
+    :param batch_size: the amount of tasks saved in each transaction
+    """
+    saved = 0
+    for batch in backfill_project(project_id, batch_size):
+        saved += batch
+        print(f"{saved} tasks saved")
+
+
+@asana_cli.command(help="Show the received events touching a resource")
+@click.argument("resource_id", required=True)
+@click.option("--since", type=click.DateTime(), help="Received from")
+@click.option("--until", type=click.DateTime(), help="Received before")
+@click.option("--webhook-id", help="Giges ID of the receiving webhook")
+@click.option("--limit", type=int, default=100, help="Maximum events")
+@with_appcontext
+def show_events(
+    resource_id: str,
+    since: datetime = None,
+    until: datetime = None,
+    webhook_id: str = None,
+    limit: int = 100,
+) -> None:
+    """
+    Print the stored events that touched an Asana resource.
+
+    :param resource_id: the external (Asana) ID of the resource
+    :param since: the UTC instant from which the events were received
+    :param until: the UTC instant until which the events were received
+    :param webhook_id: the giges ID of the webhook receiving the events
+    :param limit: the maximum amount of events
+    """
+    events = search_events(
+        resource_id,
+        since=since.replace(tzinfo=timezone.utc) if since else None,
+        until=until.replace(tzinfo=timezone.utc) if until else None,
+        webhook_id=webhook_id,
+        limit=limit,
+    )
+    print_response([serialize_event(event) for event in events])
@@ -0,0 +1,72 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from giges.fake.asana import FakeAsana
+from giges.fake.server import FakeServer
+
+
+@click.group(name="fake", help="Stand-ins of the services used by giges")
+def fake_cli() -> None:
+    """
+    Placeholder function to create a CLI
+    group in the Giges command line.
+    """
+    pass
+
+
+@fake_cli.command(help="Serve a fake Asana and Slack until interrupted")
+@click.option("--host", default="127.0.0.1", help="Address to listen to")
+@click.option("--port", default=8081, help="Port to listen to")
+@click.option("--tasks", default=1000, help="Tasks in the workspace")
+@click.option("--projects", default=10, help="Projects in the workspace")
+@click.option("--users", default=20, help="Users in the workspace")
+@click.option("--subtasks", default=0, help="Subtasks of each task")
+@click.option("--seed", default=0, help="Seed of the random values")
+@click.option("--latency", default=0.0, help="Seconds before each answer")
+@click.option("--jitter", default=0.0, help="Random seconds of latency")
+@click.option("--error-rate", default=0.0, help="Ratio of 500 answers")
+@click.option("--throttle-rate", default=0.0, help="Ratio of 429 answers")
+@click.option("--retry-after", default=1, help="Seconds asked by the 429s")
+@with_appcontext
+def serve(
+    host: str,
+    port: int,
+    tasks: int,
+    projects: int,
+    users: int,
+    subtasks: int,
+    seed: int,
+    latency: float,
+    jitter: float,
+    error_rate: float,
+    throttle_rate: float,
+    retry_after: int,
+) -> None:
+    """
+    Serve a fake Asana workspace filled with synthetic tasks, and a fake
+    Slack, for giges to be measured offline.
+    """
+    asana = FakeAsana(current_app.config["ASANA_WORKSPACE"])
+    asana.seed(tasks, projects, users, subtasks, seed)
+    server = FakeServer(
+        (host, port),
+        asana,
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+        retry_after=retry_after,
+        seed=seed,
+    )
+    print(f"{len(asana.tasks)} tasks in {len(asana.projects)} projects")
+    print("Point giges to them with:")
+    print("export OAUTHLIB_INSECURE_TRANSPORT=1")
+    print(f"export GIGES_ASANA_BASE_URL={server.asana_url}")
+    print(f"export GIGES_SLACK_BASE_URL={server.slack_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,72 @@
+import json
+
+import click
+from flask.cli import with_appcontext
+
+from giges.loadgen import format_report, load_test
+
+
+@click.command(
+    name="loadgen", help="Fire signed Asana deliveries at a running giges"
+)
+@click.argument("target", type=str, default="http://localhost:8080")
+@click.option("--requests", default=1000, help="Deliveries to send")
+@click.option("--rps", default=10.0, help="Deliveries per second, 0 for max")
+@click.option("--concurrency", default=10, help="Deliveries at once")
+@click.option("--events", default=1, help="Most events of each delivery")
+@click.option(
+    "--replay",
+    is_flag=True,
+    default=False,
+    help="Deliver the stored events instead of synthetic ones",
+)
+@click.option(
+    "--as-recorded",
+    is_flag=True,
+    default=False,
+    help="Keep the timestamps of the replayed events",
+)
+@click.option("--seed", default=0, help="Seed of the synthetic events")
+@click.option(
+    "--json", "as_json", is_flag=True, default=False, help="Print JSON"
+)
+@with_appcontext
+def loadgen(
+    target: str,
+    requests: int,
+    rps: float,
+    concurrency: int,
+    events: int,
+    replay: bool,
+    as_recorded: bool,
+    seed: int,
+    as_json: bool,
+) -> None:
+    """
+    Send deliveries signed with the secret of each webhook to giges, and
+    report the latencies, errors and growth of the database.
+
+    :param target: the base URL of the running giges
+    :param requests: the most deliveries to send
+    :param rps: the deliveries started per second
+    :param concurrency: the deliveries sent at the same time
+    :param events: the most events of each synthetic delivery
+    :param replay: if True, the stored events are delivered again
+    :param as_recorded: if True, the replayed events keep their timestamps
+    :param seed: the seed of the synthetic events
+    :param as_json: if True, the report is printed as JSON
+    """
+    try:
+        report = load_test(
+            target.rstrip("/"),
+            requests,
+            rps,
+            concurrency,
+            events,
+            replay,
+            as_recorded,
+            seed,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(json.dumps(report, indent=4) if as_json else format_report(report))
@@ -0,0 +1,31 @@
+import click
+from flask.cli import with_appcontext
+
+from giges.handlers.report import refresh_reports
+
+
+@click.group(name="report", help="Manage the precomputed reports of giges")
+def report_cli() -> None:
+    """
+    Placeholder function to create a CLI
+    group in the Giges command line.
+    """
+    pass
+
+
+@report_cli.command(help="Recompute the reports from the current tasks")
+@click.option(
+    "--blocking",
+    is_flag=True,
+    default=False,
+    help="Lock the reports while refreshing them, which is faster",
+)
+@with_appcontext
+def refresh(blocking: bool = False) -> None:
+    """
+    Refresh the materialized views behind the reports.
+
+    :param blocking: if True, readers wait until the refresh ends
+    """
+    refresh_reports(concurrently=not blocking)
+    print("Reports refreshed")
@@ -0,0 +1,42 @@
+import json
+
+import click
+
+from giges.spec import PARSED_SPECIFICATION, build_specification
+from giges.startup import format_profile, profile_startup
+
+
+@click.command(
+    name="startup-profile",
+    help="Time the imports and phases of a cold start of giges",
+)
+@click.option("--top", default=15, help="Slowest packages to import shown")
+@click.option(
+    "--json", "as_json", is_flag=True, default=False, help="Print JSON"
+)
+def startup_profile(top: int, as_json: bool) -> None:
+    """
+    Start giges in a new interpreter as the Lambda entry point does, and
+    print how long each phase and the imports of each package take.
+
+    :param top: the amount of packages shown, the slowest to import
+    :param as_json: if True, the whole profile is printed as JSON
+    """
+    profile = profile_startup()
+    if as_json:
+        print(json.dumps(profile, indent=2))
+    else:
+        print(format_profile(profile, top))
+
+
+@click.command(
+    name="build-spec",
+    help="Store the parsed API specification loaded on startup",
+)
+def build_spec() -> None:
+    """
+    Parse the YAML API specification into the JSON copy loaded by giges
+    on startup, to be run after every change of the specification.
+    """
+    build_specification()
+    print(f"API specification stored in {PARSED_SPECIFICATION}")
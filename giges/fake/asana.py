@@ -0,0 +1,696 @@
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+import structlog
+
+from giges.settings import asana_fields
+
+logger = structlog.get_logger(__name__)
+
+# Sections of each seeded project, as in our boards
+SECTIONS = ("Backlog", "To Do", "Doing", "Review", "Done")
+# Largest page Asana returns
+PAGE_LIMIT = 100
+
+Response = Tuple[int, Dict[str, Any]]
+
+
+class FakeError(Exception):
+    """
+    An error answered by the fake API, as Asana would.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class FakeTask:
+    __slots__ = (
+        "gid",
+        "name",
+        "notes",
+        "completed",
+        "completed_at",
+        "created_at",
+        "modified_at",
+        "assignee",
+        "parent",
+        "memberships",
+        "custom_fields",
+    )
+
+    def __init__(self, gid: str, name: str, created_at: str):
+        self.gid = gid
+        self.name = name
+        self.notes = ""
+        self.completed = False
+        self.completed_at: Optional[str] = None
+        self.created_at = created_at
+        self.modified_at = created_at
+        self.assignee: Optional[str] = None
+        self.parent: Optional[str] = None
+        self.memberships: List[Tuple[str, str]] = []
+        self.custom_fields: Dict[str, Optional[str]] = {}
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def select(resource: Any, fields: Optional[List[str]]) -> Any:
+    """
+    Keep only the requested fields of a resource, as ``opt_fields`` does.
+
+    :param resource: the full representation of the resource
+    :param fields: the dotted paths of the fields, the compact
+                   representation by default
+    :return: the selected fields of the resource
+    """
+    if isinstance(resource, list):
+        return [select(item, fields) for item in resource]
+    if not isinstance(resource, dict):
+        return resource
+    if not fields:
+        fields = ["name"]
+
+    selected = {"gid": resource["gid"]} if "gid" in resource else {}
+    if "resource_type" in resource:
+        selected["resource_type"] = resource["resource_type"]
+    nested: Dict[str, List[str]] = {}
+    for field in fields:
+        name, _, rest = field.partition(".")
+        if rest:
+            nested.setdefault(name, []).append(rest)
+        elif name in resource:
+            selected[name] = select(resource[name], None)
+    for name, rest_fields in nested.items():
+        if name in resource:
+            selected[name] = select(resource[name], rest_fields)
+    return selected
+
+
+class FakeAsana:
+    """
+    In-memory Asana workspace, answering the parts of the API used by
+    giges: tasks, sections, subtasks, search, batch, webhooks and events.
+    """
+
+    def __init__(self, workspace: str = "1199978051314275"):
+        self.workspace = workspace
+        self.lock = threading.RLock()
+        self.gids = count(1300000000000000)
+        self.clock = datetime(2021, 10, 1, tzinfo=timezone.utc)
+        self.users: Dict[str, Dict[str, str]] = {}
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self.sections: Dict[str, Dict[str, str]] = {}
+        self.tasks: Dict[str, FakeTask] = {}
+        self.project_tasks: Dict[str, List[str]] = {}
+        self.section_tasks: Dict[str, List[str]] = {}
+        self.subtasks: Dict[str, List[str]] = {}
+        self.events: Dict[str, List[Dict[str, Any]]] = {}
+        self.webhooks: Dict[str, Dict[str, Any]] = {}
+        self.routes: List[Tuple[str, List[str], Callable]] = [
+            ("GET", ["users", "me"], self.get_me),
+            ("GET", ["users", None], self.get_user),
+            ("GET", ["projects", None], self.get_project),
+            ("GET", ["projects", None, "tasks"], self.get_project_tasks),
+            ("GET", ["projects", None, "sections"], self.get_sections),
+            ("GET", ["sections", None], self.get_section),
+            ("GET", ["sections", None, "tasks"], self.get_section_tasks),
+            ("POST", ["sections", None, "addTask"], self.add_task),
+            ("GET", ["tasks", None], self.get_task),
+            ("PUT", ["tasks", None], self.update_task),
+            ("GET", ["tasks", None, "subtasks"], self.get_subtasks),
+            ("POST", ["tasks"], self.create_task),
+            ("POST", ["tasks", None, "subtasks"], self.create_subtask),
+            ("POST", ["workspaces", None, "tasks"], self.create_task_in),
+            ("GET", ["workspaces", None, "tasks", "search"], self.search),
+            ("POST", ["batch"], self.batch),
+            ("GET", ["events"], self.get_events),
+            ("GET", ["webhooks"], self.get_webhooks),
+            ("POST", ["webhooks"], self.create_webhook),
+            ("DELETE", ["webhooks", None], self.delete_webhook),
+        ]
+
+    def new_gid(self) -> str:
+        return str(next(self.gids))
+
+    def tick(self) -> str:
+        self.clock += timedelta(milliseconds=1)
+        return _timestamp(self.clock)
+
+    def seed(
+        self,
+        tasks: int = 1000,
+        projects: int = 10,
+        users: int = 20,
+        subtasks: int = 0,
+        seed: int = 0,
+    ) -> None:
+        """
+        Fill the workspace with synthetic users, projects and tasks.
+
+        The same seed always builds the same workspace, with the tasks
+        spread over the projects and sections, assigned to the users, and
+        random values in our custom fields.
+
+        :param tasks: the amount of top level tasks
+        :param projects: the amount of projects
+        :param users: the amount of users
+        :param subtasks: the amount of subtasks of each task
+        :param seed: the seed of the random values
+        """
+        rnd = random.Random(seed)
+        with self.lock:
+            user_gids = [
+                self.add_user(f"User {n}") for n in range(max(users, 1))
+            ]
+            project_gids = [
+                self.add_project(f"Project {n}")
+                for n in range(max(projects, 1))
+            ]
+            for n in range(tasks):
+                project = self.projects[project_gids[n % len(project_gids)]]
+                task = self.add_task_to(
+                    f"Task {n}",
+                    project["gid"],
+                    rnd.choice(project["sections"]),
+                    assignee=rnd.choice(user_gids),
+                )
+                for gid, field in asana_fields.items():
+                    task.custom_fields[gid] = rnd.choice(
+                        [None, *field["options"]]
+                    )
+                for m in range(subtasks):
+                    subtask = self.add_task_to(f"Subtask {n}.{m}")
+                    subtask.parent = task.gid
+                    self.subtasks.setdefault(task.gid, []).append(subtask.gid)
+
+    def add_user(self, name: str) -> str:
+        gid = self.new_gid()
+        self.users[gid] = {
+            "gid": gid,
+            "resource_type": "user",
+            "name": name,
+            "email": f"{gid}@example.com",
+        }
+        return gid
+
+    def add_project(self, name: str, sections: Tuple = SECTIONS) -> str:
+        gid = self.new_gid()
+        self.projects[gid] = {"gid": gid, "name": name, "sections": []}
+        self.project_tasks[gid] = []
+        for section_name in sections:
+            section = self.new_gid()
+            self.sections[section] = {
+                "gid": section,
+                "name": section_name,
+                "project": gid,
+            }
+            self.section_tasks[section] = []
+            self.projects[gid]["sections"].append(section)
+        return gid
+
+    def add_task_to(
+        self,
+        name: str,
+        project: Optional[str] = None,
+        section: Optional[str] = None,
+        assignee: Optional[str] = None,
+    ) -> FakeTask:
+        task = FakeTask(self.new_gid(), name, self.tick())
+        task.assignee = assignee
+        self.tasks[task.gid] = task
+        if project:
+            section = section or self.projects[project]["sections"][0]
+            task.memberships.append((project, section))
+            self.project_tasks[project].append(task.gid)
+            self.section_tasks[section].append(task.gid)
+        return task
+
+    # Representations
+
+    def render_project(self, gid: str) -> Dict[str, Any]:
+        project = self.projects[gid]
+        return {
+            "gid": gid,
+            "resource_type": "project",
+            "name": project["name"],
+            "workspace": {"gid": self.workspace, "resource_type": "workspace"},
+        }
+
+    def render_section(self, gid: str) -> Dict[str, Any]:
+        section = self.sections[gid]
+        return {
+            "gid": gid,
+            "resource_type": "section",
+            "name": section["name"],
+            "project": self.render_project(section["project"]),
+        }
+
+    def render_task(self, task: FakeTask) -> Dict[str, Any]:
+        custom_fields = []
+        for gid, field in asana_fields.items():
+            option = task.custom_fields.get(gid)
+            custom_fields.append(
+                {
+                    "gid": gid,
+                    "resource_type": "custom_field",
+                    "name": field["name"],
+                    "enum_value": {
+                        "gid": option,
+                        "resource_type": "enum_option",
+                        "name": field["options"][option],
+                    }
+                    if option
+                    else None,
+                }
+            )
+        parent = self.tasks.get(task.parent or "")
+        return {
+            "gid": task.gid,
+            "resource_type": "task",
+            "resource_subtype": "default_task",
+            "name": task.name,
+            "notes": task.notes,
+            "completed": task.completed,
+            "completed_at": task.completed_at,
+            "created_at": task.created_at,
+            "modified_at": task.modified_at,
+            "assignee": self.users.get(task.assignee or ""),
+            "parent": {
+                "gid": parent.gid,
+                "resource_type": "task",
+                "name": parent.name,
+            }
+            if parent
+            else None,
+            "projects": [
+                self.render_project(project) for project, _ in task.memberships
+            ],
+            "memberships": [
+                {
+                    "project": self.render_project(project),
+                    "section": self.render_section(section),
+                }
+                for project, section in task.memberships
+            ],
+            "custom_fields": custom_fields,
+            "workspace": {"gid": self.workspace, "resource_type": "workspace"},
+        }
+
+    def page(
+        self, items: List[Any], query: Dict[str, str], path: str
+    ) -> Response:
+        """
+        Answer a page of a collection, with the offset of the next one.
+        """
+        limit = min(int(query.get("limit", PAGE_LIMIT)), PAGE_LIMIT)
+        start = int(query.get("offset", 0))
+        end = start + limit
+        next_page = None
+        if end < len(items):
+            next_page = {"offset": str(end), "path": f"{path}?offset={end}"}
+        fields = _fields(query)
+        data = [select(self.render(item), fields) for item in items[start:end]]
+        return 200, {"data": data, "next_page": next_page}
+
+    def render(self, item: Any) -> Dict[str, Any]:
+        if isinstance(item, FakeTask):
+            return self.render_task(item)
+        if item in self.sections:
+            return self.render_section(item)
+        return self.render_project(item)
+
+    def find_task(self, gid: str) -> FakeTask:
+        task = self.tasks.get(gid)
+        if task is None:
+            raise FakeError(404, f"task: Unknown object: {gid}")
+        return task
+
+    # Events
+
+    def record(
+        self, task: FakeTask, action: str, field: Optional[str] = None
+    ) -> None:
+        """
+        Add an event about a task to the streams of the task and its
+        projects, delivering it to the webhooks watching them.
+        """
+        task.modified_at = self.tick()
+        resource = {
+            "gid": task.gid,
+            "resource_type": "task",
+            "resource_subtype": "default_task",
+        }
+        streams = [task.gid] + [project for project, _ in task.memberships]
+        for stream in streams:
+            event: Dict[str, Any] = {
+                "action": action,
+                "created_at": task.modified_at,
+                "resource": resource,
+                "user": None,
+            }
+            if stream != task.gid:
+                event["parent"] = {"gid": stream, "resource_type": "project"}
+            if field:
+                event["change"] = {"field": field, "action": "changed"}
+            self.events.setdefault(stream, []).append(event)
+            for webhook in self.webhooks.values():
+                if webhook["resource"] == stream:
+                    self.deliver(webhook, [event])
+
+    def deliver(
+        self, webhook: Dict[str, Any], events: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Send events to the target of a webhook, signed with its secret.
+        """
+        body = json.dumps({"events": events}).encode()
+        signature = hmac.new(
+            webhook["secret"].encode(), msg=body, digestmod=hashlib.sha256
+        ).hexdigest()
+
+        def post() -> None:
+            try:
+                requests.post(
+                    webhook["target"],
+                    data=body,
+                    headers={
+                        "Content-Type": "application/json",
+                        "X-Hook-Signature": signature,
+                    },
+                    timeout=10,
+                )
+            except requests.RequestException:
+                logger.warning(
+                    "Fake webhook delivery failed", target=webhook["target"]
+                )
+
+        threading.Thread(target=post, daemon=True).start()
+
+    # Routes
+
+    def dispatch(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        data: Optional[Dict[str, Any]] = None,
+    ) -> Response:
+        """
+        Answer a request to the API.
+
+        :param method: the HTTP method
+        :param path: the path after the base URL
+        :param query: the query string parameters
+        :param data: the ``data`` of a JSON body
+        :return: the status and the JSON body of the response
+        """
+        parts = [part for part in path.split("/") if part]
+        for route_method, route, handler in self.routes:
+            if route_method != method or len(route) != len(parts):
+                continue
+            args = []
+            for expected, part in zip(route, parts):
+                if expected is None:
+                    args.append(part)
+                elif expected != part:
+                    break
+            else:
+                try:
+                    with self.lock:
+                        return handler(*args, query=query, data=data or {})
+                except FakeError as e:
+                    return e.status, {"errors": [{"message": e.message}]}
+        return 404, {"errors": [{"message": f"No route for {path}"}]}
+
+    def get_me(self, query: Dict, data: Dict) -> Response:
+        user = next(iter(self.users.values()), None) or {"gid": "1"}
+        return 200, {"data": select(user, _fields(query))}
+
+    def get_user(self, gid: str, query: Dict, data: Dict) -> Response:
+        if gid not in self.users:
+            raise FakeError(404, f"user: Unknown object: {gid}")
+        return 200, {"data": select(self.users[gid], _fields(query))}
+
+    def get_project(self, gid: str, query: Dict, data: Dict) -> Response:
+        if gid not in self.projects:
+            raise FakeError(404, f"project: Unknown object: {gid}")
+        return 200, {"data": select(self.render(gid), _fields(query))}
+
+    def get_project_tasks(self, gid: str, query: Dict, data: Dict) -> Response:
+        if gid not in self.projects:
+            raise FakeError(404, f"project: Unknown object: {gid}")
+        tasks = [self.tasks[t] for t in self.project_tasks[gid]]
+        return self.page(tasks, query, f"/projects/{gid}/tasks")
+
+    def get_sections(self, gid: str, query: Dict, data: Dict) -> Response:
+        if gid not in self.projects:
+            raise FakeError(404, f"project: Unknown object: {gid}")
+        sections = self.projects[gid]["sections"]
+        return self.page(sections, query, f"/projects/{gid}/sections")
+
+    def get_section(self, gid: str, query: Dict, data: Dict) -> Response:
+        if gid not in self.sections:
+            raise FakeError(404, f"section: Unknown object: {gid}")
+        return 200, {"data": select(self.render(gid), _fields(query))}
+
+    def get_section_tasks(self, gid: str, query: Dict, data: Dict) -> Response:
+        if gid not in self.sections:
+            raise FakeError(404, f"section: Unknown object: {gid}")
+        tasks = [self.tasks[t] for t in self.section_tasks[gid]]
+        return self.page(tasks, query, f"/sections/{gid}/tasks")
+
+    def add_task(self, gid: str, query: Dict, data: Dict) -> Response:
+        if gid not in self.sections:
+            raise FakeError(404, f"section: Unknown object: {gid}")
+        task = self.find_task(data.get("task", ""))
+        project = self.sections[gid]["project"]
+        for position, (member_of, section) in enumerate(task.memberships):
+            if member_of == project:
+                self.section_tasks[section].remove(task.gid)
+                task.memberships[position] = (project, gid)
+                break
+        else:
+            task.memberships.append((project, gid))
+            self.project_tasks[project].append(task.gid)
+        self.section_tasks[gid].append(task.gid)
+        self.record(task, "changed", "memberships")
+        return 200, {"data": {}}
+
+    def get_task(self, gid: str, query: Dict, data: Dict) -> Response:
+        task = self.find_task(gid)
+        return 200, {"data": select(self.render(task), _fields(query))}
+
+    def update_task(self, gid: str, query: Dict, data: Dict) -> Response:
+        task = self.find_task(gid)
+        for field in ("name", "notes"):
+            if field in data:
+                setattr(task, field, data[field])
+                self.record(task, "changed", field)
+        if "completed" in data:
+            task.completed = bool(data["completed"])
+            task.completed_at = self.tick() if task.completed else None
+            self.record(task, "changed", "completed")
+        for field, option in data.get("custom_fields", {}).items():
+            if field not in asana_fields:
+                raise FakeError(400, f"custom_fields: Unknown {field}")
+            task.custom_fields[field] = option
+            self.record(task, "changed", "custom_fields")
+        return 200, {"data": select(self.render(task), _fields(query))}
+
+    def get_subtasks(self, gid: str, query: Dict, data: Dict) -> Response:
+        self.find_task(gid)
+        subtasks = [self.tasks[t] for t in self.subtasks.get(gid, [])]
+        return self.page(subtasks, query, f"/tasks/{gid}/subtasks")
+
+    def create_task(self, query: Dict, data: Dict) -> Response:
+        if "name" not in data:
+            raise FakeError(400, "name: Missing input")
+        projects = data.get("projects", [])
+        for project in projects:
+            if project not in self.projects:
+                raise FakeError(400, f"projects: Unknown object: {project}")
+        sections = {
+            membership["project"]: membership["section"]
+            for membership in data.get("memberships", [])
+        }
+        task = self.add_task_to(
+            data["name"],
+            projects[0] if projects else None,
+            sections.get(projects[0]) if projects else None,
+            assignee=data.get("assignee"),
+        )
+        task.notes = data.get("notes", "")
+        if data.get("parent"):
+            task.parent = self.find_task(data["parent"]).gid
+            self.subtasks.setdefault(task.parent, []).append(task.gid)
+        self.record(task, "added")
+        return 201, {"data": select(self.render(task), _fields(query))}
+
+    def create_subtask(self, gid: str, query: Dict, data: Dict) -> Response:
+        return self.create_task(query, {**data, "parent": gid})
+
+    def create_task_in(
+        self, workspace: str, query: Dict, data: Dict
+    ) -> Response:
+        if workspace != self.workspace:
+            raise FakeError(404, f"workspace: Unknown object: {workspace}")
+        return self.create_task(query, data)
+
+    def search(self, workspace: str, query: Dict, data: Dict) -> Response:
+        if workspace != self.workspace:
+            raise FakeError(404, f"workspace: Unknown object: {workspace}")
+        assignees = _any(query.get("assignee.any"))
+        projects = _any(query.get("projects.any"))
+        completed = query.get("completed")
+        is_subtask = query.get("is_subtask")
+        before = query.get("created_at.before")
+        custom_values = {
+            key.split(".")[1]: value
+            for key, value in query.items()
+            if key.startswith("custom_fields.") and key.endswith(".value")
+        }
+        if projects:
+            candidates = {
+                gid
+                for project in projects
+                for gid in self.project_tasks.get(project, [])
+            }
+            tasks = [self.tasks[gid] for gid in candidates]
+        else:
+            tasks = list(self.tasks.values())
+
+        found = [
+            task
+            for task in tasks
+            if (not assignees or task.assignee in assignees)
+            and (completed is None or str(task.completed).lower() == completed)
+            and (
+                is_subtask is None
+                or str(task.parent is not None).lower() == is_subtask
+            )
+            and (before is None or task.created_at < before)
+            and all(
+                task.custom_fields.get(field) == value
+                for field, value in custom_values.items()
+            )
+        ]
+        sort_by = query.get("sort_by", "modified_at")
+        found.sort(
+            key=lambda task: getattr(task, sort_by, task.modified_at),
+            reverse=query.get("sort_ascending") != "true",
+        )
+        limit = min(int(query.get("limit", PAGE_LIMIT)), PAGE_LIMIT)
+        fields = _fields(query)
+        return 200, {
+            "data": [
+                select(self.render(task), fields) for task in found[:limit]
+            ]
+        }
+
+    def batch(self, query: Dict, data: Dict) -> Response:
+        actions = data.get("actions", [])
+        if len(actions) > 10:
+            raise FakeError(400, "actions: At most 10 actions")
+        responses = []
+        for action in actions:
+            path, _, query_string = action["relative_path"].partition("?")
+            action_query = dict(
+                part.split("=", 1) for part in query_string.split("&") if part
+            )
+            options = action.get("options", {})
+            if options.get("fields"):
+                action_query["opt_fields"] = ",".join(options["fields"])
+            for key in ("limit", "offset"):
+                if key in options:
+                    action_query[key] = str(options[key])
+            status, body = self.dispatch(
+                action["method"].upper(),
+                path,
+                action_query,
+                action.get("data"),
+            )
+            responses.append(
+                {"status_code": status, "headers": {}, "body": body}
+            )
+        return 200, {"data": responses}
+
+    def get_events(self, query: Dict, data: Dict) -> Response:
+        resource = query.get("resource", "")
+        if resource not in self.projects and resource not in self.tasks:
+            raise FakeError(404, f"resource: Unknown object: {resource}")
+        stream = self.events.get(resource, [])
+        token_resource, _, position = query.get("sync", "").partition(":")
+        if token_resource != resource or not position.isdigit():
+            return 412, {
+                "errors": [{"message": "Sync token invalid or too old"}],
+                "sync": f"{resource}:{len(stream)}",
+            }
+        start = int(position)
+        end = min(start + PAGE_LIMIT, len(stream))
+        return 200, {
+            "data": stream[start:end],
+            "sync": f"{resource}:{end}",
+            "has_more": end < len(stream),
+        }
+
+    def get_webhooks(self, query: Dict, data: Dict) -> Response:
+        webhooks = [_public(webhook) for webhook in self.webhooks.values()]
+        return 200, {"data": webhooks}
+
+    def create_webhook(self, query: Dict, data: Dict) -> Response:
+        resource = data.get("resource", "")
+        if resource not in self.projects and resource not in self.tasks:
+            raise FakeError(400, f"resource: Unknown object: {resource}")
+        secret = secrets.token_hex(16)
+        # Asana only creates the webhook after the target echoes the secret
+        try:
+            response = requests.post(
+                data["target"], headers={"X-Hook-Secret": secret}, timeout=10
+            )
+        except requests.RequestException:
+            raise FakeError(400, "target: Could not complete the handshake")
+        if response.headers.get("X-Hook-Secret") != secret:
+            raise FakeError(400, "target: Could not complete the handshake")
+
+        gid = self.new_gid()
+        self.webhooks[gid] = {
+            "gid": gid,
+            "resource_type": "webhook",
+            "active": True,
+            "resource": resource,
+            "target": data["target"],
+            "filters": data.get("filters", []),
+            "secret": secret,
+        }
+        return 201, {"data": _public(self.webhooks[gid])}
+
+    def delete_webhook(self, gid: str, query: Dict, data: Dict) -> Response:
+        if self.webhooks.pop(gid, None) is None:
+            raise FakeError(404, f"webhook: Unknown object: {gid}")
+        return 200, {"data": {}}
+
+
+def _fields(query: Dict[str, str]) -> Optional[List[str]]:
+    fields = query.get("opt_fields")
+    return fields.split(",") if fields else None
+
+
+def _any(value: Optional[str]) -> Optional[set]:
+    return set(value.split(",")) if value else None
+
+
+def _public(webhook: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in webhook.items() if k != "secret"}
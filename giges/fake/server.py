@@ -0,0 +1,176 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from giges.fake.asana import FakeAsana
+from giges.fake.slack import FakeSlack
+
+# Where each fake API is mounted, to be used as its base URL
+ASANA_PREFIX = "/api/1.0"
+SLACK_PREFIX = "/slack/api/"
+
+
+class FakeServer(ThreadingHTTPServer):
+    """
+    HTTP server standing in for Asana and Slack, with injected latency,
+    server errors and rate limiting.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        asana: Optional[FakeAsana] = None,
+        slack: Optional[FakeSlack] = None,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        throttle_rate: float = 0,
+        retry_after: int = 1,
+        seed: Optional[int] = None,
+    ):
+        """
+        :param address: the host and port to listen to, any free port by
+                        default
+        :param asana: the fake Asana workspace, an empty one by default
+        :param slack: the fake Slack, an empty one by default
+        :param latency: the seconds waited before each answer
+        :param jitter: the most random seconds added to the latency
+        :param error_rate: the ratio of requests answered with a 500
+        :param throttle_rate: the ratio of requests answered with a 429
+        :param retry_after: the seconds asked to wait by the 429s
+        :param seed: the seed of the injected faults
+        """
+        super().__init__(address, FakeHandler)
+        self.host = address[0]
+        self.asana = asana or FakeAsana()
+        self.slack = slack or FakeSlack()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests: Counter = Counter()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.server_port}"
+
+    @property
+    def asana_url(self) -> str:
+        return f"{self.url}{ASANA_PREFIX}"
+
+    @property
+    def slack_url(self) -> str:
+        return f"{self.url}{SLACK_PREFIX}"
+
+    def start(self) -> "FakeServer":
+        """
+        Serve in a background thread.
+
+        :return: the server itself
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def fault(self) -> Optional[int]:
+        """
+        Wait the injected latency, then pick the injected fault if any.
+
+        :return: the status of the fault, None to answer normally
+        """
+        with self.random_lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            draw = self.random.random()
+        if delay > 0:
+            time.sleep(delay)
+        if draw < self.throttle_rate:
+            return 429
+        if draw < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written apart, do not wait to merge them
+    disable_nagle_algorithm = True
+    server: FakeServer
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        raw = self.rfile.read(length)
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(raw)
+        return dict(parse_qsl(raw.decode()))
+
+    def _respond(
+        self,
+        status: int,
+        content: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self) -> None:
+        url = urlparse(self.path)
+        query = dict(parse_qsl(url.query))
+        body = self._body()
+        self.server.requests[f"{self.command} {url.path}"] += 1
+
+        fault = self.server.fault()
+        if fault == 429:
+            self._respond(
+                429,
+                {"ok": False, "error": "ratelimited", "errors": []},
+                {"Retry-After": str(self.server.retry_after)},
+            )
+            return
+        if fault == 500:
+            self._respond(
+                500, {"ok": False, "error": "fatal_error", "errors": []}
+            )
+            return
+
+        if url.path.startswith(SLACK_PREFIX):
+            method = url.path.split("/")[-1]
+            self._respond(*self.server.slack.dispatch(method, body))
+        elif url.path.startswith(ASANA_PREFIX):
+            fields = body.get("options", {}).get("fields")
+            if fields:
+                query["opt_fields"] = ",".join(fields)
+            status, content = self.server.asana.dispatch(
+                self.command,
+                url.path.replace(ASANA_PREFIX, "", 1),
+                query,
+                body.get("data"),
+            )
+            self._respond(status, content)
+        else:
+            self._respond(404, {"errors": [{"message": "Not found"}]})
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args: Any) -> None:
+        pass
@@ -0,0 +1,39 @@
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+Response = Tuple[int, Dict[str, Any]]
+
+
+class FakeSlack:
+    """
+    In-memory Slack, keeping the messages posted by giges.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.messages: List[Dict[str, Any]] = []
+
+    def dispatch(self, method: str, data: Dict[str, Any]) -> Response:
+        """
+        Answer a call to a Slack Web API method.
+
+        :param method: the name of the method, like ``chat.postMessage``
+        :param data: the arguments of the call
+        :return: the status and the JSON body of the response
+        """
+        if method == "auth.test":
+            return 200, {"ok": True, "user_id": "UGIGES", "team": "Fake"}
+        if method != "chat.postMessage":
+            return 404, {"ok": False, "error": "unknown_method"}
+        if not data.get("channel"):
+            return 200, {"ok": False, "error": "channel_not_found"}
+
+        with self.lock:
+            message = {
+                "type": "message",
+                "text": data.get("text", ""),
+                "ts": f"{time.time():.6f}",
+            }
+            self.messages.append({"channel": data["channel"], **message})
+        return 200, {"ok": True, "channel": data["channel"], **message}
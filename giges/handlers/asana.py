@@ -1,74 +1,222 @@
 import hashlib
 import hmac
-from typing import Any, Callable, Dict, List, Tuple, Union
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import asana
 import iso8601
 import structlog
 from connexion import request
 from flask import current_app
+from sqlalchemy import and_, bindparam, delete, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
 
+from giges.asana import connection_stats, create_client, projection
 from giges.db import db
 from giges.models.asana import (
+    Delivery,
+    DirtyTask,
     Event,
+    Fingerprint,
     Project,
     ResourceTypeEnum,
     Task,
     TaskChange,
     Webhook,
+    WorkflowTask,
 )
+from giges.models.mixins import _utc_now
+from giges.settings import asana_fields
+from giges.util import TTLCache, decode_cursor, encode_cursor
+
+if TYPE_CHECKING:
+    from giges.asana_client import RateLimitedClient
 
 logger = structlog.get_logger(__name__)
 
+# Maximum number of actions accepted by the Asana batch API in one request
+BATCH_ACTIONS_LIMIT = 10
 
-def create_client() -> asana.Client:
-    """
-    Initialize and return an Asana sdk object.
+# Columns of a task that we take from Asana
+TASK_COLUMNS = (
+    "name",
+    "description",
+    "completed",
+    "completed_at",
+    "class_of_service",
+    "task_progress",
+    "item_category",
+    "related_service",
+    "section",
+    "project_external_id",
+)
+# Columns of a task whose changes are recorded
+TRACKED_COLUMNS = (
+    "class_of_service",
+    "task_progress",
+    "item_category",
+    "related_service",
+    "section",
+)
+# Fields of an Asana task named differently than the column they feed,
+# None when Asana does not have such a field
+TASK_COLUMN_FIELDS: Dict[str, Optional[str]] = {
+    "description": None,
+    "section": "memberships.section.name",
+    "project_external_id": "memberships.project.gid",
+}
+# Custom fields of an Asana task feeding the columns of a task
+TASK_CUSTOM_FIELDS = {
+    gid: field["column"]
+    for gid, field in asana_fields.items()
+    if field["column"] in TASK_COLUMNS
+}
+# Fields of an Asana task read to save it as a task
+TASK_OPT_FIELDS = projection(
+    ["gid", "custom_fields.gid", "custom_fields.enum_value.gid"],
+    filter(
+        None,
+        (
+            TASK_COLUMN_FIELDS.get(column, column)
+            for column in TASK_COLUMNS
+            if column not in TASK_CUSTOM_FIELDS.values()
+        ),
+    ),
+)
+# Fields of an Asana task whose changes can modify the columns of a task
+TASK_FIELDS = frozenset(field.split(".")[0] for field in TASK_OPT_FIELDS)
+# Section of the Customer Workflow project holding the template tasks
+WORKFLOW_TEMPLATE_SECTION = "1201165296613104"
+# Fields of an Asana task read to follow the customer workflow
+WORKFLOW_OPT_FIELDS = projection(
+    ["gid"],
+    [
+        "memberships.project.gid",
+        "memberships.project.name",
+        "memberships.section.gid",
+        "memberships.section.name",
+    ],
+)
 
-    :return: the asana client itself
+
+class AsanaActionError(Exception):
+    """
+    An action of a batch request failed with an error worth retrying, like
+    a rate limit or a server error.
     """
-    return asana.Client.access_token(current_app.config["ASANA_TOKEN"])
 
 
-def retrieve_task_information(asana_id: str) -> Dict[str, Any]:
+def batch_requests(
+    client: "RateLimitedClient", actions: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
     """
-    Contacts Asana and download all the information from a task.
+    Send many requests to Asana grouped through the batch API.
 
-    :param asana_id: the external (Asana) ID of the task
-    :return: the dictionary from the JSON parsed information
+    Each action fails or succeeds by itself, the responses keep the order
+    of the actions and contain their own status code, headers and body.
+
+    :param client: the asana client
+    :param actions: the actions with relative_path, method and options
+    :return: the list of responses, one for each action
     """
-    client = create_client()
-    return client.tasks.find_by_id(asana_id)
+    responses: List[Dict[str, Any]] = []
+    for start in range(0, len(actions), BATCH_ACTIONS_LIMIT):
+        end = start + BATCH_ACTIONS_LIMIT
+        responses.extend(
+            client.batch_api.create_batch_request(
+                {"actions": actions[start:end]}
+            )
+        )
+    return responses
 
 
-def retrieve_section_tasks(asana_id: str) -> List[Dict[str, Any]]:
+def retrieve_tasks_information(
+    asana_ids: Iterable[str],
+    fields: List[str] = TASK_OPT_FIELDS,
+) -> Dict[str, Dict[str, Any]]:
     """
+    Contacts Asana and download the information from many tasks,
+    using as few requests as the batch API allows.
 
-    :param asana_id: the external (Asana) ID of the section
-    :return: the dictionary from the JSON parsed information
+    The tasks that Asana does not find or does not let us see are logged
+    and left out, any other failure raises, so whatever asked for the
+    tasks is retried instead of losing their changes.
+
+    :param asana_ids: the external (Asana) IDs of the tasks
+    :param fields: the fields of the tasks to retrieve
+    :return: the dictionary of the tasks information by their ID
+    :raise AsanaActionError: when Asana fails to return a task for another
+                             reason than a 403 or a 404
     """
+    asana_ids = list(asana_ids)
+    if not asana_ids:
+        return {}
+
     client = create_client()
-    return client.get_collection(f"/sections/{asana_id}/tasks", {})
+    responses = batch_requests(
+        client,
+        [
+            {
+                "relative_path": f"/tasks/{asana_id}",
+                "method": "get",
+                "options": {"fields": fields},
+            }
+            for asana_id in asana_ids
+        ],
+    )
+
+    tasks = {}
+    for asana_id, response in zip(asana_ids, responses):
+        status = response["status_code"]
+        if status == 200:
+            tasks[asana_id] = response["body"]["data"]
+        elif status not in (403, 404):
+            raise AsanaActionError(
+                f"Asana answered {status} retrieving the task {asana_id}"
+            )
+        else:
+            logger.warning(
+                "Failed to retrieve a task from Asana",
+                task=asana_id,
+                status=response["status_code"],
+                errors=response["body"].get("errors"),
+            )
+    return tasks
 
 
-def retrieve_subtasks(asana_id: str) -> List[Dict[str, Any]]:
+def retrieve_section_tasks(asana_id: str) -> List[Dict[str, Any]]:
     """
 
-    :param asana_id: the external (Asana) ID of the task
+    :param asana_id: the external (Asana) ID of the section
     :return: the dictionary from the JSON parsed information
     """
     client = create_client()
-    return client.get_collection(f"/tasks/{asana_id}/subtasks", {})
+    # The client pages lazily, through an iterator only read once
+    return list(client.get_collection(f"/sections/{asana_id}/tasks", {}))
 
 
-def create_task(
+def task_parameters(
     name: str, project_id: str, memberships: List[Dict[str, str]] = None
-) -> None:
+) -> Dict[str, Any]:
     """
+    Build the information of a task created by giges.
 
     :param name: the name of the future task
     :param project_id: the external (Asana) ID of the project
     :param memberships: the list of deep tree position of the task
+    :return: the parameters of the task for Asana
     """
     parameters: Dict[str, Any] = {
         "name": name,
@@ -77,34 +225,175 @@ def create_task(
     }
     if memberships:
         parameters["memberships"] = memberships
-    client = create_client()
-    client.tasks.create_in_workspace(
-        current_app.config["ASANA_WORKSPACE"],
-        parameters,
-    )
+    return parameters
 
 
-def update_task(task: Task, asana_task: Dict[str, Any]) -> TaskChange:
+def task_values(asana_task: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Set the values of a task to the current ones in  Asana.
+    Map the information of a task in Asana to the columns of a task.
+
+    Values that Asana does not set are left out, so they do not overwrite
+    what we already know of the task.
 
-    :param task: the task to update
     :param asana_task: the current task information in Asana
-    :return: the object containing the task changes
+    :return: the values of the task by column name
     """
-    task.completed = asana_task.get("completed")
+    values = {
+        "completed": asana_task.get("completed"),
+        "name": asana_task.get("name"),
+        "description": asana_task.get("description"),
+    }
     if asana_task.get("completed_at"):
-        task.completed_at = iso8601.parse_date(asana_task.get("completed_at"))
-    task.name = asana_task.get("name")
-    task.description = asana_task.get("description")
+        values["completed_at"] = iso8601.parse_date(
+            asana_task.get("completed_at")
+        )
     if len(asana_task["memberships"]):
-        task.section = asana_task["memberships"][0]["section"]["name"]
-    task.save_custom_fields(asana_task["custom_fields"])
+        membership = asana_task["memberships"][0]
+        values["section"] = membership["section"]["name"]
+        if membership.get("project"):
+            values["project_external_id"] = membership["project"]["gid"]
+    values.update(Task.custom_field_values(asana_task["custom_fields"]))
+    return values
 
-    task_change = TaskChange(task=task)
-    task_change.save_task_changes()
 
-    return task_change
+def save_tasks(asana_tasks: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Insert or update many tasks at once and record their changes.
+
+    The current tasks are loaded in a single query, written back with a
+    single INSERT ... ON CONFLICT DO UPDATE and their changes are inserted
+    in one go, no matter how many tasks are saved. Tasks that did not
+    change are neither updated nor get a change recorded.
+
+    :param asana_tasks: the current tasks information by their external ID
+    :return: the giges IDs of the saved tasks by their external ID
+    """
+    if not asana_tasks:
+        return {}
+
+    current_tasks = {
+        task.external_id: task
+        for task in Task.query.filter(Task.external_id.in_(asana_tasks.keys()))
+    }
+
+    now = _utc_now()
+    rows = []
+    changes = {}
+    for external_id, asana_task in asana_tasks.items():
+        current = dict.fromkeys(TASK_COLUMNS)
+        if external_id in current_tasks:
+            task = current_tasks[external_id]
+            current.update({c: getattr(task, c) for c in TASK_COLUMNS})
+        values = {**current, **task_values(asana_task)}
+        rows.append({"external_id": external_id, "updated_at": now, **values})
+        changes[external_id] = {
+            column: values[column]
+            for column in TRACKED_COLUMNS
+            if external_id not in current_tasks
+            or values[column] != current[column]
+        }
+
+    table = Task.__table__
+    statement = insert(table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.external_id],
+        set_={
+            column: statement.excluded[column]
+            for column in TASK_COLUMNS + ("updated_at",)
+        },
+        # Tasks without changes keep their updated_at, and so their ETag
+        where=or_(
+            *(
+                table.c[column].is_distinct_from(statement.excluded[column])
+                for column in TASK_COLUMNS
+            )
+        ),
+    ).returning(table.c.id, table.c.external_id)
+    saved = {
+        external_id: task_id
+        for task_id, external_id in db.session.execute(statement)
+    }
+    task_ids = {
+        external_id: task.id for external_id, task in current_tasks.items()
+    }
+    task_ids.update(saved)
+    missing = set(asana_tasks) - set(task_ids)
+    if missing:
+        # Inserted with the same values by a concurrent transaction
+        task_ids.update(
+            Task.query.filter(Task.external_id.in_(missing)).with_entities(
+                Task.external_id, Task.id
+            )
+        )
+
+    # The tasks left as they were had their changes recorded by whoever
+    # wrote the same values first
+    task_changes = [
+        {
+            "task_id": saved[external_id],
+            **dict.fromkeys(TRACKED_COLUMNS),
+            **changed,
+        }
+        for external_id, changed in changes.items()
+        if changed and external_id in saved
+    ]
+    if task_changes:
+        db.session.execute(TaskChange.__table__.insert(), task_changes)
+    for task in current_tasks.values():
+        db.session.expire(task)
+
+    return task_ids
+
+
+def is_relevant_task_event(event: Dict[str, Any]) -> bool:
+    """
+    Tell if an event can modify the information we keep about a task.
+
+    Events on other resources, like stories or attachments, and changes of
+    fields that we do not store, like followers or likes, are irrelevant.
+
+    :param event: an event given by Asana
+    :return: True if the task should be retrieved again
+    """
+    if event["resource"].get("resource_type") != "task":
+        return False
+
+    change = event.get("change")
+    if not change:
+        # Tasks added, removed, moved between sections or deleted
+        return True
+    if change.get("field") == "custom_fields":
+        custom_field = change.get("new_value") or {}
+        return custom_field.get("gid", "") in TASK_CUSTOM_FIELDS
+    return change.get("field") in TASK_FIELDS
+
+
+def process_task_events(events: List[Dict[str, Any]]) -> None:
+    """
+    Update the tasks changed by some events, or mark them as dirty when
+    debouncing, without committing.
+
+    :param events: the list of events given by Asana
+    """
+    task_gids = set()
+    skipped = 0
+    for event in events:
+        if is_relevant_task_event(event):
+            task_gids.add(event["resource"]["gid"])
+        else:
+            skipped += 1
+    if skipped:
+        logger.info(
+            "Skipped irrelevant task events",
+            events=len(events),
+            skipped=skipped,
+        )
+
+    if task_gids:
+        if current_app.config["ASANA_DEBOUNCE_SECONDS"]:
+            mark_tasks_dirty(task_gids)
+        else:
+            save_tasks(retrieve_tasks_information(task_gids))
 
 
 def handle_task_events(
@@ -116,22 +405,318 @@ def handle_task_events(
     :param webhook: the handled webhook
     :param events: the list of events given by Asana
     """
-    task_gids = set()
-    for event in events:
-        task_gids.add(event["resource"]["gid"])
-
-    for task_gid in task_gids:
-        task = Task.query.filter_by(external_id=task_gid).one_or_none()
-        if task is None:
-            task = Task(external_id=task_gid)
-        asana_task = retrieve_task_information(task_gid)
-        task_change = update_task(task, asana_task)
-        db.session.add(task)
-        db.session.add(task_change)
+    process_task_events(events)
     db.session.add(Event(webhook=webhook, content=events))
     db.session.commit()
 
 
+def mark_tasks_dirty(asana_ids: Iterable[str]) -> None:
+    """
+    Remember that some tasks changed, to retrieve them later all at once.
+
+    A burst of events on the same task keeps a single row, only moving its
+    last seen timestamp forward.
+
+    :param asana_ids: the external (Asana) IDs of the changed tasks
+    """
+    now = _utc_now()
+    rows = [
+        {"external_id": gid, "first_seen_at": now, "last_seen_at": now}
+        for gid in sorted(asana_ids)
+    ]
+    if not rows:
+        return
+
+    statement = insert(DirtyTask).values(rows)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[DirtyTask.external_id],
+            set_={"last_seen_at": statement.excluded.last_seen_at},
+        )
+    )
+
+
+def flush_dirty_tasks(force: bool = False) -> int:
+    """
+    Retrieve and save the dirty tasks that stopped changing.
+
+    A task is flushed once it had no events for ASANA_DEBOUNCE_SECONDS, or
+    once it has been dirty for ASANA_DEBOUNCE_MAX_SECONDS even if it keeps
+    changing. Tasks touched again while being retrieved stay dirty.
+
+    :param force: if True, flush all the dirty tasks right away
+    :return: the amount of flushed tasks
+    """
+    now = _utc_now()
+    query = DirtyTask.query.filter(DirtyTask.last_seen_at <= now)
+    if not force:
+        quiet = now - timedelta(
+            seconds=current_app.config["ASANA_DEBOUNCE_SECONDS"]
+        )
+        overdue = now - timedelta(
+            seconds=current_app.config["ASANA_DEBOUNCE_MAX_SECONDS"]
+        )
+        query = query.filter(
+            or_(
+                DirtyTask.last_seen_at <= quiet,
+                DirtyTask.first_seen_at <= overdue,
+            )
+        )
+
+    flushed = 0
+    batch_size = current_app.config["ASANA_DEBOUNCE_BATCH_SIZE"]
+    while True:
+        dirty = {
+            row.external_id: row.last_seen_at
+            for row in query.order_by(DirtyTask.first_seen_at).limit(
+                batch_size
+            )
+        }
+        if not dirty:
+            break
+
+        save_tasks(retrieve_tasks_information(dirty))
+        db.session.execute(
+            delete(DirtyTask).where(
+                DirtyTask.external_id == bindparam("gid"),
+                DirtyTask.last_seen_at == bindparam("seen"),
+            ),
+            [{"gid": gid, "seen": seen} for gid, seen in dirty.items()],
+        )
+        db.session.commit()
+        flushed += len(dirty)
+    return flushed
+
+
+class TemplateSubtask(NamedTuple):
+    gid: str
+    name: str
+
+
+class WorkflowTemplate(NamedTuple):
+    gid: str
+    name: str
+    subtasks: Tuple[TemplateSubtask, ...]
+
+
+workflow_templates_cache = TTLCache(maxsize=1)
+
+
+def workflow_templates() -> Dict[str, WorkflowTemplate]:
+    """
+    Return the templates of the customer workflow by section name.
+
+    The whole tree of template tasks and their subtasks is read from Asana
+    on first use and kept for ASANA_WORKFLOW_TEMPLATES_TTL seconds, with
+    the subtasks of all the templates fetched through the batch API.
+
+    :return: the templates by the name of the section they apply to
+    :raise AsanaActionError: when the subtasks of a template are not
+                             retrieved, nothing is cached then
+    """
+    templates = workflow_templates_cache.get(WORKFLOW_TEMPLATE_SECTION)
+    if templates is not None:
+        return templates
+
+    template_tasks = retrieve_section_tasks(WORKFLOW_TEMPLATE_SECTION)
+    responses = batch_requests(
+        create_client(),
+        [
+            {
+                "relative_path": f"/tasks/{task['gid']}/subtasks",
+                "method": "get",
+                "options": {"fields": ["name"]},
+            }
+            for task in template_tasks
+        ],
+    )
+    templates = {}
+    for task, response in zip(template_tasks, responses):
+        if response["status_code"] != 200:
+            # Never cache templates missing their subtasks
+            raise AsanaActionError(
+                f"Asana answered {response['status_code']} retrieving the "
+                f"subtasks of the template {task['gid']}"
+            )
+        templates[task["name"]] = WorkflowTemplate(
+            gid=task["gid"],
+            name=task["name"],
+            subtasks=tuple(
+                TemplateSubtask(gid=subtask["gid"], name=subtask["name"])
+                for subtask in response["body"]["data"]
+            ),
+        )
+
+    workflow_templates_cache.set(
+        WORKFLOW_TEMPLATE_SECTION,
+        templates,
+        current_app.config["ASANA_WORKFLOW_TEMPLATES_TTL"],
+    )
+    return templates
+
+
+def invalidate_workflow_templates(events: List[Dict[str, Any]]) -> bool:
+    """
+    Forget the cached templates if some events touched them.
+
+    Only the templates cached by the current process are forgotten, the
+    others expire with their TTL.
+
+    :param events: the list of events given by Asana
+    :return: True if the templates were invalidated
+    """
+    templates = workflow_templates_cache.get(WORKFLOW_TEMPLATE_SECTION)
+    if templates is None:
+        return False
+
+    gids = {WORKFLOW_TEMPLATE_SECTION}
+    for template in templates.values():
+        gids.add(template.gid)
+        gids.update(subtask.gid for subtask in template.subtasks)
+    for event in events:
+        touched = {
+            (event.get(key) or {}).get("gid")
+            for key in ("resource", "parent", "task")
+        }
+        if touched & gids:
+            workflow_templates_cache.invalidate(WORKFLOW_TEMPLATE_SECTION)
+            return True
+    return False
+
+
+def create_workflow_tasks(
+    workflow_tasks: Dict[Tuple[str, str, str], Dict[str, Any]]
+) -> int:
+    """
+    Create the subtasks of the customer workflow that were never created.
+
+    Every (customer task, section, template subtask) is claimed with a
+    record committed apart from the current transaction before asking
+    Asana to create it, so re-deliveries and replays skip it, while the
+    fingerprints of the delivery are only kept once it is fully handled.
+    The tasks are created through the batch API, the claims of failed
+    creations are released to be retried, while those of a batch with
+    unknown outcome are kept rather than risking duplicates, until they
+    are ASANA_WORKFLOW_CLAIM_SECONDS old and can be claimed again, as
+    those left by a process dying before creating their tasks.
+
+    :param workflow_tasks: the task parameters by customer task,
+                           section and template subtask external IDs
+    :return: the amount of created tasks
+    :raise AsanaActionError: when Asana failed to create some tasks with
+                             an error worth retrying the delivery for
+    """
+    if not workflow_tasks:
+        return 0
+
+    table = WorkflowTask.__table__
+    now = _utc_now()
+    expired = now - timedelta(
+        seconds=current_app.config["ASANA_WORKFLOW_CLAIM_SECONDS"]
+    )
+    statement = insert(table).values(
+        [
+            {
+                "id": str(uuid.uuid4()),
+                "task_external_id": task,
+                "section_external_id": section,
+                "template_external_id": template,
+                "updated_at": now,
+            }
+            for task, section, template in workflow_tasks
+        ]
+    )
+    statement = statement.on_conflict_do_update(
+        constraint="asana_workflow_task_unique",
+        set_={"updated_at": statement.excluded.updated_at},
+        # Only the claims whose tasks were never created in time
+        where=and_(
+            table.c.external_id.is_(None), table.c.updated_at < expired
+        ),
+    ).returning(
+        table.c.id,
+        table.c.task_external_id,
+        table.c.section_external_id,
+        table.c.template_external_id,
+    )
+    with db.engine.begin() as connection:
+        claims = {
+            row.id: workflow_tasks[
+                (
+                    row.task_external_id,
+                    row.section_external_id,
+                    row.template_external_id,
+                )
+            ]
+            for row in connection.execute(statement)
+        }
+
+    client = create_client()
+    workspace = current_app.config["ASANA_WORKSPACE"]
+    claim_ids = list(claims)
+    created = 0
+    retryable = []
+    for start in range(0, len(claim_ids), BATCH_ACTIONS_LIMIT):
+        end = start + BATCH_ACTIONS_LIMIT
+        batch = claim_ids[start:end]
+        try:
+            responses = batch_requests(
+                client,
+                [
+                    {
+                        "relative_path": "/tasks",
+                        "method": "post",
+                        "data": {"workspace": workspace, **claims[claim]},
+                    }
+                    for claim in batch
+                ],
+            )
+        except Exception:
+            logger.exception(
+                "Unknown outcome creating workflow tasks", claims=batch
+            )
+            # The tasks never sent to Asana can be claimed again
+            with db.engine.begin() as connection:
+                connection.execute(
+                    delete(table).where(table.c.id.in_(claim_ids[end:]))
+                )
+            raise
+
+        succeeded = []
+        failed = []
+        for claim, response in zip(batch, responses):
+            status = response["status_code"]
+            if 200 <= status < 300:
+                gid = response["body"]["data"]["gid"]
+                succeeded.append({"claim": claim, "gid": gid})
+                continue
+            logger.warning(
+                "Failed to create a workflow task",
+                status=status,
+                errors=response["body"].get("errors"),
+            )
+            failed.append(claim)
+            if status == 429 or status >= 500:
+                retryable.append(status)
+        with db.engine.begin() as connection:
+            if succeeded:
+                connection.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("claim"))
+                    .values(external_id=bindparam("gid")),
+                    succeeded,
+                )
+            if failed:
+                connection.execute(delete(table).where(table.c.id.in_(failed)))
+        created += len(succeeded)
+
+    if retryable:
+        raise AsanaActionError(
+            f"Asana answered {retryable} creating workflow tasks"
+        )
+    return created
+
+
 def handle_customer_workflow(
     webhook: Webhook, events: List[Dict[str, Dict]]
 ) -> None:
@@ -154,13 +739,13 @@ def handle_customer_workflow(
         if task_gid:
             task_gids.add(task_gid)
 
-    # Get all the tasks from the "Template" section of the "Customer Workflow"
-    template_tasks = {
-        t["name"]: t for t in retrieve_section_tasks("1201165296613104")
-    }
+    invalidate_workflow_templates(events)
+    # All the tasks from the "Template" section of the "Customer Workflow"
+    template_tasks = workflow_templates()
 
-    for task_gid in task_gids:
-        asana_task = retrieve_task_information(task_gid)
+    asana_tasks = retrieve_tasks_information(task_gids, WORKFLOW_OPT_FIELDS)
+    workflow_tasks: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for asana_task in asana_tasks.values():
         template = None
         customer_project = None
         customer_section = None
@@ -173,22 +758,434 @@ def handle_customer_workflow(
                 customer_section = membership["section"]["gid"]
 
         if not template or not customer_project:
-            break
+            continue
 
-        template_subtasks = retrieve_subtasks(template["gid"])
-        for subtask in template_subtasks:
-            create_task(
-                subtask["name"],
+        for subtask in template.subtasks:
+            workflow_tasks[
+                (asana_task["gid"], customer_section, subtask.gid)
+            ] = task_parameters(
+                subtask.name,
                 customer_project,
                 memberships=[
                     {"project": customer_project, "section": customer_section}
                 ],
             )
 
+    create_workflow_tasks(workflow_tasks)
     db.session.add(Event(webhook=webhook, content=events))
     db.session.commit()
 
 
+EVENT_HANDLERS: Dict[str, Callable] = {
+    handler.__name__: handler
+    for handler in (handle_task_events, handle_customer_workflow)
+}
+
+
+def enqueue_events(
+    webhook: Webhook, handle_events: Callable, events: List[Dict[str, Dict]]
+) -> Delivery:
+    """
+    Persist the events of a delivery to be handled later by a worker.
+
+    :param webhook: the handled webhook
+    :param handle_events: the function that will handle the events
+    :param events: the list of events given by Asana
+    :return: the queued delivery
+    """
+    delivery = Delivery(
+        webhook=webhook, handler=handle_events.__name__, content=events
+    )
+    db.session.add(delivery)
+    db.session.commit()
+    return delivery
+
+
+def event_fingerprint(event: Dict[str, Any], scope: str) -> str:
+    """
+    Identify an event by what happened, to whom and when, and by who
+    handles it.
+
+    :param event: an event given by Asana
+    :param scope: the name of whatever handles the event, so the same
+                  event is handled once by each of them
+    :return: the SHA-256 hexadecimal digest of the event identity
+    """
+    identity = [
+        scope,
+        (event.get("resource") or {}).get("gid"),
+        (event.get("parent") or {}).get("gid"),
+        (event.get("user") or {}).get("gid"),
+        (event.get("change") or {}).get("field"),
+        event.get("action"),
+        event.get("created_at"),
+    ]
+    return hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+
+
+def discard_duplicated_events(
+    body: Optional[bytes], events: List[Dict[str, Any]], scope: str
+) -> List[Dict[str, Any]]:
+    """
+    Keep only the events that were never received before by a scope.
+
+    The fingerprints of the delivery and of its events are written in the
+    current transaction, so they are only kept if the events are handled
+    or queued, and a failed delivery can still be retried.
+
+    :param body: the verified body of the webhook request, None for events
+                 that were not delivered by a webhook
+    :param events: the list of events given by Asana
+    :param scope: the name of whatever handles the events, like the event
+                  handler of a webhook or the sync
+    :return: the events that are new
+    """
+    fingerprints = {event_fingerprint(event, scope): event for event in events}
+    if not fingerprints:
+        return []
+    delivery = None
+    if body is not None:
+        delivery = hashlib.sha256(scope.encode() + b"\0" + body).hexdigest()
+
+    now = _utc_now()
+    statement = (
+        insert(Fingerprint.__table__)
+        .values(
+            [
+                {"fingerprint": fingerprint, "created_at": now}
+                for fingerprint in [delivery, *fingerprints]
+                if fingerprint
+            ]
+        )
+        .on_conflict_do_nothing()
+        .returning(Fingerprint.__table__.c.fingerprint)
+    )
+    inserted = {row.fingerprint for row in db.session.execute(statement)}
+    if delivery and delivery not in inserted:
+        return []
+
+    return [
+        event
+        for fingerprint, event in fingerprints.items()
+        if fingerprint in inserted
+    ]
+
+
+def prune_fingerprints() -> int:
+    """
+    Forget the fingerprints older than ASANA_DEDUPLICATION_HOURS.
+
+    :return: the amount of deleted fingerprints
+    """
+    expired = _utc_now() - timedelta(
+        hours=current_app.config["ASANA_DEDUPLICATION_HOURS"]
+    )
+    deleted = Fingerprint.query.filter(
+        Fingerprint.created_at < expired
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+class CachedWebhook(NamedTuple):
+    id: str
+    project_external_id: Optional[str]
+    secret: Optional[str]
+
+
+webhooks_cache = TTLCache()
+
+
+def resolve_webhook(path: str, cached: bool = True) -> Optional[CachedWebhook]:
+    """
+    Find the webhook configured in a path, with the ID of its project
+    and its secret, keeping them in memory for ASANA_WEBHOOK_CACHE_TTL.
+
+    Webhooks still waiting for their handshake are never cached.
+
+    :param path: the base path where we receive the webhook
+    :param cached: if False, always reads the webhook from the database
+    :return: the webhook information or None if it is not configured
+    """
+    if cached:
+        webhook = webhooks_cache.get(path)
+        if webhook:
+            return webhook
+
+    row = (
+        db.session.query(Webhook.id, Project.external_id, Webhook.secret)
+        .outerjoin(Project, Webhook.project_id == Project.id)
+        .filter(Webhook.path == path)
+        .one_or_none()
+    )
+    if row is None:
+        return None
+
+    webhook = CachedWebhook(*row)
+    if webhook.secret:
+        webhooks_cache.set(
+            path, webhook, current_app.config["ASANA_WEBHOOK_CACHE_TTL"]
+        )
+    return webhook
+
+
+def invalidate_webhook(path: str) -> None:
+    """
+    Forget the cached information of the webhook configured in a path.
+
+    :param path: the base path where we receive the webhook
+    """
+    webhooks_cache.invalidate(path)
+
+
+def search_events(
+    resource_gid: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    webhook_id: Optional[str] = None,
+    limit: int = 100,
+) -> List[Event]:
+    """
+    Find the received events that touched a resource, directly or as the
+    parent of another resource, newest first.
+
+    The JSONB containment filters are answered by the GIN index on the
+    content, the webhook and time filters by the webhook and created_at
+    index.
+
+    :param resource_gid: the external (Asana) ID of the resource
+    :param since: the instant from which the events were received
+    :param until: the instant until which the events were received
+    :param webhook_id: the giges ID of the webhook receiving the events
+    :param limit: the maximum amount of events
+    :return: the list of stored events
+    """
+    query = Event.query.filter(
+        or_(
+            Event.content.contains([{"resource": {"gid": resource_gid}}]),
+            Event.content.contains([{"parent": {"gid": resource_gid}}]),
+        )
+    )
+    if webhook_id:
+        query = query.filter(Event.webhook_id == webhook_id)
+    if since:
+        query = query.filter(Event.created_at >= since)
+    if until:
+        query = query.filter(Event.created_at < until)
+    return query.order_by(Event.created_at.desc()).limit(limit).all()
+
+
+def serialize_event(event: Event) -> Dict[str, Any]:
+    """
+    Represent a stored event as plain JSON.
+
+    :param event: the stored event
+    :return: the dictionary with the event information
+    """
+    return {
+        "id": event.id,
+        "webhook_id": event.webhook_id,
+        "created_at": event.created_at.isoformat(),
+        "content": event.content,
+    }
+
+
+def list_events(
+    resource: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    webhook_id: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[Dict, int]:
+    """
+    List the received events that touched a resource.
+
+    :param resource: the external (Asana) ID of the resource
+    :param since: the ISO 8601 instant from which the events were received
+    :param until: the ISO 8601 instant until which the events were received
+    :param webhook_id: the giges ID of the webhook receiving the events
+    :param limit: the maximum amount of events
+    :return: a tuple with the events and the status
+    """
+    try:
+        events = search_events(
+            resource,
+            since=iso8601.parse_date(since) if since else None,
+            until=iso8601.parse_date(until) if until else None,
+            webhook_id=webhook_id,
+            limit=limit,
+        )
+    except iso8601.ParseError:
+        return {}, 400
+
+    return {"events": [serialize_event(event) for event in events]}, 200
+
+
+def task_history(
+    external_id: str, limit: int = 100, cursor: Optional[str] = None
+) -> Tuple[Dict, int]:
+    """
+    List the recorded changes of a task in chronological order.
+
+    The pages are delimited by the creation instant and ID of their last
+    change, so every page is an index range scan on the task changes.
+
+    :param external_id: the external (Asana) ID of the task
+    :param limit: the maximum amount of changes in the page
+    :param cursor: the cursor of the next page given by the previous one
+    :return: a tuple with the page of changes and the status
+    """
+    task = Task.query.filter_by(external_id=external_id).one_or_none()
+    if task is None:
+        return {}, 404
+
+    query = TaskChange.query.filter(TaskChange.task_id == task.id)
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None or len(after) != 2:
+            return {}, 400
+        try:
+            created_at = iso8601.parse_date(after[0])
+        except iso8601.ParseError:
+            return {}, 400
+        query = query.filter(
+            TaskChange.created_at >= created_at,
+            or_(
+                TaskChange.created_at > created_at,
+                TaskChange.id > after[1],
+            ),
+        )
+    changes = (
+        query.order_by(TaskChange.created_at, TaskChange.id)
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(changes) > limit:
+        changes = changes[:limit]
+        last = changes[-1]
+        next_cursor = encode_cursor(last.created_at.isoformat(), last.id)
+    return {
+        "changes": [
+            {
+                "id": change.id,
+                "created_at": change.created_at.isoformat(),
+                **{
+                    column: getattr(change, column)
+                    for column in TRACKED_COLUMNS
+                },
+            }
+            for change in changes
+        ],
+        "next": next_cursor,
+    }, 200
+
+
+def serialize_task(task: Task) -> Dict[str, Any]:
+    """
+    Represent a task as plain JSON.
+
+    :param task: the stored task
+    :return: the dictionary with the task information
+    """
+    return {
+        "id": task.id,
+        "external_id": task.external_id,
+        "updated_at": task.updated_at.isoformat(),
+        **{column: getattr(task, column) for column in TASK_COLUMNS},
+        "completed_at": task.completed_at.isoformat()
+        if task.completed_at
+        else None,
+    }
+
+
+def list_project_tasks(
+    project_id: str,
+    section: Optional[str] = None,
+    task_progress: Optional[str] = None,
+    class_of_service: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Tuple[Any, int, Dict[str, str]]:
+    """
+    List the current state of the tasks of a project, least recently
+    updated first.
+
+    The strong ETag of a page changes with the latest update of the
+    filtered tasks, so polls without changes get a 304 from one indexed
+    aggregate, without loading any task.
+
+    :param project_id: the external (Asana) ID of the project
+    :param section: only the tasks in this section
+    :param task_progress: only the tasks with this progress
+    :param class_of_service: only the tasks of this class of service
+    :param limit: the maximum amount of tasks in the page
+    :param cursor: the cursor of the next page given by the previous one
+    :return: a tuple with the page of tasks, the status and the headers
+    """
+    if Project.query.filter_by(external_id=project_id).first() is None:
+        return {}, 404, {}
+
+    query = Task.query.filter(Task.project_external_id == project_id)
+    filters = {
+        Task.section: section,
+        Task.task_progress: task_progress,
+        Task.class_of_service: class_of_service,
+    }
+    for column, value in filters.items():
+        if value is not None:
+            query = query.filter(column == value)
+
+    updated_at, count = query.with_entities(
+        func.max(Task.updated_at), func.count(Task.id)
+    ).one()
+    identity = [
+        project_id,
+        section,
+        task_progress,
+        class_of_service,
+        limit,
+        cursor,
+        updated_at.isoformat() if updated_at else None,
+        count,
+    ]
+    etag = f'"{hashlib.sha256(json.dumps(identity).encode()).hexdigest()}"'
+    headers = {"ETag": etag}
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return None, 304, headers
+
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None or len(after) != 2:
+            return {}, 400, {}
+        try:
+            after_updated_at = iso8601.parse_date(after[0])
+        except iso8601.ParseError:
+            return {}, 400, {}
+        query = query.filter(
+            Task.updated_at >= after_updated_at,
+            or_(Task.updated_at > after_updated_at, Task.id > after[1]),
+        )
+    tasks = query.order_by(Task.updated_at, Task.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(
+            tasks[-1].updated_at.isoformat(), tasks[-1].id
+        )
+    return (
+        {
+            "tasks": [serialize_task(task) for task in tasks],
+            "next": next_cursor,
+        },
+        200,
+        headers,
+    )
+
+
 def task_webhook(
     project_id: str,
 ) -> Union[Tuple[Dict, int], Tuple[Dict, int, Dict[str, str]]]:
@@ -225,23 +1222,27 @@ def handle_webhook(
     X-Hook-Secret, that we use to verify the authenticity of the rest of the
     webhooks requests using X-Hook-Signature.
 
+    Deliveries and events already received are discarded, then with
+    ASANA_WEBHOOK_QUEUE enabled the new events are only queued, and the
+    `giges asana worker` command is in charge of handling them.
+
     :param project_id: the external (asana) ID of the project
     :param handle_events: the function to handle the events
     :return: - a tuple with an empty body and the status
              - a tuple with an empty body, the status and the handshake header
     """
-    webhook = Webhook.query.filter_by(path=request.path).one_or_none()
+    secret = request.headers.get("X-Hook-Secret")
+    signature = request.headers.get("X-Hook-Signature")
+
+    # Handshakes set the secret, they can not trust the cache
+    webhook = resolve_webhook(request.path, cached=not secret)
     if not webhook:
         return {"msg": "The webhook was not configured"}, 404
-    project = Project.query.filter_by(external_id=project_id).one_or_none()
-    if not project:
-        return {"msg": "The project was not configured"}, 404
-    if webhook.project != project:
+    if webhook.project_external_id != project_id:
+        if not Project.query.filter_by(external_id=project_id).count():
+            return {"msg": "The project was not configured"}, 404
         return {"msg": "The webhook does not match the targeted project"}, 400
 
-    secret = request.headers.get("X-Hook-Secret")
-    signature = request.headers.get("X-Hook-Signature")
-
     if not secret and not signature:
         return {"msg": "Invalid parameters"}, 400
     if secret:
@@ -251,9 +1252,11 @@ def handle_webhook(
                 headers=request.headers,
             )
             return {"msg": "Hacking not allowed"}, 400
-        webhook.secret = secret
-        db.session.add(webhook)
+        db_webhook = Webhook.query.get(webhook.id)
+        db_webhook.secret = secret
+        db.session.add(db_webhook)
         db.session.commit()
+        invalidate_webhook(request.path)
 
         return {}, 204, {"X-Hook-Secret": secret}
 
@@ -276,9 +1279,25 @@ def handle_webhook(
         # Asana periodically ping the endpoint without events
         return {}, 204
 
+    events = discard_duplicated_events(
+        request.data, request.json["events"], handle_events.__name__
+    )
+    if not events:
+        # Asana retries the deliveries that it thinks have failed
+        db.session.commit()
+        logger.info("Duplicated webhook delivery discarded", path=request.path)
+        return {}, 204
+
+    db_webhook = Webhook.query.get(webhook.id)
+    if current_app.config["ASANA_WEBHOOK_QUEUE"]:
+        enqueue_events(db_webhook, handle_events, events)
+        return {}, 204
+
     try:
-        handle_events(webhook, request.json["events"])
+        handle_events(db_webhook, events)
     except KeyError:
+        db.session.rollback()
         return {"msg": "Incorrect event format"}, 400
+    logger.info("Asana connections", **connection_stats())
 
     return {}, 204
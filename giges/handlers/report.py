@@ -0,0 +1,88 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import select, text
+
+from giges.db import db
+from giges.models.report import REPORT_VIEWS, weekly_flow, work_in_progress
+
+logger = structlog.get_logger(__name__)
+
+
+def refresh_reports(concurrently: bool = True) -> None:
+    """
+    Recompute the materialized views of the reports.
+
+    A concurrent refresh does not block the readers of the views.
+
+    :param concurrently: if False, locks the views while refreshing them
+    """
+    for view in REPORT_VIEWS:
+        db.session.execute(
+            text(
+                "REFRESH MATERIALIZED VIEW "
+                f"{'CONCURRENTLY ' if concurrently else ''}{view.name}"
+            )
+        )
+        db.session.commit()
+        logger.info("Report refreshed", view=view.name)
+
+
+def _rows(statement: Any) -> List[Dict[str, Any]]:
+    """
+    Execute a query on a report and convert its rows into JSON.
+
+    :param statement: the select statement
+    :return: the list of rows as dictionaries
+    """
+    return [
+        {
+            key: value.isoformat() if isinstance(value, date) else value
+            for key, value in row._mapping.items()
+        }
+        for row in db.session.execute(statement)
+    ]
+
+
+def get_weekly_flow(
+    team_id: Optional[str] = None, since: Optional[str] = None
+) -> Tuple[Dict, int]:
+    """
+    Serve the weekly throughput, lead time and cycle time of the teams
+    by class of service.
+
+    :param team_id: the giges UUID of the team
+    :param since: the first week to include, as an ISO 8601 date
+    :return: a tuple with the weeks and the status
+    """
+    statement = select(weekly_flow).order_by(
+        weekly_flow.c.week,
+        weekly_flow.c.team_id,
+        weekly_flow.c.class_of_service,
+    )
+    if team_id:
+        statement = statement.where(weekly_flow.c.team_id == team_id)
+    if since:
+        try:
+            statement = statement.where(
+                weekly_flow.c.week >= date.fromisoformat(since)
+            )
+        except ValueError:
+            return {}, 400
+    return {"weeks": _rows(statement)}, 200
+
+
+def get_work_in_progress(team_id: Optional[str] = None) -> Tuple[Dict, int]:
+    """
+    Serve the amount of tasks in progress of the teams by class of service.
+
+    :param team_id: the giges UUID of the team
+    :return: a tuple with the work in progress and the status
+    """
+    statement = select(work_in_progress).order_by(
+        work_in_progress.c.team_id, work_in_progress.c.class_of_service
+    )
+    if team_id:
+        statement = statement.where(work_in_progress.c.team_id == team_id)
+    return {"work_in_progress": _rows(statement)}, 200
@@ -0,0 +1,369 @@
+import hashlib
+import hmac
+import json
+import math
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import count, cycle, islice
+from time import monotonic, sleep
+from typing import Any, Dict, Iterator, List, Tuple
+
+import requests
+from sqlalchemy import func
+
+from giges.db import db
+from giges.models.asana import (
+    Delivery,
+    DirtyTask,
+    Event,
+    Fingerprint,
+    ResourceTypeEnum,
+    Task,
+    TaskChange,
+    Webhook,
+)
+
+# Path, body and headers of a signed webhook delivery
+SignedDelivery = Tuple[str, bytes, Dict[str, str]]
+
+# Tables growing with the webhook deliveries
+GROWING_MODELS = (Event, Delivery, Fingerprint, Task, TaskChange, DirtyTask)
+
+# Changes of a task notified by Asana, by how often they happen
+TASK_CHANGES = (
+    ("custom_fields", 5),
+    ("memberships", 3),
+    ("name", 2),
+    ("completed", 1),
+    ("assignee", 1),
+    ("notes", 1),
+)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def sign(secret: str, events: List[Dict[str, Any]]) -> Tuple[bytes, str]:
+    """
+    Serialize and sign events as Asana does for its webhooks.
+
+    :param secret: the secret exchanged in the webhook handshake
+    :param events: the events of the delivery
+    :return: the body of the delivery and its X-Hook-Signature
+    """
+    body = json.dumps({"events": events}).encode()
+    signature = hmac.new(
+        secret.encode("ascii", "ignore"), msg=body, digestmod=hashlib.sha256
+    ).hexdigest()
+    return body, signature
+
+
+def _signed(webhook: Webhook, events: List[Dict[str, Any]]) -> SignedDelivery:
+    body, signature = sign(webhook.secret, events)
+    headers = {
+        "Content-Type": "application/json",
+        "X-Hook-Signature": signature,
+    }
+    return webhook.path, body, headers
+
+
+def signed_webhooks() -> List[Webhook]:
+    """
+    List the webhooks whose deliveries can be signed.
+
+    :return: the task and story webhooks with a secret
+    """
+    return (
+        Webhook.query.filter(
+            Webhook.secret.isnot(None),
+            Webhook.resource_type.in_(
+                [ResourceTypeEnum.task, ResourceTypeEnum.story]
+            ),
+        )
+        .order_by(Webhook.path)
+        .all()
+    )
+
+
+def synthetic_deliveries(
+    webhooks: List[Webhook], max_events: int = 1, seed: int = 0
+) -> Iterator[SignedDelivery]:
+    """
+    Make up deliveries of task and story events, as Asana sends them.
+
+    The events are about the known tasks of the project of each webhook,
+    or about made up tasks when none is known, every one of them with its
+    own timestamp so none is discarded as already received.
+
+    :param webhooks: the webhooks to deliver to, in turns
+    :param max_events: the most events of a delivery
+    :param seed: the seed of the random events
+    :return: an endless iterator of signed deliveries
+    """
+    rnd = random.Random(seed)
+    fields = [field for field, _ in TASK_CHANGES]
+    weights = [weight for _, weight in TASK_CHANGES]
+    story_gids = count(int(datetime.now(timezone.utc).timestamp() * 1e6))
+    tasks = {}
+    for webhook in webhooks:
+        project = webhook.project.external_id if webhook.project else None
+        tasks[webhook.id] = [
+            gid
+            for gid, in Task.query.filter_by(project_external_id=project)
+            .with_entities(Task.external_id)
+            .limit(1000)
+        ] or [str(rnd.randrange(10**15, 10**16)) for _ in range(100)]
+
+    for webhook in cycle(webhooks):
+        events = []
+        for _ in range(rnd.randint(1, max_events)):
+            task = rnd.choice(tasks[webhook.id])
+            event: Dict[str, Any] = {
+                "user": {"gid": "1", "resource_type": "user"},
+                "created_at": _now(),
+            }
+            if webhook.resource_type == ResourceTypeEnum.story:
+                event["action"] = "added"
+                event["resource"] = {
+                    "gid": str(next(story_gids)),
+                    "resource_type": "story",
+                    "resource_subtype": "comment_added",
+                }
+                event["parent"] = {"gid": task, "resource_type": "task"}
+            else:
+                event["action"] = "changed"
+                event["resource"] = {
+                    "gid": task,
+                    "resource_type": "task",
+                    "resource_subtype": "default_task",
+                }
+                event["parent"] = None
+                event["change"] = {
+                    "field": rnd.choices(fields, weights)[0],
+                    "action": "changed",
+                }
+            events.append(event)
+        yield _signed(webhook, events)
+
+
+def replayed_deliveries(
+    webhooks: List[Webhook], as_recorded: bool = False
+) -> Iterator[SignedDelivery]:
+    """
+    Deliver again the events stored for the webhooks, oldest first.
+
+    :param webhooks: the webhooks whose events are replayed
+    :param as_recorded: if True, the events keep their timestamps and are
+                        discarded as already received, otherwise they are
+                        stamped with the current time
+    :return: an iterator of signed deliveries, ending with the events
+    """
+    by_id = {webhook.id: webhook for webhook in webhooks}
+    query = (
+        Event.query.filter(Event.webhook_id.in_(list(by_id)))
+        .order_by(Event.created_at, Event.id)
+        .with_entities(Event.webhook_id, Event.content)
+        .yield_per(100)
+    )
+    for webhook_id, content in query:
+        events = content if isinstance(content, list) else [content]
+        if not as_recorded:
+            events = [{**event, "created_at": _now()} for event in events]
+        yield _signed(by_id[webhook_id], events)
+
+
+_clock_lock = threading.Lock()
+_last_moment = datetime.now(timezone.utc)
+
+
+def _now() -> str:
+    """
+    The current time, never repeated, in the format of Asana.
+    """
+    global _last_moment
+
+    with _clock_lock:
+        _last_moment = max(
+            datetime.now(timezone.utc),
+            _last_moment + timedelta(milliseconds=1),
+        )
+        moment = _last_moment
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def count_rows() -> Dict[str, int]:
+    """
+    Count the rows of the tables growing with the webhook deliveries.
+
+    :return: the amount of rows by table name
+    """
+    return {
+        model.__tablename__: db.session.query(func.count())
+        .select_from(model)
+        .scalar()
+        for model in GROWING_MODELS
+    }
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Nearest-rank percentile of some sorted values.
+
+    :param values: the values, sorted
+    :param rank: the percentile, from 0 to 100
+    :return: the value at that percentile, 0 without values
+    """
+    if not values:
+        return 0.0
+    position = max(math.ceil(len(values) * rank / 100) - 1, 0)
+    return values[min(position, len(values) - 1)]
+
+
+def fire(
+    target: str,
+    deliveries: Iterator[SignedDelivery],
+    requests_count: int,
+    rps: float = 0,
+    concurrency: int = 10,
+) -> Dict[str, Any]:
+    """
+    Send deliveries to a running giges at a steady rate.
+
+    The deliveries are started on schedule no matter how long the previous
+    ones take, as Asana does, as long as a thread is free to send them. The
+    latencies are timed from the scheduled start, so the time waiting for
+    a free thread counts as much as the time waiting for giges.
+
+    :param target: the base URL of giges, like ``http://localhost:8080``
+    :param deliveries: the signed deliveries to send
+    :param requests_count: the most deliveries to send
+    :param rps: the deliveries started per second, as fast as possible
+                if not positive
+    :param concurrency: the deliveries sent at the same time
+    :return: the statuses, latencies and achieved rate of the deliveries
+    """
+    sessions = threading.local()
+
+    def send(delivery: SignedDelivery, scheduled: float) -> Tuple[int, float]:
+        path, body, headers = delivery
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        try:
+            status = sessions.session.post(
+                f"{target}{path}", data=body, headers=headers, timeout=30
+            ).status_code
+        except requests.RequestException:
+            status = 0
+        return status, monotonic() - scheduled
+
+    start = monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = []
+        for n, delivery in enumerate(islice(deliveries, requests_count)):
+            scheduled = start + n / rps if rps > 0 else monotonic()
+            wait = scheduled - monotonic()
+            if wait > 0:
+                sleep(wait)
+            futures.append(executor.submit(send, delivery, scheduled))
+        results = [future.result() for future in futures]
+    elapsed = monotonic() - start
+
+    statuses: Dict[int, int] = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(
+        amount
+        for status, amount in statuses.items()
+        if not 200 <= status < 300
+    )
+    report: Dict[str, Any] = {
+        "requests": len(results),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "statuses": statuses,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "latency_ms": {
+            f"p{rank}": round(percentile(latencies, rank) * 1000, 2)
+            for rank in PERCENTILES
+        },
+    }
+    report["latency_ms"]["max"] = round(
+        (latencies[-1] if latencies else 0) * 1000, 2
+    )
+    return report
+
+
+def load_test(
+    target: str,
+    requests_count: int,
+    rps: float = 0,
+    concurrency: int = 10,
+    max_events: int = 1,
+    replay: bool = False,
+    as_recorded: bool = False,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Fire webhook deliveries at a running giges, measuring how it copes and
+    how much its database grows.
+
+    :param target: the base URL of giges
+    :param requests_count: the most deliveries to send
+    :param rps: the deliveries started per second
+    :param concurrency: the deliveries sent at the same time
+    :param max_events: the most events of a synthetic delivery
+    :param replay: if True, the stored events are delivered again instead
+                   of synthetic ones
+    :param as_recorded: if True, the replayed events keep their timestamps
+    :param seed: the seed of the synthetic events
+    :return: the report of the load test
+    """
+    webhooks = signed_webhooks()
+    if not webhooks:
+        raise ValueError("No webhook with a secret to sign the deliveries")
+
+    deliveries: Iterator[SignedDelivery]
+    if replay:
+        deliveries = replayed_deliveries(webhooks, as_recorded)
+    else:
+        deliveries = synthetic_deliveries(webhooks, max_events, seed)
+    # Signed beforehand, so neither signing nor reading the events to
+    # replay slows down the schedule, nor counts as row growth
+    deliveries = iter(list(islice(deliveries, requests_count)))
+
+    before = count_rows()
+    db.session.commit()
+    report = fire(target, deliveries, requests_count, rps, concurrency)
+    after = count_rows()
+    db.session.commit()
+    report["rows"] = {
+        table: after[table] - before[table] for table in sorted(before)
+    }
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Write a load test report for humans.
+
+    :param report: the report of the load test
+    :return: the report as text
+    """
+    latency = ", ".join(f"{k} {v}ms" for k, v in report["latency_ms"].items())
+    statuses = ", ".join(
+        f"{status or 'failed'}: {amount}"
+        for status, amount in sorted(report["statuses"].items())
+    )
+    rows = ", ".join(f"{t} +{n}" for t, n in report["rows"].items())
+    return "\n".join(
+        [
+            f"{report['requests']} deliveries in {report['seconds']}s "
+            f"({report['rps']} per second)",
+            f"Statuses: {statuses}",
+            f"Error rate: {report['error_rate']:.2%}",
+            f"Latency: {latency}",
+            f"Rows: {rows}",
+        ]
+    )
@@ -9,13 +9,17 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
+    Integer,
     String,
+    UniqueConstraint,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from ..db import db
 from ..settings import asana_fields
-from .mixins import TimestampMixin, UUIDMixin
+from .mixins import TimestampMixin, UUIDMixin, _utc_now
 
 
 class ResourceTypeEnum(str, enum.Enum):
@@ -28,6 +32,13 @@ class ResourceTypeEnum(str, enum.Enum):
     workspace = "workspace"
 
 
+class DeliveryStatusEnum(str, enum.Enum):
+    pending = "pending"
+    processing = "processing"
+    done = "done"
+    failed = "failed"
+
+
 class Project(db.Model, UUIDMixin):
     __tablename__ = "asana_project"
 
@@ -50,6 +61,10 @@ class Project(db.Model, UUIDMixin):
         nullable=False,
         doc="When the project was modified in Asana",
     )
+    sync_token = db.Column(
+        String,
+        doc="The token of the Asana events stream read up to now",
+    )
 
 
 class Webhook(db.Model, UUIDMixin):
@@ -89,10 +104,19 @@ class Webhook(db.Model, UUIDMixin):
 
 class Task(db.Model, UUIDMixin, TimestampMixin):
     __tablename__ = "asana_task"
+    __table_args__ = (
+        Index(
+            "ix_asana_task_project_external_id_updated_at",
+            "project_external_id",
+            "updated_at",
+            "id",
+        ),
+    )
 
     external_id = db.Column(
         String,
         index=True,
+        unique=True,
         doc="The ID of the Task in Asana",
     )
 
@@ -108,15 +132,20 @@ class Task(db.Model, UUIDMixin, TimestampMixin):
     item_category = db.Column(String)
     related_service = db.Column(String)
     section = db.Column(String)
+    project_external_id = db.Column(
+        String,
+        doc="The ID in Asana of the project where the section is",
+    )
 
-    def save_custom_fields(self, custom_fields: List[Dict]) -> None:
+    @staticmethod
+    def custom_field_values(custom_fields: List[Dict]) -> Dict[str, str]:
         """
-        Mapping between the Asana custom fields and the information we want
-        to save and track into the database.
+        Resolve the Asana custom fields into the columns we track.
 
         :param custom_fields: dict from Asana show task response
-        :return: Nope
+        :return: the values of the set custom fields by column name
         """
+        values = {}
         for field in custom_fields:
             field_id = field.get("gid")
             if field_id in asana_fields.keys():
@@ -124,11 +153,17 @@ class Task(db.Model, UUIDMixin, TimestampMixin):
                     value = asana_fields[field_id]["options"][
                         field["enum_value"]["gid"]
                     ]
-                    setattr(self, asana_fields[field_id]["column"], value)
+                    values[asana_fields[field_id]["column"]] = value
+        return values
 
 
 class TaskChange(db.Model, UUIDMixin, TimestampMixin):
     __tablename__ = "asana_task_change"
+    __table_args__ = (
+        Index(
+            "ix_asana_task_change_task_id_created_at", "task_id", "created_at"
+        ),
+    )
 
     task_id = db.Column(
         CHAR(36),
@@ -148,27 +183,20 @@ class TaskChange(db.Model, UUIDMixin, TimestampMixin):
 
     task = relationship("Task")
 
-    def save_task_changes(self) -> None:
-        """
-        Inspect the sqlalchemy object of a task to determine
-        and save the columns that changed.
-
-        :return: Nein
-        """
-        from sqlalchemy import inspect
-        from sqlalchemy.orm import class_mapper
-
-        inspected = inspect(self.task)
-        attrs = class_mapper(self.task.__class__).column_attrs
-        for attr in attrs:
-            if hasattr(self, attr.key) and attr.key != "id":
-                hist = getattr(inspected.attrs, attr.key).history
-                if hist.has_changes():
-                    setattr(self, attr.key, getattr(self.task, attr.key))
-
 
 class Event(db.Model, UUIDMixin, TimestampMixin):
     __tablename__ = "asana_event"
+    __table_args__ = (
+        Index(
+            "ix_asana_event_content",
+            "content",
+            postgresql_using="gin",
+            postgresql_ops={"content": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_asana_event_webhook_id_created_at", "webhook_id", "created_at"
+        ),
+    )
 
     webhook_id = db.Column(
         CHAR(36),
@@ -181,7 +209,124 @@ class Event(db.Model, UUIDMixin, TimestampMixin):
     )
 
     content = db.Column(
-        JSON, doc="The binary JSON content of the received event"
+        JSONB, doc="The binary JSON content of the received event"
+    )
+
+    webhook = relationship("Webhook")
+
+
+class Delivery(db.Model, UUIDMixin, TimestampMixin):
+    __tablename__ = "asana_delivery"
+
+    webhook_id = db.Column(
+        CHAR(36),
+        ForeignKey(
+            "asana_webhook.id",
+            deferrable=True,
+            initially="DEFERRED",
+            name="asana_delivery_webhook_fk",
+        ),
+    )
+    handler = db.Column(
+        String,
+        nullable=False,
+        doc="Name of the function that will handle the events",
+    )
+    status = db.Column(
+        Enum(DeliveryStatusEnum, name="delivery_status_enum"),
+        nullable=False,
+        index=True,
+        default=DeliveryStatusEnum.pending,
+        doc="Processing state of the delivery in the queue",
+    )
+    attempts = db.Column(
+        Integer,
+        nullable=False,
+        default=0,
+        doc="How many times a worker tried to handle the delivery",
+    )
+    available_at = db.Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        default=_utc_now,
+        doc="When the delivery can be claimed by a worker",
+    )
+    error = db.Column(String, doc="The last error raised handling the events")
+    content = db.Column(
+        JSON, doc="The verified events received in the webhook request"
     )
 
     webhook = relationship("Webhook")
+
+
+class Fingerprint(db.Model):
+    __tablename__ = "asana_fingerprint"
+
+    fingerprint = db.Column(
+        CHAR(64),
+        primary_key=True,
+        doc="The SHA-256 of a received delivery or event",
+    )
+    created_at = db.Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        index=True,
+        default=_utc_now,
+        doc="When the delivery or event was first received",
+    )
+
+
+class DirtyTask(db.Model):
+    __tablename__ = "asana_dirty_task"
+
+    external_id = db.Column(
+        String,
+        primary_key=True,
+        doc="The ID in Asana of the Task waiting to be retrieved",
+    )
+    first_seen_at = db.Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        index=True,
+        default=_utc_now,
+        doc="When the first pending event of the task was received",
+    )
+    last_seen_at = db.Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        index=True,
+        default=_utc_now,
+        doc="When the last pending event of the task was received",
+    )
+
+
+class WorkflowTask(db.Model, UUIDMixin, TimestampMixin):
+    __tablename__ = "asana_workflow_task"
+    __table_args__ = (
+        UniqueConstraint(
+            "task_external_id",
+            "section_external_id",
+            "template_external_id",
+            name="asana_workflow_task_unique",
+        ),
+    )
+
+    task_external_id = db.Column(
+        String,
+        nullable=False,
+        doc="The ID in Asana of the customer task that moved",
+    )
+    section_external_id = db.Column(
+        String,
+        nullable=False,
+        doc="The ID in Asana of the customer section it moved to",
+    )
+    template_external_id = db.Column(
+        String,
+        nullable=False,
+        doc="The ID in Asana of the template subtask to create",
+    )
+    external_id = db.Column(
+        String,
+        doc="The ID in Asana of the created task, unknown until created",
+    )
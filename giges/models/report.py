@@ -0,0 +1,24 @@
+from sqlalchemy import Date, Float, Integer, String
+from sqlalchemy.sql import column, table
+
+# Materialized views created by the migrations, only read and refreshed
+
+weekly_flow = table(
+    "report_weekly_flow",
+    column("team_id", String),
+    column("class_of_service", String),
+    column("week", Date),
+    column("throughput", Integer),
+    column("lead_time_hours", Float),
+    column("lead_time_p85_hours", Float),
+    column("cycle_time_hours", Float),
+)
+
+work_in_progress = table(
+    "report_work_in_progress",
+    column("team_id", String),
+    column("class_of_service", String),
+    column("tasks", Integer),
+)
+
+REPORT_VIEWS = (weekly_flow, work_in_progress)
@@ -0,0 +1,130 @@
+import random
+import threading
+from time import monotonic, sleep
+from typing import Dict, Optional
+
+from flask import current_app
+
+
+class TokenBucket:
+    """
+    Token bucket shared by all the threads calling an upstream API.
+
+    The bucket is kept as the moment it becomes full again, so taking a
+    token is a single comparison under the lock and the wait happens
+    outside it. An upstream asking to slow down with Retry-After pauses
+    every caller, not only the one that got the answer.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        :param rate: the tokens added per second, no limit if not positive
+        :param burst: the tokens the bucket holds
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.full_at = 0.0
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "throttled_seconds": 0.0,
+        }
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting for it if the bucket is empty.
+
+        :return: the seconds waited
+        """
+        now = monotonic()
+        with self.lock:
+            start = max(now, self.paused_until)
+            if self.rate > 0:
+                interval = 1 / self.rate
+                full_at = max(self.full_at, now)
+                start = max(start, full_at + interval - self.burst * interval)
+                self.full_at = full_at + interval
+            wait = start - now
+            self.stats["requests"] += 1
+            if wait > 0:
+                self.stats["throttled"] += 1
+                self.stats["throttled_seconds"] += wait
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing tokens for a while, as asked by a Retry-After.
+
+        :param seconds: the seconds to wait before the next request
+        """
+        with self.lock:
+            self.stats["rate_limited"] += 1
+            self.paused_until = max(self.paused_until, monotonic() + seconds)
+            if self.rate > 0:
+                # Start again one request at a time rather than bursting
+                self.full_at = max(
+                    self.full_at,
+                    self.paused_until + (self.burst - 1) / self.rate,
+                )
+
+    def backoff(self, attempt: int, base: float, cap: float) -> float:
+        """
+        Wait before retrying a failed request, a random time up to an
+        exponentially growing limit so callers do not retry all at once.
+
+        :param attempt: the number of retries already done
+        :param base: the limit of the first wait, in seconds
+        :param cap: the largest limit, in seconds
+        :return: the seconds waited
+        """
+        wait = random.uniform(0, min(cap, base * 2**attempt))
+        with self.lock:
+            self.stats["retries"] += 1
+            self.stats["throttled_seconds"] += wait
+        sleep(wait)
+        return wait
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(upstream: str) -> TokenBucket:
+    """
+    Return the bucket shared by the whole process for an upstream.
+
+    The budget comes from ``<UPSTREAM>_RATE_LIMIT`` requests per second
+    and ``<UPSTREAM>_RATE_BURST`` in the settings, a new bucket is made
+    when they change.
+
+    :param upstream: the name of the upstream API, like ``asana``
+    :return: the token bucket
+    """
+    rate = current_app.config[f"{upstream.upper()}_RATE_LIMIT"]
+    burst = current_app.config[f"{upstream.upper()}_RATE_BURST"]
+    with _limiters_lock:
+        limiter = _limiters.get(upstream)
+        if limiter is None or (limiter.rate, limiter.burst) != (rate, burst):
+            limiter = _limiters[upstream] = TokenBucket(rate, burst)
+        return limiter
+
+
+def throttle_stats(upstream: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Count the requests and the time spent throttled for each upstream.
+
+    :param upstream: the name of the upstream API, all of them by default
+    :return: the counters of each upstream
+    """
+    with _limiters_lock:
+        return {
+            name: dict(limiter.stats)
+            for name, limiter in _limiters.items()
+            if upstream in (None, name)
+        }
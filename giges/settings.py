@@ -18,8 +18,56 @@ class BaseSettings:
     SENTRY_URI = ""
     ASANA_TOKEN = os.environ.get("ASANA_TOKEN", "")
     ASANA_WORKSPACE = "1199978051314275"
+    ASANA_BASE_URL = os.getenv(
+        "GIGES_ASANA_BASE_URL", "https://app.asana.com/api/1.0"
+    )
+    ASANA_POOL_SIZE = int(os.getenv("GIGES_ASANA_POOL_SIZE", "10"))
     SLACK_TOKEN = os.environ.get("SLACK_TOKEN", "")
+    SLACK_BASE_URL = os.getenv(
+        "GIGES_SLACK_BASE_URL", "https://www.slack.com/api/"
+    )
     SLACK_BLOCKS_CHANNEL = ""
+    SLACK_CONCURRENCY = int(os.getenv("GIGES_SLACK_CONCURRENCY", "8"))
+
+    # Requests per second and burst allowed to each upstream
+    ASANA_RATE_LIMIT = float(os.getenv("GIGES_ASANA_RATE_LIMIT", "25"))
+    ASANA_RATE_BURST = int(os.getenv("GIGES_ASANA_RATE_BURST", "50"))
+    SLACK_RATE_LIMIT = float(os.getenv("GIGES_SLACK_RATE_LIMIT", "1"))
+    SLACK_RATE_BURST = int(os.getenv("GIGES_SLACK_RATE_BURST", "5"))
+    RATE_LIMIT_MAX_RETRIES = 5
+    RATE_LIMIT_BACKOFF_SECONDS = 1.0
+    RATE_LIMIT_BACKOFF_MAX_SECONDS = 60.0
+
+    # Asana webhooks ingestion
+    ASANA_WEBHOOK_CACHE_TTL = int(
+        os.getenv("GIGES_ASANA_WEBHOOK_CACHE_TTL", "60")
+    )
+    ASANA_DEDUPLICATION_HOURS = 48
+    ASANA_WEBHOOK_QUEUE = os.getenv("GIGES_ASANA_WEBHOOK_QUEUE", "0") == "1"
+    ASANA_WORKER_CONCURRENCY = int(
+        os.getenv("GIGES_ASANA_WORKER_CONCURRENCY", "4")
+    )
+    ASANA_WORKER_MAX_ATTEMPTS = 3
+    ASANA_WORKER_LEASE_SECONDS = 300
+    ASANA_WORKER_RETRY_SECONDS = 30
+    ASANA_DEBOUNCE_SECONDS = int(
+        os.getenv("GIGES_ASANA_DEBOUNCE_SECONDS", "0")
+    )
+    ASANA_DEBOUNCE_MAX_SECONDS = 600
+    ASANA_DEBOUNCE_BATCH_SIZE = 100
+    ASANA_BACKFILL_BATCH_SIZE = 500
+    ASANA_WORKFLOW_TEMPLATES_TTL = 3600
+    ASANA_WORKFLOW_CLAIM_SECONDS = 3600
+
+    # Share of the responses validated against the API specification,
+    # none and without any overhead at 0
+    RESPONSE_VALIDATION_RATE = float(
+        os.getenv("GIGES_RESPONSE_VALIDATION_RATE", "1")
+    )
+    # Validate the Asana deliveries envelope only, not each of its events
+    WEBHOOK_ENVELOPE_VALIDATION = (
+        os.getenv("GIGES_WEBHOOK_ENVELOPE_VALIDATION", "0") == "1"
+    )
 
 
 class ProductionSettings(BaseSettings):
@@ -28,6 +76,12 @@ class ProductionSettings(BaseSettings):
     SERVER_BASE_URI = "https://integrations.tesselo.com"
     SENTRY_URI = "https://ec9a91e1ce0e40f59388c665c092dc2a@o640190.ingest.sentry.io/5911249"  # noqa: E501
     SLACK_BLOCKS_CHANNEL = "C02GXT5UY22"
+    RESPONSE_VALIDATION_RATE = float(
+        os.getenv("GIGES_RESPONSE_VALIDATION_RATE", "0.01")
+    )
+    WEBHOOK_ENVELOPE_VALIDATION = (
+        os.getenv("GIGES_WEBHOOK_ENVELOPE_VALIDATION", "1") == "1"
+    )
 
 
 class StagingSettings(BaseSettings):
@@ -51,6 +105,7 @@ class TestingSettings(BaseSettings):
     ENVIRONMENT = "testing"
     SERVER_BASE_URI = "http://localhost:8080"
     ASANA_TOKEN = "FAKETOKEN"
+    RATE_LIMIT_BACKOFF_SECONDS = 0.01
     SQLALCHEMY_DATABASE_URI = os.getenv("GIGES_DATABASE_URI") or (
         "postgresql://postgres@localhost:5432/giges_test"
     )
@@ -6,12 +6,47 @@ from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web import SlackResponse
 
+from giges.ratelimit import get_limiter
+
 logger = structlog.get_logger(__file__)
 
 
 class SlackClient(WebClient):
     def __init__(self, **kwargs: Any):
+        kwargs.setdefault("base_url", current_app.config["SLACK_BASE_URL"])
         super().__init__(token=current_app.config["SLACK_TOKEN"], **kwargs)
+        self.limiter = get_limiter("slack")
+        self.max_retries = current_app.config["RATE_LIMIT_MAX_RETRIES"]
+        self.backoff = (
+            current_app.config["RATE_LIMIT_BACKOFF_SECONDS"],
+            current_app.config["RATE_LIMIT_BACKOFF_MAX_SECONDS"],
+        )
+
+    def api_call(self, *args: Any, **kwargs: Any) -> SlackResponse:
+        """
+        Call Slack after taking a token from the shared Slack bucket.
+
+        Rate limited calls pause the bucket for the Retry-After asked by
+        Slack, server errors are retried after a jittered backoff.
+        """
+        retry_count = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                return super().api_call(*args, **kwargs)
+            except SlackApiError as e:
+                status = e.response.status_code
+                if retry_count >= self.max_retries or not (
+                    status == 429 or status >= 500
+                ):
+                    raise
+                if status == 429:
+                    self.limiter.pause(
+                        float(e.response.headers.get("Retry-After", 1))
+                    )
+                else:
+                    self.limiter.backoff(retry_count, *self.backoff)
+                retry_count += 1
 
     def send_message(self, channel: str, message: str) -> SlackResponse:
         try:
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+SPECIFICATION_DIR = os.path.join(os.path.dirname(__file__), "schemas")
+SPECIFICATION = os.path.join(SPECIFICATION_DIR, "api.yml")
+# The specification already parsed, loaded instead of the YAML
+PARSED_SPECIFICATION = os.path.join(SPECIFICATION_DIR, "api.json")
+# Key of the parsed specification with the hash of the YAML it comes from
+SOURCE_HASH_KEY = "x-source-sha256"
+
+
+def source_hash() -> str:
+    """
+    Hash the YAML specification, to know if its parsed copy is up to date.
+
+    :return: the hex digest of the YAML specification
+    """
+    with open(SPECIFICATION, "rb") as specification:
+        return hashlib.sha256(specification.read()).hexdigest()
+
+
+def parse_specification() -> Dict[str, Any]:
+    """
+    Parse the YAML specification, as connexion does, with string keys.
+
+    :return: the specification
+    """
+    # Imported here as it is only needed when the parsed copy is outdated
+    import yaml  # pylint: disable=import-outside-toplevel
+
+    with open(SPECIFICATION, "rb") as specification:
+        # JSON makes the keys strings, like the response status codes
+        return json.loads(json.dumps(yaml.safe_load(specification)))
+
+
+def build_specification() -> Dict[str, Any]:
+    """
+    Parse the YAML specification and store it as JSON next to it.
+
+    :return: the parsed specification
+    """
+    specification = parse_specification()
+    specification[SOURCE_HASH_KEY] = source_hash()
+    with open(PARSED_SPECIFICATION, "w") as parsed:
+        json.dump(specification, parsed, indent=2, sort_keys=True)
+        parsed.write("\n")
+    return specification
+
+
+def load_specification() -> Dict[str, Any]:
+    """
+    Load the API specification from its parsed copy, ten times faster
+    to read than the YAML, unless the YAML has changed since.
+
+    :return: the specification given to connexion
+    """
+    try:
+        with open(PARSED_SPECIFICATION) as parsed:
+            specification = json.load(parsed)
+    except FileNotFoundError:
+        specification = {}
+    if specification.get(SOURCE_HASH_KEY) == source_hash():
+        return specification
+
+    logger.warning(
+        "Outdated parsed API specification, run: giges build-spec",
+        path=PARSED_SPECIFICATION,
+    )
+    return parse_specification()
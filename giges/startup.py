@@ -0,0 +1,98 @@
+import json
+import subprocess
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterator
+
+# Imports and builds giges as the Lambda entry point does
+PROFILED_STARTUP = """
+import json
+from time import perf_counter
+
+start = perf_counter()
+from giges.app import create_flask_app
+imported = perf_counter()
+app = create_flask_app()
+phases = {"import": imported - start, **app.extensions["startup"]}
+print(json.dumps({"seconds": perf_counter() - start, "phases": phases}))
+"""
+
+
+@contextmanager
+def phase(timings: Dict[str, float], name: str) -> Iterator[None]:
+    """
+    Time a phase of the startup.
+
+    :param timings: where the seconds taken by each phase are kept
+    :param name: the name of the phase
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = perf_counter() - start
+
+
+def profile_startup() -> Dict[str, Any]:
+    """
+    Start giges in a new interpreter, as a Lambda cold start does, timing
+    every import and every phase of the app creation.
+
+    The settings are the ones of the current environment.
+
+    :return: the seconds of the whole startup, of each phase, of the
+             imports of each package and the imported modules
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROFILED_STARTUP],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode:
+        raise RuntimeError(f"giges failed to start:\n{result.stderr}")
+
+    modules: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        own, _, module = line.replace("import time:", "").partition("|")
+        if own.strip().isdigit():
+            modules[module.split("|")[-1].strip()] = int(own) / 1e6
+
+    packages: Dict[str, float] = {}
+    for module, seconds in modules.items():
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + seconds
+
+    profile = json.loads(result.stdout.splitlines()[-1])
+    profile["import_seconds"] = sum(modules.values())
+    profile["packages"] = dict(
+        sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    )
+    profile["modules"] = sorted(modules)
+    return profile
+
+
+def format_profile(profile: Dict[str, Any], top: int = 15) -> str:
+    """
+    Write a startup profile for humans.
+
+    :param profile: the startup profile
+    :param top: the amount of packages shown, the slowest to import
+    :return: the profile as text
+    """
+    lines = [f"Startup: {profile['seconds']:.3f}s", "Phases:"]
+    lines.extend(
+        f"  {name:<20}{seconds:.3f}s"
+        for name, seconds in profile["phases"].items()
+    )
+    lines.append(
+        f"Imports: {profile['import_seconds']:.3f}s "
+        f"in {len(profile['modules'])} modules"
+    )
+    lines.extend(
+        f"  {package:<20}{seconds:.3f}s"
+        for package, seconds in list(profile["packages"].items())[:top]
+    )
+    return "\n".join(lines)
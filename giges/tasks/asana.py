@@ -1,12 +1,34 @@
-from typing import Dict, List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta, timezone
+from typing import Any, Dict, List, Set
 
-import asana
+import iso8601
+import structlog
+from flask import current_app
 
-from giges.models.team import Team
-from giges.slack import SlackClient
+from giges.asana import connection_stats, create_client, projection
+from giges.handlers.asana import flush_dirty_tasks, prune_fingerprints
+from giges.models.team import Team, Tessera
+from giges.ratelimit import throttle_stats
 from giges.tasks.app import app
+from giges.tasks.sync import sync_projects
+from giges.tasks.worker import drain_deliveries
 from giges.util import validate_uuid
 
+logger = structlog.get_logger(__name__)
+
+# Fields of an Asana task read by the stick formatters
+STICK_OPT_FIELDS = projection(
+    ["gid", "name", "created_at", "assignee.gid"],
+    ["memberships.project.gid", "memberships.section.name"],
+    ["custom_fields.gid", "custom_fields.enum_value.gid"],
+    ["custom_fields.enum_value.name"],
+)
+
+# Largest page of search results that Asana returns
+SEARCH_PAGE_SIZE = 100
+
 
 def _add_ds_class_item(custom_field: Dict[str, str]) -> str:
     """
@@ -74,65 +96,208 @@ def daily_stick(team_id: str = None) -> None:
         stick(team_id)
 
 
-def stick(team_id: str = None) -> None:
+def daily_stick_teams() -> None:
+    """
+    Wrap the stick of all the teams inside the app context to be called
+    from a scheduled event.
+    """
+    with app.app_context():
+        stick_teams(Team.query.order_by(Team.name).all())
+
+
+def drain_webhook_queue() -> None:
+    """
+    Wrap the webhook queue worker inside the app context to be called
+    from a scheduled event.
+    """
+    with app.app_context():
+        drain_deliveries()
+
+
+def prune_webhook_fingerprints() -> None:
+    """
+    Wrap the pruning of old webhook fingerprints inside the app context
+    to be called from a scheduled event.
+    """
+    with app.app_context():
+        prune_fingerprints()
+
+
+def flush_webhook_tasks() -> None:
+    """
+    Wrap the retrieval of the tasks changed by webhooks inside the app
+    context to be called from a scheduled event.
+    """
+    with app.app_context():
+        flush_dirty_tasks()
+
+
+def sync_asana_projects() -> None:
+    """
+    Wrap the synchronization of the Asana projects events inside the app
+    context to be called from a scheduled event.
+    """
+    with app.app_context():
+        sync_projects()
+
+
+def search_team_tasks(
+    team: Team, workspace_id: str
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Search the tasks in progress of all the humans of a team at once.
+
+    Asana does not paginate searches, so the next page is asked for as
+    the tasks created up to the last one of a full page, included, as
+    others may have been created at that same moment. The tasks seen
+    again are skipped, and only the ties of a whole page, if ever, are
+    left behind.
+
+    :param team: the team with the humans and projects to search
+    :param workspace_id: the external (Asana) ID of the workspace
+    :return: the tasks by the external (Asana) ID of their assignee
+    """
+    asana_client = create_client()
+    params = {
+        "assignee.any": ",".join(h.asana_id for h in team.tesseras),
+        "projects.any": ",".join(p.external_id for p in team.projects),
+        "completed": False,
+        "is_subtask": False,
+        # 1200200605652838 = In Progress
+        "custom_fields.1200200605652836.value": 1200200605652838,
+        "sort_by": "created_at",
+        "limit": SEARCH_PAGE_SIZE,
+    }
+    tasks: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    seen: Set[str] = set()
+    while True:
+        page = asana_client.tasks.search_tasks_for_workspace(
+            workspace_gid=workspace_id,
+            params=params,
+            fields=STICK_OPT_FIELDS,
+            iterator_type=None,
+        )
+        new = [task for task in page if task["gid"] not in seen]
+        for task in new:
+            seen.add(task["gid"])
+            if task.get("assignee"):
+                tasks[task["assignee"]["gid"]].append(task)
+        if len(page) < SEARCH_PAGE_SIZE:
+            return tasks
+
+        last = iso8601.parse_date(page[-1]["created_at"])
+        if new:
+            # The bound is exclusive, just after keeps the ties of the last
+            last += timedelta(milliseconds=1)
+        else:
+            logger.warning(
+                "Asana tasks created at the same moment skipped",
+                team=team.name,
+                created_at=page[-1]["created_at"],
+            )
+        moment = last.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
+        params["created_at.before"] = moment[:-3] + "Z"
+
+
+def stick_message(
+    human: Tessera,
+    tasks: List[Dict[str, Any]],
+    projects_ids: List[str],
+    workspace_id: str,
+) -> str:
+    """
+    Write the stick message of a human.
+
+    :param human: the human the tasks are assigned to
+    :param tasks: the tasks in progress of the human
+    :param projects_ids: the external (Asana) IDs of the team projects
+    :param workspace_id: the external (Asana) ID of the workspace
+    :return: the message for Slack
+    """
+    message = f"<@{human.slack_id}|{human.name}> :robot_face: :qoobe_hi:"
+    for task in tasks:
+        message += "\n\t -  <https://app.asana.com/0/"
+        message += f"{workspace_id}/{task['gid']}/f|{task['name']}> \t"
+
+        fields = {"section": _add_section(task["memberships"], projects_ids)}
+        for field in task["custom_fields"]:
+            if field["gid"] == "1200760323623705":
+                fields["class"] = _add_class_of_service(field["enum_value"])
+            elif field["gid"] == "1200760343663992" and field["enum_value"]:
+                fields["item"] = _add_ds_class_item(field["enum_value"])
+            elif field["gid"] == "1200765868551790" and field["enum_value"]:
+                fields["item"] = _add_pf_class_item(field["enum_value"])
+        message += f"{fields.get('class', ':memo:')} "
+        message += f"{fields.get('section', ':fairy:')} "
+        message += f"{fields.get('item', ':dragon:')}"
+
+    message += "\n:speech_balloon: -> :thread:\n"
+    return message
+
+
+def stick_teams(teams: List[Team]) -> int:
     """
-    For all the projects that belongs to a team:
-        - list all the current tasks
+    For all the projects that belongs to each team:
+        - list all the current tasks with one search per team
         - assigned to each person in the team
-        - annoy the sufficient amount
+        - annoy the sufficient amount, many humans at the same time
 
-    :param team_id: the giges UUID of the team
+    :param teams: the teams to stick
+    :return: the amount of messages sent
     """
-    asana_client = asana.Client.access_token(app.config["ASANA_TOKEN"])
+    workspace_id = current_app.config["ASANA_WORKSPACE"]
+    messages: List[str] = []
+    for team in teams:
+        if not team.tesseras or not team.projects:
+            continue
+        projects_ids = [p.external_id for p in team.projects]
+        tasks = search_team_tasks(team, workspace_id)
+        messages.extend(
+            stick_message(
+                human,
+                tasks.get(human.asana_id, []),
+                projects_ids,
+                workspace_id,
+            )
+            for human in team.tesseras
+        )
+
+    # Imported here to keep the Slack sdk out of the other tasks cold start
+    from giges.slack import (  # pylint: disable=import-outside-toplevel
+        SlackClient,
+    )
+
     slack_client = SlackClient()
-    workspace_id = app.config["ASANA_WORKSPACE"]
+    channel = current_app.config["SLACK_BLOCKS_CHANNEL"]
+    with ThreadPoolExecutor(
+        max_workers=current_app.config["SLACK_CONCURRENCY"]
+    ) as executor:
+        list(
+            executor.map(
+                lambda message: slack_client.send_message(channel, message),
+                messages,
+            )
+        )
+
+    logger.info(
+        "Stick sent",
+        messages=len(messages),
+        throttle=throttle_stats(),
+        **connection_stats(),
+    )
+    return len(messages)
+
 
+def stick(team_id: str = None) -> None:
+    """
+    Stick the humans of a team.
+
+    :param team_id: the giges UUID of the team, the Tech team by default
+    """
     if validate_uuid(team_id):
         team = Team.query.filter_by(id=team_id).one_or_none()
     else:
         # Search for the Tech team by default
         team = Team.query.filter_by(name="Tech").one_or_none()
 
-    projects_ids = [p.external_id for p in team.projects]
-
-    for human in team.tesseras:
-        message = f"<@{human.slack_id}|{human.name}> :robot_face: :qoobe_hi:"
-        tasks = asana_client.tasks.search_tasks_for_workspace(
-            workspace_gid=workspace_id,
-            params={
-                "assignee.any": human.asana_id,
-                "projects.any": ",".join(projects_ids),
-                "completed": False,
-                "is_subtask": False,
-                # 1200200605652838 = In Progress
-                "custom_fields.1200200605652836.value": 1200200605652838,
-            },
-            options={"fields": "followers,assignee", "opt_pretty": True},
-        )
-        for t in tasks:
-            task = asana_client.tasks.find_by_id(t["gid"])
-            message += "\n\t -  <https://app.asana.com/0/"
-            message += f"{workspace_id}/{task['gid']}/f|{task['name']}> \t"
-
-            fields = {
-                "section": _add_section(task["memberships"], projects_ids)
-            }
-            for field in task["custom_fields"]:
-                if field["gid"] == "1200760323623705":
-                    fields["class"] = _add_class_of_service(
-                        field["enum_value"]
-                    )
-                elif (
-                    field["gid"] == "1200760343663992" and field["enum_value"]
-                ):
-                    fields["item"] = _add_ds_class_item(field["enum_value"])
-                elif (
-                    field["gid"] == "1200765868551790" and field["enum_value"]
-                ):
-                    fields["item"] = _add_pf_class_item(field["enum_value"])
-            message += f"{fields.get('class', ':memo:')} "
-            message += f"{fields.get('section', ':fairy:')} "
-            message += f"{fields.get('item', ':dragon:')}"
-
-        message += "\n:speech_balloon: -> :thread:\n"
-        slack_client.send_to_road_blocks(message)
+    stick_teams([team])
@@ -0,0 +1,78 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+import structlog
+from flask import current_app
+
+from giges.asana import create_client
+from giges.db import db
+from giges.handlers.asana import TASK_OPT_FIELDS, save_tasks
+
+logger = structlog.get_logger(__name__)
+
+# Largest page of tasks that Asana returns
+PAGE_SIZE = 100
+
+
+def stream_project_tasks(project_id: str) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Read the tasks of a project page by page, fetching the next page in
+    the background while the current one is consumed.
+
+    :param project_id: the external (Asana) ID of the project
+    :return: an iterator over the pages of tasks
+    """
+    client = create_client()
+
+    def fetch_page(offset: Optional[str]) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"limit": PAGE_SIZE}
+        if offset:
+            params["offset"] = offset
+        return client.get(
+            f"/projects/{project_id}/tasks",
+            params,
+            full_payload=True,
+            fields=TASK_OPT_FIELDS,
+        )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page: Optional[Future] = executor.submit(fetch_page, None)
+        while page is not None:
+            response = page.result()
+            next_page = response.get("next_page")
+            page = (
+                executor.submit(fetch_page, next_page["offset"])
+                if next_page
+                else None
+            )
+            yield response["data"]
+
+
+def backfill_project(
+    project_id: str, batch_size: Optional[int] = None
+) -> Iterator[int]:
+    """
+    Save all the tasks of a project, committing them in batches.
+
+    Only one batch and the prefetched page are kept in memory, no matter
+    how many tasks the project has.
+
+    :param project_id: the external (Asana) ID of the project
+    :param batch_size: the amount of tasks saved in each transaction,
+                       ASANA_BACKFILL_BATCH_SIZE by default
+    :return: an iterator over the amount of tasks saved in each batch
+    """
+    batch_size = batch_size or current_app.config["ASANA_BACKFILL_BATCH_SIZE"]
+    batch: Dict[str, Dict[str, Any]] = {}
+    for tasks in stream_project_tasks(project_id):
+        for task in tasks:
+            batch[task["gid"]] = task
+            if len(batch) >= batch_size:
+                save_tasks(batch)
+                db.session.commit()
+                yield len(batch)
+                batch = {}
+    if batch:
+        save_tasks(batch)
+        db.session.commit()
+        yield len(batch)
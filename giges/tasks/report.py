@@ -0,0 +1,11 @@
+from giges.handlers.report import refresh_reports
+from giges.tasks.app import app
+
+
+def refresh_scheduled_reports() -> None:
+    """
+    Wrap the refresh of the reports inside the app context to be called
+    from a scheduled event.
+    """
+    with app.app_context():
+        refresh_reports()
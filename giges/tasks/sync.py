@@ -0,0 +1,96 @@
+from typing import Iterable, Optional
+
+import structlog
+from asana.error import InvalidTokenError
+
+from giges.asana import create_client
+from giges.db import db
+from giges.handlers.asana import (
+    discard_duplicated_events,
+    handle_task_events,
+    process_task_events,
+)
+from giges.models.asana import Event, Project
+from giges.ratelimit import throttle_stats
+
+logger = structlog.get_logger(__name__)
+
+# The synchronized events update the tasks as the task webhooks do, so they
+# share their fingerprints and neither handles the events of the other again
+SYNC_SCOPE = handle_task_events.__name__
+
+
+def sync_project(project: Project) -> int:
+    """
+    Read the events of a project since its last sync token and update
+    the tasks they changed, page by page.
+
+    Each page of events is committed together with the token that follows
+    it, so an interrupted sync starts again from the last committed page.
+    Without a token, or with an expired one, Asana only hands a new token
+    and the sync starts from that moment.
+
+    :param project: the project to synchronize
+    :return: the amount of new events processed
+    """
+    client = create_client()
+    processed = 0
+    while True:
+        params = {"resource": project.external_id}
+        if project.sync_token:
+            params["sync"] = project.sync_token
+        try:
+            response = client.get("/events", params, full_payload=True)
+        except InvalidTokenError as e:
+            if project.sync_token:
+                logger.warning(
+                    "Asana sync token expired, events may be missing",
+                    project=project.external_id,
+                )
+            project.sync_token = e.sync
+            db.session.add(project)
+            db.session.commit()
+            return processed
+
+        events = discard_duplicated_events(None, response["data"], SYNC_SCOPE)
+        if events:
+            process_task_events(events)
+            db.session.add(Event(content=events))
+        project.sync_token = response["sync"]
+        db.session.add(project)
+        db.session.commit()
+        processed += len(events)
+
+        if not response.get("has_more"):
+            return processed
+
+
+def sync_projects(project_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Synchronize the events of many projects.
+
+    :param project_ids: the external (Asana) IDs of the projects,
+                        all the known projects by default
+    :return: the amount of new events processed
+    """
+    query = Project.query.order_by(Project.name)
+    if project_ids:
+        query = query.filter(Project.external_id.in_(list(project_ids)))
+
+    processed = 0
+    for project in query.all():
+        try:
+            processed += sync_project(project)
+        except Exception:
+            # Nor Asana nor connection errors stop the other projects
+            db.session.rollback()
+            logger.exception(
+                "Failed to synchronize an Asana project",
+                project=project.external_id,
+            )
+    logger.info(
+        "Asana projects synchronized",
+        events=processed,
+        throttle=throttle_stats("asana"),
+    )
+    return processed
@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import structlog
+from flask import Flask, current_app
+from sqlalchemy import and_, or_
+
+from giges.asana import connection_stats
+from giges.db import db
+from giges.handlers.asana import EVENT_HANDLERS
+from giges.models.asana import Delivery, DeliveryStatusEnum
+
+logger = structlog.get_logger(__name__)
+
+
+def claim_delivery() -> Optional[Delivery]:
+    """
+    Take the oldest pending delivery out of the queue.
+
+    Rows locked by other workers are skipped, and deliveries that stayed
+    in processing longer than the lease are considered abandoned.
+
+    :return: the claimed delivery or None if the queue is empty
+    """
+    now = datetime.now(tz=timezone.utc)
+    expired = now - timedelta(
+        seconds=current_app.config["ASANA_WORKER_LEASE_SECONDS"]
+    )
+    delivery = (
+        Delivery.query.filter(
+            or_(
+                and_(
+                    Delivery.status == DeliveryStatusEnum.pending,
+                    Delivery.available_at <= now,
+                ),
+                and_(
+                    Delivery.status == DeliveryStatusEnum.processing,
+                    Delivery.updated_at < expired,
+                ),
+            )
+        )
+        .order_by(Delivery.created_at)
+        .with_for_update(skip_locked=True)
+        .limit(1)
+        .one_or_none()
+    )
+    if delivery is None:
+        db.session.rollback()
+        return None
+
+    delivery.status = DeliveryStatusEnum.processing
+    delivery.attempts += 1
+    db.session.add(delivery)
+    db.session.commit()
+    return delivery
+
+
+def process_delivery(delivery: Delivery) -> None:
+    """
+    Handle the events of a claimed delivery and record the outcome.
+
+    Failed deliveries go back to the queue with an exponential delay until
+    they run out of attempts, badly formatted events are not retried at all.
+
+    :param delivery: the delivery claimed by this worker
+    """
+    handle_events = EVENT_HANDLERS[delivery.handler]
+    try:
+        handle_events(delivery.webhook, delivery.content)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(
+            "Failed to handle a webhook delivery", delivery=delivery.id
+        )
+        exhausted = (
+            delivery.attempts
+            >= current_app.config["ASANA_WORKER_MAX_ATTEMPTS"]
+        )
+        if isinstance(e, KeyError) or exhausted:
+            delivery.status = DeliveryStatusEnum.failed
+        else:
+            delivery.status = DeliveryStatusEnum.pending
+            delivery.available_at = datetime.now(tz=timezone.utc) + timedelta(
+                seconds=current_app.config["ASANA_WORKER_RETRY_SECONDS"]
+                * 2 ** (delivery.attempts - 1)
+            )
+        delivery.error = repr(e)
+    else:
+        delivery.status = DeliveryStatusEnum.done
+        delivery.error = None
+    db.session.add(delivery)
+    db.session.commit()
+
+
+def _drain(app: Flask, limit: Optional[int]) -> int:
+    """
+    Claim and process deliveries in a fresh app context and db session.
+
+    :param app: the flask application
+    :param limit: the maximum amount of deliveries to process
+    :return: the amount of processed deliveries
+    """
+    processed = 0
+    with app.app_context():
+        while limit is None or processed < limit:
+            delivery = claim_delivery()
+            if delivery is None:
+                break
+            process_delivery(delivery)
+            processed += 1
+    return processed
+
+
+def drain_deliveries(
+    concurrency: Optional[int] = None, limit: Optional[int] = None
+) -> int:
+    """
+    Process the queued webhook deliveries until the queue is empty.
+
+    :param concurrency: the number of threads working the queue,
+                        ASANA_WORKER_CONCURRENCY by default
+    :param limit: the maximum amount of deliveries for each thread
+    :return: the amount of processed deliveries
+    """
+    app = current_app._get_current_object()  # type: ignore
+    concurrency = concurrency or app.config["ASANA_WORKER_CONCURRENCY"]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(_drain, app, limit) for _ in range(concurrency)
+        ]
+    processed = sum(future.result() for future in futures)
+    logger.info("Asana connections", **connection_stats())
+    return processed
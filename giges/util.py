@@ -1,3 +1,9 @@
+import base64
+import binascii
+import json
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 from uuid import UUID
 
 
@@ -9,3 +15,83 @@ def validate_uuid(test_uuid: str) -> bool:
         return str(gen_uuid) == test_uuid
     except (ValueError, TypeError):
         return False
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Pack the sort key of the last row of a page into an opaque cursor.
+
+    :param values: the JSON serializable values of the sort key
+    :return: the URL safe cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[List[Any]]:
+    """
+    Unpack a cursor made by encode_cursor.
+
+    :param cursor: the URL safe cursor
+    :return: the values of the sort key or None if the cursor is not valid
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+class TTLCache:
+    """
+    A small thread safe in-memory cache whose entries expire.
+
+    When full, the oldest entry is evicted to make room for the new ones.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Retrieve a value that has not expired yet.
+
+        :param key: the key of the entry
+        :return: the cached value or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """
+        Store a value for some time.
+
+        :param key: the key of the entry
+        :param value: the value to cache
+        :param ttl: the seconds until the entry expires
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.maxsize:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Remove an entry, or all of them.
+
+        :param key: the key of the entry, None to empty the cache
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,73 @@
+import random
+from typing import Any, Dict, Optional
+
+from connexion.decorators.response import ResponseValidator
+from connexion.decorators.validation import RequestBodyValidator
+from flask import current_app
+
+# Marks the arrays of a request schema whose items are not validated by
+# the envelope only validation, like the events of the Asana webhooks
+ENVELOPE_KEY = "x-envelope"
+
+
+def envelope_schema(schema: Any) -> Any:
+    """
+    Strip a schema of the items of the arrays marked as envelopes, so only
+    the envelope around them is validated.
+
+    :param schema: the JSON schema, with its references resolved
+    :return: a copy of the schema without the items of the envelopes
+    """
+    if isinstance(schema, list):
+        return [envelope_schema(value) for value in schema]
+    if not isinstance(schema, dict):
+        return schema
+    return {
+        key: envelope_schema(value)
+        for key, value in schema.items()
+        if key != "items" or not schema.get(ENVELOPE_KEY)
+    }
+
+
+class EnvelopeRequestBodyValidator(RequestBodyValidator):
+    """
+    Request body validator checking only the envelope of the bodies with
+    envelopes when ``WEBHOOK_ENVELOPE_VALIDATION`` is set, skipping the
+    schema of every event of the large Asana deliveries.
+    """
+
+    def __init__(self, schema: Dict[str, Any], *args: Any, **kwargs: Any):
+        super().__init__(schema, *args, **kwargs)
+        envelope = envelope_schema(schema)
+        self.envelope: Optional[RequestBodyValidator] = None
+        if envelope != schema:
+            self.envelope = RequestBodyValidator(envelope, *args, **kwargs)
+
+    def validate_schema(self, data: Any, url: str) -> Any:
+        if (
+            self.envelope is not None
+            and current_app.config["WEBHOOK_ENVELOPE_VALIDATION"]
+        ):
+            return self.envelope.validate_schema(data, url)
+        return super().validate_schema(data, url)
+
+
+class SampledResponseValidator(ResponseValidator):
+    """
+    Response validator checking only a random share of the responses,
+    ``RESPONSE_VALIDATION_RATE``, against the API specification.
+    """
+
+    def validate_response(
+        self, data: Any, status_code: int, headers: Any, url: str
+    ) -> bool:
+        rate = current_app.config["RESPONSE_VALIDATION_RATE"]
+        if rate < 1 and random.random() >= rate:
+            return True
+        return super().validate_response(data, status_code, headers, url)
+
+
+VALIDATOR_MAP = {
+    "body": EnvelopeRequestBodyValidator,
+    "response": SampledResponseValidator,
+}
@@ -0,0 +1,65 @@
+"""Unique task external id
+
+Revision ID: 5fb5043f473f
+Revises: 6cda4b030a47
+Create Date: 2026-10-18 12:36:42.918777
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5fb5043f473f"
+down_revision = "6cda4b030a47"
+branch_labels = None
+depends_on = None
+
+# Keep the most recently updated task of every external id,
+# moving the changes of its duplicates to it
+DUPLICATED_TASKS = """
+    SELECT id, keep_id FROM (
+        SELECT
+            id,
+            first_value(id) OVER (
+                PARTITION BY external_id ORDER BY updated_at DESC, id
+            ) AS keep_id
+        FROM asana_task
+        WHERE external_id IS NOT NULL
+    ) AS ranked
+    WHERE id <> keep_id
+"""
+
+
+def upgrade() -> None:
+    # Deferred checks would block the creation of the index
+    op.execute("SET CONSTRAINTS asana_task_change_task_fk IMMEDIATE")
+    op.execute(
+        f"""
+        UPDATE asana_task_change
+        SET task_id = duplicated.keep_id
+        FROM ({DUPLICATED_TASKS}) AS duplicated
+        WHERE asana_task_change.task_id = duplicated.id
+        """
+    )
+    op.execute(
+        f"""
+        DELETE FROM asana_task
+        WHERE id IN (SELECT id FROM ({DUPLICATED_TASKS}) AS duplicated)
+        """
+    )
+    op.drop_index("ix_asana_task_external_id", table_name="asana_task")
+    op.create_index(
+        op.f("ix_asana_task_external_id"),
+        "asana_task",
+        ["external_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_asana_task_external_id"), table_name="asana_task")
+    op.create_index(
+        "ix_asana_task_external_id",
+        "asana_task",
+        ["external_id"],
+        unique=False,
+    )
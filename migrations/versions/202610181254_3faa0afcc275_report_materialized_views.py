@@ -0,0 +1,107 @@
+"""Report materialized views
+
+Revision ID: 3faa0afcc275
+Revises: d1633e960526
+Create Date: 2026-10-18 12:54:36.224087
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3faa0afcc275"
+down_revision = "d1633e960526"
+branch_labels = None
+depends_on = None
+
+# When each task was first seen, started and done, from its changes
+TASK_FLOW = """
+    SELECT
+        asana_task.id,
+        asana_task.project_external_id,
+        COALESCE(asana_task.class_of_service, 'Unclassified')
+            AS class_of_service,
+        asana_task.created_at AS first_seen_at,
+        MIN(asana_task_change.created_at) FILTER (
+            WHERE asana_task_change.task_progress = 'In Progress'
+        ) AS started_at,
+        COALESCE(
+            MIN(asana_task_change.created_at) FILTER (
+                WHERE asana_task_change.task_progress = 'Done'
+            ),
+            asana_task.completed_at AT TIME ZONE 'UTC'
+        ) AS done_at
+    FROM asana_task
+    LEFT JOIN asana_task_change
+        ON asana_task_change.task_id = asana_task.id
+    GROUP BY asana_task.id
+"""
+
+# The teams owning the project of each task
+TASK_TEAM = """
+    JOIN asana_project
+        ON asana_project.external_id = task.project_external_id
+    JOIN team_project_association
+        ON team_project_association.project_id = asana_project.id
+"""
+
+
+def upgrade() -> None:
+    op.execute(
+        f"""
+        CREATE MATERIALIZED VIEW report_weekly_flow AS
+        SELECT
+            team_project_association.team_id,
+            task.class_of_service,
+            date_trunc('week', task.done_at AT TIME ZONE 'UTC')::date
+                AS week,
+            COUNT(DISTINCT task.id) AS throughput,
+            AVG(EXTRACT(EPOCH FROM task.done_at - task.first_seen_at))
+                FILTER (WHERE task.done_at >= task.first_seen_at) / 3600
+                AS lead_time_hours,
+            percentile_cont(0.85) WITHIN GROUP (
+                ORDER BY EXTRACT(EPOCH FROM task.done_at - task.first_seen_at)
+            ) FILTER (WHERE task.done_at >= task.first_seen_at) / 3600
+                AS lead_time_p85_hours,
+            AVG(EXTRACT(EPOCH FROM task.done_at - task.started_at))
+                FILTER (WHERE task.done_at >= task.started_at) / 3600
+                AS cycle_time_hours
+        FROM ({TASK_FLOW}) AS task
+        {TASK_TEAM}
+        WHERE task.done_at IS NOT NULL
+        GROUP BY team_project_association.team_id, task.class_of_service, week
+        """
+    )
+    op.execute(
+        """
+        CREATE UNIQUE INDEX ix_report_weekly_flow
+        ON report_weekly_flow (team_id, class_of_service, week)
+        """
+    )
+    op.execute(
+        f"""
+        CREATE MATERIALIZED VIEW report_work_in_progress AS
+        SELECT
+            team_project_association.team_id,
+            COALESCE(task.class_of_service, 'Unclassified')
+                AS class_of_service,
+            COUNT(DISTINCT task.id) AS tasks
+        FROM asana_task AS task
+        {TASK_TEAM}
+        WHERE task.task_progress = 'In Progress'
+            AND task.completed IS NOT TRUE
+        GROUP BY
+            team_project_association.team_id,
+            COALESCE(task.class_of_service, 'Unclassified')
+        """
+    )
+    op.execute(
+        """
+        CREATE UNIQUE INDEX ix_report_work_in_progress
+        ON report_work_in_progress (team_id, class_of_service)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW report_work_in_progress")
+    op.execute("DROP MATERIALIZED VIEW report_weekly_flow")
@@ -0,0 +1,33 @@
+import pytest
+
+from giges.handlers.asana import save_tasks
+
+
+@pytest.mark.parametrize("rate", [1, 0.01], ids=["all", "sampled"])
+def test_benchmark_response_validation(
+    benchmark, app, client, project, monkeypatch, rate
+):
+    monkeypatch.setitem(app.config, "RESPONSE_VALIDATION_RATE", rate)
+    save_tasks(
+        {
+            str(gid): {
+                "gid": str(gid),
+                "name": f"Task {gid}",
+                "memberships": [
+                    {
+                        "project": {"gid": project.external_id},
+                        "section": {"name": "Doing"},
+                    }
+                ],
+                "custom_fields": [],
+            }
+            for gid in range(100)
+        }
+    )
+
+    response = benchmark(
+        client.get, f"/asana/projects/{project.external_id}/tasks"
+    )
+
+    assert response.status_code == 200
+    assert len(response.json["tasks"]) == 100
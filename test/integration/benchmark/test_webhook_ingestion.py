@@ -0,0 +1,172 @@
+import hashlib
+import hmac
+import json
+from itertools import count
+from unittest.mock import patch
+
+import pytest
+
+from giges.db import db
+from giges.handlers.asana import save_tasks
+from giges.models.asana import Event, ResourceTypeEnum, Task
+from giges.settings import asana_fields
+
+SIZES = (1, 10, 100)
+
+# Unique timestamps, so no event is discarded as already received
+moments = count()
+
+
+def _events(gids):
+    events = []
+    for gid in gids:
+        moment = next(moments)
+        events.append(
+            {
+                "user": {"gid": "1", "resource_type": "user"},
+                "created_at": (
+                    f"2021-10-01T00:{moment // 60000 % 60:02d}:"
+                    f"{moment // 1000 % 60:02d}.{moment % 1000:03d}Z"
+                ),
+                "action": "changed",
+                "resource": {"gid": gid, "resource_type": "task"},
+                "change": {"field": "name", "action": "changed"},
+            }
+        )
+    return events
+
+
+def _signed(secret, events):
+    body = json.dumps({"events": events}).encode()
+    signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return body, {
+        "X-Hook-Signature": signature,
+        "Content-Type": "application/json",
+    }
+
+
+def _custom_fields(n):
+    return [
+        {
+            "gid": gid,
+            "enum_value": {"gid": list(field["options"])[n % 2]},
+        }
+        for gid, field in asana_fields.items()
+    ]
+
+
+@pytest.fixture
+def task_webhook(webhook_factory, project_factory):
+    return webhook_factory(
+        project=project_factory(),
+        resource_type=ResourceTypeEnum.task,
+        secret="pork_fillet",
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_benchmark_discarded_delivery(benchmark, client, task_webhook, size):
+    body, headers = _signed(task_webhook.secret, _events(["1"] * size))
+
+    with patch(
+        "giges.handlers.asana.discard_duplicated_events", return_value=[]
+    ):
+        response = benchmark(
+            client.post, task_webhook.path, data=body, headers=headers
+        )
+
+    assert response.status_code == 204
+
+
+@pytest.mark.parametrize("envelope", [False, True], ids=["full", "envelope"])
+def test_benchmark_webhook_validation(
+    benchmark, app, client, task_webhook, monkeypatch, envelope
+):
+    monkeypatch.setitem(app.config, "WEBHOOK_ENVELOPE_VALIDATION", envelope)
+    body, headers = _signed(task_webhook.secret, _events(["1"] * 100))
+
+    with patch(
+        "giges.handlers.asana.discard_duplicated_events", return_value=[]
+    ):
+        response = benchmark(
+            client.post, task_webhook.path, data=body, headers=headers
+        )
+
+    assert response.status_code == 204
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_benchmark_save_tasks(benchmark, size):
+    rounds = count()
+
+    def save():
+        n = next(rounds)
+        # Every round changes the section and the custom fields of the tasks
+        save_tasks(
+            {
+                str(gid): {
+                    "gid": str(gid),
+                    "name": f"Benchmarked {gid}",
+                    "completed": False,
+                    "memberships": [
+                        {
+                            "project": {"gid": "1"},
+                            "section": {"name": f"Section {n % 2}"},
+                        }
+                    ],
+                    "custom_fields": _custom_fields(n),
+                }
+                for gid in range(size)
+            }
+        )
+        db.session.commit()
+
+    benchmark(save)
+
+    assert Task.query.count() == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_benchmark_event_commit(benchmark, task_webhook, size):
+    events = _events(["1"] * size)
+
+    def commit():
+        db.session.add(Event(webhook=task_webhook, content=events))
+        db.session.commit()
+
+    benchmark(commit)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_benchmark_task_webhook(
+    benchmark,
+    app,
+    client,
+    fake_upstreams,
+    webhook_factory,
+    project_factory,
+    monkeypatch,
+    size,
+):
+    # Measure giges, not the Asana budget
+    monkeypatch.setitem(app.config, "ASANA_RATE_LIMIT", 0)
+    asana = fake_upstreams.asana
+    project_id = next(iter(asana.projects))
+    gids = asana.project_tasks[project_id][:size]
+    webhook = webhook_factory(
+        project=project_factory(external_id=project_id),
+        resource_type=ResourceTypeEnum.task,
+        secret="pork_fillet",
+    )
+    path, secret = webhook.path, webhook.secret
+
+    def delivery():
+        body, headers = _signed(secret, _events(gids))
+        return (path,), {"data": body, "headers": headers}
+
+    response = benchmark.pedantic(
+        client.post, setup=delivery, rounds=20, warmup_rounds=1
+    )
+
+    assert response.status_code == 204
+    assert Task.query.count() == size
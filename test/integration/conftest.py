@@ -1,12 +1,20 @@
+import threading
+from http.server import ThreadingHTTPServer
+
 import flask_migrate
 import pytest
 from pytest_factoryboy import register
 from sqlalchemy import inspect
+from sqlalchemy.event import listen, remove
 
 from giges.app import create_connexion_app
 from giges.db import db
+from giges.fake.asana import FakeAsana
+from giges.fake.server import FakeServer
+from giges.handlers.asana import webhooks_cache, workflow_templates_cache
 
 from .factories import (
+    DeliveryFactory,
     EventFactory,
     ProjectFactory,
     RitualFactory,
@@ -15,6 +23,7 @@ from .factories import (
 )
 
 for factory in (
+    DeliveryFactory,
     EventFactory,
     ProjectFactory,
     WebhookFactory,
@@ -75,9 +84,69 @@ def transactional_db(_db):
     _db.session.commit()
 
 
+@pytest.fixture(autouse=True)
+def clean_webhooks_cache():
+    yield
+    webhooks_cache.invalidate()
+    workflow_templates_cache.invalidate()
+
+
+@pytest.fixture
+def count_queries(_db):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    listen(_db.engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    remove(_db.engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture(scope="module")
 def vcr_config():
     return {
         "decode_compressed_response": True,
         "filter_headers": ["authorization"],
     }
+
+
+@pytest.fixture
+def serve_asana(app, monkeypatch):
+    """
+    Start local HTTP servers standing in for Asana, the client is pointed
+    to the last one started.
+    """
+    servers = []
+
+    def serve(handler):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        url = f"http://127.0.0.1:{server.server_port}"
+        # The local server does not speak https
+        monkeypatch.setenv("OAUTHLIB_INSECURE_TRANSPORT", "1")
+        monkeypatch.setitem(app.config, "ASANA_BASE_URL", url)
+        return url
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def fake_upstreams(app, monkeypatch):
+    """
+    Serve a small seeded Asana workspace and Slack, with giges pointed
+    to them.
+    """
+    asana = FakeAsana(app.config["ASANA_WORKSPACE"])
+    asana.seed(tasks=300, projects=2, users=4, subtasks=1)
+    server = FakeServer(asana=asana).start()
+    # The local server does not speak https
+    monkeypatch.setenv("OAUTHLIB_INSECURE_TRANSPORT", "1")
+    monkeypatch.setitem(app.config, "ASANA_BASE_URL", server.asana_url)
+    monkeypatch.setitem(app.config, "SLACK_BASE_URL", server.slack_url)
+    yield server
+    server.stop()
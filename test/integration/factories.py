@@ -1,10 +1,16 @@
-from factory import Faker, LazyAttribute, SubFactory
+from factory import Faker, LazyAttribute, Sequence, SubFactory
 from factory.alchemy import SQLAlchemyModelFactory
 from factory.fuzzy import FuzzyChoice, FuzzyText
 from faker.providers import date_time
 
 from giges.db import db
-from giges.models.asana import Event, Project, ResourceTypeEnum, Webhook
+from giges.models.asana import (
+    Delivery,
+    Event,
+    Project,
+    ResourceTypeEnum,
+    Webhook,
+)
 from giges.models.ritual import Ritual
 from giges.models.team import Team
 
@@ -46,6 +52,27 @@ class EventFactory(SQLAlchemyModelFactory):
         sqlalchemy_session_persistence = "commit"
 
 
+class DeliveryFactory(SQLAlchemyModelFactory):
+    webhook = SubFactory(WebhookFactory)
+    handler = "handle_task_events"
+    content = Sequence(
+        lambda n: [
+            {
+                "action": "changed",
+                "resource": {
+                    "gid": str(1201046407912294 + n),
+                    "resource_type": "task",
+                },
+            }
+        ]
+    )
+
+    class Meta:
+        model = Delivery
+        sqlalchemy_session = db.session
+        sqlalchemy_session_persistence = "commit"
+
+
 class TeamFactory(SQLAlchemyModelFactory):
     name = FuzzyText()
 
@@ -0,0 +1,79 @@
+import json
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from giges.models.asana import Task, TaskChange
+
+TASKS = [
+    {
+        "gid": str(gid),
+        "name": f"Task {gid}",
+        "completed": False,
+        "memberships": [{"section": {"name": "Doing"}}],
+        "custom_fields": [],
+    }
+    for gid in range(1, 251)
+]
+
+
+class AsanaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.requests.append((url.path, query))
+        start = int(query.get("offset", 0))
+        end = start + int(query["limit"])
+        content = {
+            "data": TASKS[start:end],
+            "next_page": {"offset": str(end)} if end < len(TASKS) else None,
+        }
+        body = json.dumps(content).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def asana_server(serve_asana):
+    AsanaHandler.requests = []
+    serve_asana(AsanaHandler)
+    return AsanaHandler.requests
+
+
+def test_asana_cli_backfill(cli_runner, asana_server):
+    result = cli_runner.invoke(
+        args=["asana", "backfill", "1201", "--batch-size", "120"]
+    )
+
+    assert result.exit_code == 0
+    assert result.output.splitlines() == [
+        "120 tasks saved",
+        "240 tasks saved",
+        "250 tasks saved",
+    ]
+    assert [query.get("offset") for _, query in asana_server] == [
+        None,
+        "100",
+        "200",
+    ]
+    assert {path for path, _ in asana_server} == {"/projects/1201/tasks"}
+    assert asana_server[0][1]["limit"] == "100"
+    assert Task.query.count() == 250
+    assert TaskChange.query.count() == 250
+
+    result = cli_runner.invoke(args=["asana", "backfill", "1201"])
+
+    assert result.output == "250 tasks saved\n"
+    assert Task.query.count() == 250
+    # Nothing changed, nothing recorded
+    assert TaskChange.query.count() == 250
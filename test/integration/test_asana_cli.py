@@ -1,7 +1,27 @@
 import json
+from unittest.mock import MagicMock, patch
 
 import pytest
 
+from giges.handlers.asana import resolve_webhook
+from giges.models.asana import Delivery, DeliveryStatusEnum, Task
+
+ASANA_TASK = {
+    "gid": "1201046407912294",
+    "name": "Add relevant fields to webhook subscriptions",
+    "completed": False,
+    "completed_at": None,
+    "memberships": [
+        {
+            "project": {"gid": "1200802773613549"},
+            "section": {"name": "In progress"},
+        }
+    ],
+    "custom_fields": [
+        {"gid": "1200200605652836", "enum_value": {"gid": "1200200605652838"}}
+    ],
+}
+
 
 def test_asana_cli_help(cli_runner):
     result = cli_runner.invoke(args=["asana"])
@@ -122,3 +142,59 @@ def test_asana_cli_generate_custom_field_dicts(cli_runner):
     assert result.exit_code == 0
     assert "Priority" in result.output
     assert "Timebomb" in result.output
+
+
+def test_asana_cli_worker(cli_runner, delivery_factory):
+    delivery_ids = [d.id for d in delivery_factory.create_batch(3)]
+
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        side_effect=lambda gids: {gid: ASANA_TASK for gid in gids},
+    ):
+        result = cli_runner.invoke(
+            args=["asana", "worker", "--concurrency", "2"]
+        )
+
+    assert result.exit_code == 0
+    assert "3 deliveries processed" in result.output
+    for delivery_id in delivery_ids:
+        db_delivery = Delivery.query.get(delivery_id)
+        assert db_delivery.status == DeliveryStatusEnum.done
+        assert db_delivery.attempts == 1
+    assert Task.query.count() == 3
+    for task in Task.query.all():
+        assert task.task_progress == "In Progress"
+        assert task.section == "In progress"
+
+
+def test_asana_cli_worker_retries_failures(cli_runner, delivery):
+    delivery_id = delivery.id
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        side_effect=RuntimeError("Asana is down"),
+    ):
+        result = cli_runner.invoke(
+            args=["asana", "worker", "--concurrency", "1"]
+        )
+
+    assert result.exit_code == 0
+    assert Task.query.count() == 0
+    db_delivery = Delivery.query.get(delivery_id)
+    assert db_delivery.status == DeliveryStatusEnum.pending
+    assert db_delivery.attempts == 1
+    assert "Asana is down" in db_delivery.error
+
+
+def test_asana_cli_create_tasks_webhook_invalidates_cache(cli_runner, webhook):
+    path = webhook.path
+    assert resolve_webhook(path).secret == webhook.secret
+    client = MagicMock()
+    client.webhooks.create.return_value = {"gid": "1"}
+
+    with patch("giges.cli.asana.create_client", return_value=client):
+        result = cli_runner.invoke(
+            args=["asana", "create-tasks-webhook", webhook.project.external_id]
+        )
+
+    assert result.exit_code == 0
+    assert resolve_webhook(path).secret is None
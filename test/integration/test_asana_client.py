@@ -0,0 +1,68 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from giges.asana import connection_stats, create_client, projection
+
+
+class AsanaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"data": {"gid": "1", "name": "Me"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def asana_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AsanaHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_asana_client_shared(app):
+    assert create_client() is create_client()
+
+
+def test_asana_client_new_token(app, monkeypatch):
+    client = create_client()
+    monkeypatch.setitem(app.config, "ASANA_TOKEN", "ANOTHERFAKETOKEN")
+
+    assert create_client() is not client
+
+
+def test_asana_client_reuses_connections(app, asana_server, monkeypatch):
+    # The local server does not speak https
+    monkeypatch.setenv("OAUTHLIB_INSECURE_TRANSPORT", "1")
+    client = create_client()
+    before = connection_stats()
+
+    for _ in range(3):
+        assert client.get("/users/me", {}, base_url=asana_server)["gid"]
+
+    after = connection_stats()
+    assert after["requests"] - before["requests"] == 3
+    assert after["opened"] - before["opened"] == 1
+    assert after["reused"] - before["reused"] == 2
+
+
+def test_asana_projection():
+    assert projection(
+        ["name", "gid"], ("gid", "memberships.section.name")
+    ) == [
+        "gid",
+        "memberships.section.name",
+        "name",
+    ]
@@ -1,6 +1,36 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
 import pytest
+from sqlalchemy.event import listen, remove
 
-from giges.models.asana import Event, Task
+from giges.db import db
+from giges.handlers.asana import (
+    TASK_OPT_FIELDS,
+    AsanaActionError,
+    flush_dirty_tasks,
+    handle_customer_workflow,
+    handle_task_events,
+    is_relevant_task_event,
+    prune_fingerprints,
+    save_tasks,
+    search_events,
+    workflow_templates,
+)
+from giges.models.asana import (
+    Delivery,
+    DeliveryStatusEnum,
+    DirtyTask,
+    Event,
+    Fingerprint,
+    Task,
+    TaskChange,
+    WorkflowTask,
+)
+from giges.models.mixins import _utc_now
 
 
 def test_asana_tasks_handshake(client, webhook):
@@ -77,19 +107,14 @@ def test_asana_task_event_bad_format(client, webhook):
     assert Event.query.count() == 0
 
 
-@pytest.mark.vcr
-def test_asana_task_event_ok(client, webhook):
-    signature = (
-        "e9f6f5a3b6900a7556d5d86774ba5b1a143a963763006523b630d82aed4e4809"
-    )
+def test_asana_task_event_ok(client, webhook, fake_upstreams):
+    asana = fake_upstreams.asana
+    gid = asana.project_tasks[next(iter(asana.projects))][0]
     assert Task.query.count() == 0
     assert Event.query.count() == 0
     webhook.secret = "pork_fillet"
-
-    response = client.post(
-        webhook.path,
-        headers={"X-Hook-Signature": signature},
-        json={
+    data, signature = _signed(
+        {
             "events": [
                 {
                     "user": {
@@ -101,17 +126,25 @@ def test_asana_task_event_ok(client, webhook):
                     "parent": None,
                     "change": {"field": "completed_at", "action": "changed"},
                     "resource": {
-                        "gid": "1201046407912294",
+                        "gid": gid,
                         "resource_type": "task",
                         "resource_subtype": "default_task",
                     },
                 }
             ]
-        },
+        }
+    )
+
+    response = client.post(
+        webhook.path,
+        headers={"X-Hook-Signature": signature},
+        data=data,
+        content_type="application/json",
     )
     assert response.status_code == 204
     assert Event.query.count() == 1
-    assert Task.query.count() == 1
+    assert Task.query.one().name == asana.tasks[gid].name
+    assert fake_upstreams.requests["POST /api/1.0/batch"] == 1
 
 
 def test_asana_task_event_no_events(client):
@@ -125,3 +158,870 @@ def test_asana_task_event_no_events(client):
 def test_asana_task_event_no_signature(client, webhook):
     response = client.post(webhook.path, json={"events": []})
     assert response.status_code == 400
+
+
+def _signed(body, secret="pork_fillet"):
+    data = json.dumps(body).encode()
+    signature = hmac.new(
+        secret.encode(), msg=data, digestmod=hashlib.sha256
+    ).hexdigest()
+    return data, signature
+
+
+def test_asana_task_heartbeat_cached(client, webhook, count_queries):
+    webhook.secret = "pork_fillet"
+    data, signature = _signed({"events": []})
+
+    for _ in range(2):
+        count_queries.clear()
+        response = client.post(
+            webhook.path,
+            headers={"X-Hook-Signature": signature},
+            data=data,
+            content_type="application/json",
+        )
+        assert response.status_code == 204
+
+    assert count_queries == []
+
+    response = client.post(
+        webhook.path,
+        headers={"X-Hook-Signature": "I am a bad cracker"},
+        data=data,
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+    assert count_queries == []
+
+
+def test_asana_task_event_queued(app, client, webhook, monkeypatch):
+    monkeypatch.setitem(app.config, "ASANA_WEBHOOK_QUEUE", True)
+    webhook.secret = "pork_fillet"
+    body = json.dumps(
+        {
+            "events": [
+                {
+                    "action": "changed",
+                    "resource": {
+                        "gid": "1201046407912294",
+                        "resource_type": "task",
+                    },
+                }
+            ]
+        }
+    ).encode()
+    signature = hmac.new(
+        b"pork_fillet", msg=body, digestmod=hashlib.sha256
+    ).hexdigest()
+
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information"
+    ) as retrieve_task:
+        response = client.post(
+            webhook.path,
+            headers={"X-Hook-Signature": signature},
+            data=body,
+            content_type="application/json",
+        )
+
+    assert response.status_code == 204
+    retrieve_task.assert_not_called()
+    assert Task.query.count() == 0
+    delivery = Delivery.query.one()
+    assert delivery.status == DeliveryStatusEnum.pending
+    assert delivery.handler == "handle_task_events"
+    assert delivery.webhook == webhook
+
+
+def _batch_response(action):
+    task_gid = action["relative_path"].split("/")[-1]
+    if task_gid in ("404", "429", "503"):
+        return {
+            "status_code": int(task_gid),
+            "headers": {},
+            "body": {"errors": [{"message": f"task: Failed: {task_gid}"}]},
+        }
+    return {
+        "status_code": 200,
+        "headers": {},
+        "body": {
+            "data": {
+                "gid": task_gid,
+                "name": f"Task {task_gid}",
+                "completed": False,
+                "memberships": [],
+                "custom_fields": [],
+            }
+        },
+    }
+
+
+def test_asana_task_events_batched(webhook):
+    client = MagicMock()
+    client.batch_api.create_batch_request.side_effect = lambda params: [
+        _batch_response(action) for action in params["actions"]
+    ]
+    events = [_task_event(str(gid)) for gid in list(range(1, 25)) + [404]]
+
+    with patch("giges.handlers.asana.create_client", return_value=client):
+        handle_task_events(webhook, events)
+
+    assert client.batch_api.create_batch_request.call_count == 3
+    action = client.batch_api.create_batch_request.call_args.args[0][
+        "actions"
+    ][0]
+    assert action["options"]["fields"] == TASK_OPT_FIELDS
+    assert Task.query.count() == 24
+    assert Task.query.filter_by(external_id="404").count() == 0
+    assert Event.query.count() == 1
+
+
+@pytest.mark.parametrize("status", ["429", "503"])
+def test_asana_task_events_retryable_errors(webhook, status):
+    client = MagicMock()
+    client.batch_api.create_batch_request.side_effect = lambda params: [
+        _batch_response(action) for action in params["actions"]
+    ]
+    events = [_task_event("1"), _task_event(status)]
+
+    with patch(
+        "giges.handlers.asana.create_client", return_value=client
+    ), pytest.raises(AsanaActionError):
+        handle_task_events(webhook, events)
+
+    assert Event.query.count() == 0
+
+
+def test_asana_save_tasks_upsert(transactional_db):
+    asana_task = {
+        "gid": "1201046407912294",
+        "name": "Upsert all the things",
+        "completed": False,
+        "memberships": [{"section": {"name": "Backlog"}}],
+        "custom_fields": [
+            {
+                "gid": "1200200605652836",
+                "enum_value": {"gid": "1200200605652837"},
+            }
+        ],
+    }
+    task_ids = save_tasks({asana_task["gid"]: asana_task})
+    transactional_db.commit()
+
+    asana_task["memberships"] = [{"section": {"name": "In progress"}}]
+    assert save_tasks({asana_task["gid"]: asana_task}) == task_ids
+    transactional_db.commit()
+
+    task = Task.query.one()
+    assert task.id == task_ids[asana_task["gid"]]
+    assert task.section == "In progress"
+    assert task.task_progress == "Not Started"
+    first, second = TaskChange.query.order_by(TaskChange.created_at).all()
+    assert first.section == "Backlog"
+    assert first.task_progress == "Not Started"
+    assert second.section == "In progress"
+    assert second.task_progress is None
+
+    updated_at = task.updated_at
+    assert save_tasks({asana_task["gid"]: asana_task}) == task_ids
+    transactional_db.commit()
+
+    assert Task.query.one().updated_at == updated_at
+    assert TaskChange.query.count() == 2
+
+
+def test_asana_save_tasks_concurrently(transactional_db):
+    asana_task = {
+        "gid": "1201046407912294",
+        "name": "Save me twice",
+        "completed": False,
+        "memberships": [{"section": {"name": "Backlog"}}],
+        "custom_fields": [],
+    }
+    inserted = []
+
+    def insert_first(conn, cursor, statement, parameters, *args):
+        if statement.startswith("INSERT INTO asana_task ") and not inserted:
+            inserted.append(statement)
+            # Another delivery saves the same task in the meantime
+            with db.engine.begin() as other:
+                other.exec_driver_sql(statement, parameters)
+
+    listen(db.engine, "before_cursor_execute", insert_first)
+    try:
+        task_ids = save_tasks({asana_task["gid"]: asana_task})
+    finally:
+        remove(db.engine, "before_cursor_execute", insert_first)
+    transactional_db.commit()
+
+    assert task_ids == {asana_task["gid"]: Task.query.one().id}
+    assert TaskChange.query.count() == 0
+
+
+def _task_event(gid):
+    return {
+        "action": "changed",
+        "created_at": "2021-09-28T18:39:13.594Z",
+        "change": {"field": "name", "action": "changed"},
+        "resource": {"gid": gid, "resource_type": "task"},
+    }
+
+
+def _retrieved_tasks(gids):
+    return {
+        gid: {
+            "gid": gid,
+            "name": f"Task {gid}",
+            "memberships": [],
+            "custom_fields": [],
+        }
+        for gid in gids
+    }
+
+
+def test_asana_task_event_duplicated_delivery(client, webhook):
+    webhook.secret = "pork_fillet"
+    data, signature = _signed({"events": [_task_event("1")]})
+
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        side_effect=_retrieved_tasks,
+    ) as retrieve_tasks:
+        for _ in range(2):
+            response = client.post(
+                webhook.path,
+                headers={"X-Hook-Signature": signature},
+                data=data,
+                content_type="application/json",
+            )
+            assert response.status_code == 204
+
+    retrieve_tasks.assert_called_once()
+    assert Event.query.count() == 1
+    assert TaskChange.query.count() == 1
+
+
+def test_asana_task_event_duplicated_events(client, webhook):
+    webhook.secret = "pork_fillet"
+
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        side_effect=_retrieved_tasks,
+    ) as retrieve_tasks:
+        for gids in (("1", "2"), ("2", "3")):
+            data, signature = _signed(
+                {"events": [_task_event(gid) for gid in gids]}
+            )
+            response = client.post(
+                webhook.path,
+                headers={"X-Hook-Signature": signature},
+                data=data,
+                content_type="application/json",
+            )
+            assert response.status_code == 204
+
+    assert retrieve_tasks.call_count == 2
+    assert set(retrieve_tasks.call_args.args[0]) == {"3"}
+    assert Task.query.count() == 3
+
+
+def test_asana_same_event_to_each_handler(client, webhook, webhook_factory):
+    webhook.secret = "pork_fillet"
+    workflow_webhook = webhook_factory(
+        project=webhook.project,
+        path=f"/asana/workflows/{webhook.project.external_id}",
+        secret="pork_fillet",
+    )
+    event = {
+        "action": "added",
+        "created_at": "2021-09-28T18:39:13.594Z",
+        "resource": {"gid": "900", "resource_type": "story"},
+        "parent": {"gid": "1", "resource_type": "task"},
+    }
+    data, signature = _signed({"events": [event]})
+
+    with patch(
+        "giges.handlers.asana.handle_customer_workflow", autospec=True
+    ) as handle_customer_workflow:
+        for path in (webhook.path, workflow_webhook.path):
+            response = client.post(
+                path,
+                headers={"X-Hook-Signature": signature},
+                data=data,
+                content_type="application/json",
+            )
+            assert response.status_code == 204
+
+    handle_customer_workflow.assert_called_once()
+    assert handle_customer_workflow.call_args.args[1] == [event]
+
+
+def test_asana_prune_fingerprints(transactional_db):
+    transactional_db.add(
+        Fingerprint(fingerprint="0" * 64, created_at=_utc_now() - timedelta(3))
+    )
+    transactional_db.add(Fingerprint(fingerprint="f" * 64))
+    transactional_db.commit()
+
+    assert prune_fingerprints() == 1
+    assert Fingerprint.query.one().fingerprint == "f" * 64
+
+
+def test_asana_task_events_debounced(app, webhook, monkeypatch):
+    monkeypatch.setitem(app.config, "ASANA_DEBOUNCE_SECONDS", 30)
+
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        side_effect=_retrieved_tasks,
+    ) as retrieve_tasks:
+        for gids in (("1", "2"), ("2",), ("2", "3")):
+            handle_task_events(webhook, [_task_event(gid) for gid in gids])
+
+        assert DirtyTask.query.count() == 3
+        assert flush_dirty_tasks() == 0
+
+        DirtyTask.query.filter(DirtyTask.external_id != "3").update(
+            {DirtyTask.last_seen_at: _utc_now() - timedelta(seconds=60)}
+        )
+        assert flush_dirty_tasks() == 2
+        assert flush_dirty_tasks(force=True) == 1
+
+    assert retrieve_tasks.call_count == 2
+    assert set(retrieve_tasks.call_args_list[0].args[0]) == {"1", "2"}
+    assert set(retrieve_tasks.call_args_list[1].args[0]) == {"3"}
+    assert Event.query.count() == 3
+    assert Task.query.count() == 3
+    assert DirtyTask.query.count() == 0
+
+
+def test_asana_flush_overdue_dirty_tasks(app, webhook, monkeypatch):
+    monkeypatch.setitem(app.config, "ASANA_DEBOUNCE_SECONDS", 30)
+    handle_task_events(webhook, [_task_event("1")])
+    DirtyTask.query.update(
+        {DirtyTask.first_seen_at: _utc_now() - timedelta(hours=1)}
+    )
+
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        side_effect=_retrieved_tasks,
+    ):
+        assert flush_dirty_tasks() == 1
+
+
+@pytest.mark.parametrize(
+    "event,relevant",
+    [
+        (_task_event("1"), True),
+        ({"action": "added", "resource": {"resource_type": "task"}}, True),
+        ({"action": "added", "resource": {"resource_type": "story"}}, False),
+        (
+            {
+                "action": "changed",
+                "resource": {"resource_type": "task"},
+                "change": {"field": "followers", "action": "added"},
+            },
+            False,
+        ),
+        (
+            {
+                "action": "changed",
+                "resource": {"resource_type": "task"},
+                "change": {
+                    "field": "custom_fields",
+                    "action": "changed",
+                    "new_value": {"gid": "1200200605652836"},
+                },
+            },
+            True,
+        ),
+        (
+            {
+                "action": "changed",
+                "resource": {"resource_type": "task"},
+                "change": {
+                    "field": "custom_fields",
+                    "action": "changed",
+                    "new_value": {"gid": "1200041979613491"},
+                },
+            },
+            False,
+        ),
+    ],
+)
+def test_asana_relevant_task_event(event, relevant):
+    assert is_relevant_task_event(event) is relevant
+
+
+def test_asana_task_events_skip_irrelevant(webhook):
+    events = [
+        _task_event("1"),
+        {
+            "action": "changed",
+            "resource": {"gid": "2", "resource_type": "task"},
+            "change": {"field": "hearts", "action": "added"},
+        },
+        {
+            "action": "added",
+            "resource": {"gid": "3", "resource_type": "story"},
+            "parent": {"gid": "1", "resource_type": "task"},
+        },
+    ]
+
+    with patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        side_effect=_retrieved_tasks,
+    ) as retrieve_tasks:
+        handle_task_events(webhook, events)
+        handle_task_events(webhook, events[1:])
+
+    retrieve_tasks.assert_called_once()
+    assert set(retrieve_tasks.call_args.args[0]) == {"1"}
+    assert Event.query.count() == 2
+
+
+def test_asana_list_events(client, webhook, event_factory):
+    event_factory(webhook=webhook, content=[_task_event("1")])
+    event_factory(
+        webhook=webhook,
+        content=[
+            _task_event("2"),
+            {
+                "action": "added",
+                "resource": {"gid": "3", "resource_type": "story"},
+                "parent": {"gid": "1", "resource_type": "task"},
+            },
+        ],
+    )
+    old = event_factory(
+        webhook=webhook,
+        content=[_task_event("1")],
+        created_at=_utc_now() - timedelta(days=8),
+    )
+
+    response = client.get("/asana/events", query_string={"resource": "1"})
+    assert response.status_code == 200
+    events = response.json["events"]
+    assert len(events) == 3
+    assert events[-1]["id"] == old.id
+
+    response = client.get(
+        "/asana/events",
+        query_string={
+            "resource": "1",
+            "webhook_id": webhook.id,
+            "since": (_utc_now() - timedelta(days=7)).isoformat(),
+            "limit": 1,
+        },
+    )
+    assert response.status_code == 200
+    assert len(response.json["events"]) == 1
+    assert response.json["events"][0]["content"][0]["resource"]["gid"] == "2"
+
+    response = client.get(
+        "/asana/events", query_string={"resource": "3", "until": "yesterday"}
+    )
+    assert response.status_code == 400
+
+
+def test_asana_search_events_indexed(_db, transactional_db):
+    queries = []
+
+    def explain(conn, cursor, statement, parameters, *args):
+        if statement.startswith("SELECT"):
+            cursor.execute("EXPLAIN " + statement, parameters)
+            queries.append(str(cursor.fetchall()))
+
+    transactional_db.execute("SET LOCAL enable_seqscan = off")
+    listen(_db.engine, "before_cursor_execute", explain)
+    try:
+        search_events("1")
+        search_events("1", webhook_id="2", since=_utc_now())
+    finally:
+        remove(_db.engine, "before_cursor_execute", explain)
+
+    assert "ix_asana_event_content" in queries[0]
+    assert "ix_asana_event_webhook_id_created_at" in queries[1]
+
+
+def test_asana_task_history(client, transactional_db):
+    task = Task(external_id="1", name="Task 1")
+    transactional_db.add(task)
+    now = _utc_now()
+    for n, section in enumerate(["To do", "Doing", "Review", "Doing", "Done"]):
+        # The last two changes happened at the same instant
+        created_at = now + timedelta(seconds=min(n, 3))
+        transactional_db.add(
+            TaskChange(task=task, section=section, created_at=created_at)
+        )
+    transactional_db.commit()
+
+    sections = []
+    cursor = None
+    for _ in range(3):
+        response = client.get(
+            "/asana/tasks/1/history",
+            query_string={
+                "limit": 2,
+                **({"cursor": cursor} if cursor else {}),
+            },
+        )
+        assert response.status_code == 200
+        sections.extend(c["section"] for c in response.json["changes"])
+        cursor = response.json["next"]
+
+    assert cursor is None
+    assert sections[:3] == ["To do", "Doing", "Review"]
+    assert sorted(sections[3:]) == ["Doing", "Done"]
+
+
+def test_asana_task_history_not_found(client):
+    response = client.get("/asana/tasks/1/history")
+    assert response.status_code == 404
+
+
+def test_asana_task_history_bad_cursor(client, transactional_db):
+    transactional_db.add(Task(external_id="1", name="Task 1"))
+    transactional_db.commit()
+
+    response = client.get(
+        "/asana/tasks/1/history", query_string={"cursor": "nope"}
+    )
+    assert response.status_code == 400
+
+
+def test_asana_list_project_tasks(client, project):
+    project_id = project.external_id
+    save_tasks(
+        {
+            gid: {
+                "gid": gid,
+                "name": f"Task {gid}",
+                "memberships": [
+                    {
+                        "project": {"gid": project_id},
+                        "section": {"name": "Doing" if gid != "3" else "Done"},
+                    }
+                ],
+                "custom_fields": [],
+            }
+            for gid in ("1", "2", "3")
+        }
+    )
+
+    response = client.get(
+        f"/asana/projects/{project_id}/tasks",
+        query_string={"section": "Doing", "limit": 1},
+    )
+    assert response.status_code == 200
+    assert len(response.json["tasks"]) == 1
+    etag = response.headers["ETag"]
+
+    next_page = client.get(
+        f"/asana/projects/{project_id}/tasks",
+        query_string={
+            "section": "Doing",
+            "limit": 1,
+            "cursor": response.json["next"],
+        },
+    )
+    assert next_page.json["next"] is None
+    assert {
+        task["external_id"]
+        for task in response.json["tasks"] + next_page.json["tasks"]
+    } == {"1", "2"}
+
+    response = client.get(
+        f"/asana/projects/{project_id}/tasks",
+        query_string={"section": "Doing", "limit": 1},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    Task.query.filter_by(external_id="2").update({"section": "Done"})
+    response = client.get(
+        f"/asana/projects/{project_id}/tasks",
+        query_string={"section": "Doing", "limit": 1},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.json["next"] is None
+    assert response.headers["ETag"] != etag
+
+
+def test_asana_list_project_tasks_not_found(client):
+    response = client.get("/asana/projects/1/tasks")
+    assert response.status_code == 404
+
+
+def _workflow_response(action):
+    if action["method"] == "post":
+        data = action["data"]
+        return {
+            "status_code": 201,
+            "headers": {},
+            "body": {"data": {"gid": f"{data['name']}-{data['projects'][0]}"}},
+        }
+    return {
+        "status_code": 200,
+        "headers": {},
+        "body": {
+            "data": [
+                {"gid": f"{action['relative_path'][7:9]}{n}", "name": name}
+                for n, name in enumerate(["Call", "Contract"])
+            ]
+        },
+    }
+
+
+def _workflow_client():
+    client = MagicMock()
+    # As the Asana client, the collections are paged through generators
+    client.get_collection.side_effect = lambda path, params: iter(
+        [{"gid": "10", "name": "Kick-off"}, {"gid": "20", "name": "Delivery"}]
+    )
+    client.batch_api.create_batch_request.side_effect = lambda params: [
+        _workflow_response(action) for action in params["actions"]
+    ]
+    return client
+
+
+def _created_tasks(client):
+    return [
+        action["data"]["name"]
+        for call in client.batch_api.create_batch_request.call_args_list
+        for action in call.args[0]["actions"]
+        if action["method"] == "post"
+    ]
+
+
+def _customer_task(gid, section="3"):
+    return {
+        "gid": gid,
+        "memberships": [
+            {
+                "project": {"gid": "2", "name": "P - Customer"},
+                "section": {"gid": section, "name": "Kick-off"},
+            }
+        ],
+    }
+
+
+def _workflow_event(gid, parent):
+    return {
+        "action": "added",
+        "resource": {"gid": gid, "resource_type": "story"},
+        "parent": {"gid": parent, "resource_type": "task"},
+    }
+
+
+def test_asana_customer_workflow_templates_cached(webhook):
+    client = _workflow_client()
+
+    with patch(
+        "giges.handlers.asana.create_client", return_value=client
+    ), patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        return_value={"1": _customer_task("1")},
+    ):
+        for gid in ("900", "901"):
+            handle_customer_workflow(webhook, [_workflow_event(gid, "1")])
+
+        assert client.get_collection.call_count == 1
+        # Templates once, then the tasks of the first delivery
+        assert client.batch_api.create_batch_request.call_count == 2
+        assert _created_tasks(client) == ["Call", "Contract"]
+
+        # A template subtask changed
+        handle_customer_workflow(webhook, [_workflow_event("902", "201")])
+
+        assert client.get_collection.call_count == 2
+        assert workflow_templates()["Delivery"].subtasks[1].gid == "201"
+
+
+def test_asana_customer_workflow_templates_failed(webhook):
+    client = _workflow_client()
+    responses = client.batch_api.create_batch_request.side_effect
+
+    def fail_delivery(params):
+        return [
+            {"status_code": 500, "headers": {}, "body": {"errors": []}}
+            if action["relative_path"] == "/tasks/20/subtasks"
+            else response
+            for action, response in zip(params["actions"], responses(params))
+        ]
+
+    client.batch_api.create_batch_request.side_effect = fail_delivery
+    with patch("giges.handlers.asana.create_client", return_value=client):
+        with pytest.raises(AsanaActionError):
+            workflow_templates()
+
+        client.batch_api.create_batch_request.side_effect = responses
+        assert set(workflow_templates()) == {"Kick-off", "Delivery"}
+
+    assert client.get_collection.call_count == 2
+
+
+def test_asana_customer_workflow_tasks_created_once(webhook):
+    client = _workflow_client()
+    customer_tasks = {gid: _customer_task(gid) for gid in "1234567"}
+
+    with patch(
+        "giges.handlers.asana.create_client", return_value=client
+    ), patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        return_value=customer_tasks,
+    ):
+        events = [_workflow_event("900", gid) for gid in customer_tasks]
+        handle_customer_workflow(webhook, events)
+        # Re-delivered and replayed
+        handle_customer_workflow(webhook, events)
+        handle_customer_workflow(webhook, events[:2])
+
+    # 14 tasks in two batches, plus the templates
+    assert client.batch_api.create_batch_request.call_count == 3
+    assert len(_created_tasks(client)) == 14
+    assert WorkflowTask.query.count() == 14
+    assert WorkflowTask.query.filter_by(external_id=None).count() == 0
+
+    # The same task moved to another section has its own subtasks
+    customer_tasks = {"1": _customer_task("1", section="4")}
+    with patch(
+        "giges.handlers.asana.create_client", return_value=client
+    ), patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        return_value=customer_tasks,
+    ):
+        handle_customer_workflow(webhook, [_workflow_event("901", "1")])
+    assert WorkflowTask.query.count() == 16
+
+
+def test_asana_customer_workflow_failed_tasks_retried(webhook):
+    client = _workflow_client()
+    responses = client.batch_api.create_batch_request.side_effect
+
+    def fail_contract(params):
+        return [
+            {"status_code": 503, "headers": {}, "body": {"errors": []}}
+            if action.get("data", {}).get("name") == "Contract"
+            else response
+            for action, response in zip(params["actions"], responses(params))
+        ]
+
+    with patch(
+        "giges.handlers.asana.create_client", return_value=client
+    ), patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        return_value={"1": _customer_task("1")},
+    ):
+        client.batch_api.create_batch_request.side_effect = fail_contract
+        with pytest.raises(AsanaActionError):
+            handle_customer_workflow(webhook, [_workflow_event("900", "1")])
+        assert WorkflowTask.query.count() == 1
+
+        client.batch_api.create_batch_request.side_effect = responses
+        handle_customer_workflow(webhook, [_workflow_event("900", "1")])
+
+    assert _created_tasks(client) == ["Call", "Contract", "Contract"]
+    assert WorkflowTask.query.count() == 2
+
+
+def test_asana_customer_workflow_stale_claims(app, webhook, monkeypatch):
+    client = _workflow_client()
+    responses = client.batch_api.create_batch_request.side_effect
+
+    def lose_tasks(params):
+        if params["actions"][0]["method"] == "post":
+            raise ConnectionError("Lost on the way")
+        return responses(params)
+
+    with patch(
+        "giges.handlers.asana.create_client", return_value=client
+    ), patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        return_value={"1": _customer_task("1")},
+    ):
+        client.batch_api.create_batch_request.side_effect = lose_tasks
+        with pytest.raises(ConnectionError):
+            handle_customer_workflow(webhook, [_workflow_event("900", "1")])
+
+        # Maybe created, so not again until the claims are old enough
+        client.batch_api.create_batch_request.side_effect = responses
+        handle_customer_workflow(webhook, [_workflow_event("901", "1")])
+        assert _created_tasks(client) == ["Call", "Contract"]
+
+        monkeypatch.setitem(app.config, "ASANA_WORKFLOW_CLAIM_SECONDS", 0)
+        handle_customer_workflow(webhook, [_workflow_event("902", "1")])
+
+    assert _created_tasks(client) == ["Call", "Contract"] * 2
+    assert all(task.external_id for task in WorkflowTask.query)
+    assert WorkflowTask.query.count() == 2
+
+
+def test_asana_customer_workflow_redelivered(
+    app, client, project, webhook_factory
+):
+    webhook = webhook_factory(
+        project=project,
+        path=f"/asana/workflows/{project.external_id}",
+        secret="pork_fillet",
+    )
+    asana = _workflow_client()
+    responses = asana.batch_api.create_batch_request.side_effect
+    data, signature = _signed({"events": [_workflow_event("900", "1")]})
+
+    def fail_tasks(params):
+        return [
+            {"status_code": 503, "headers": {}, "body": {"errors": []}}
+            if action["method"] == "post"
+            else response
+            for action, response in zip(params["actions"], responses(params))
+        ]
+
+    def deliver():
+        # Tearing down the context rolls back the failed request
+        with app.app_context():
+            return client.post(
+                webhook.path,
+                headers={"X-Hook-Signature": signature},
+                data=data,
+                content_type="application/json",
+            )
+
+    with patch(
+        "giges.handlers.asana.create_client", return_value=asana
+    ), patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        return_value={"1": _customer_task("1")},
+    ):
+        asana.batch_api.create_batch_request.side_effect = fail_tasks
+        assert deliver().status_code == 500
+        assert Fingerprint.query.count() == 0
+        assert WorkflowTask.query.count() == 0
+
+        asana.batch_api.create_batch_request.side_effect = responses
+        assert deliver().status_code == 204
+
+    assert _created_tasks(asana) == ["Call", "Contract"] * 2
+    assert all(task.external_id for task in WorkflowTask.query)
+    assert Event.query.count() == 1
+
+
+def test_asana_customer_workflow_skips_other_tasks(webhook):
+    client = _workflow_client()
+    other_task = _customer_task("1")
+    other_task["memberships"][0]["project"]["name"] = "Internal"
+    customer_tasks = {"1": other_task, "2": _customer_task("2")}
+
+    with patch(
+        "giges.handlers.asana.create_client", return_value=client
+    ), patch(
+        "giges.handlers.asana.retrieve_tasks_information",
+        return_value=customer_tasks,
+    ):
+        handle_customer_workflow(
+            webhook, [_workflow_event("900", gid) for gid in customer_tasks]
+        )
+
+    assert _created_tasks(client) == ["Call", "Contract"]
+    assert {task.task_external_id for task in WorkflowTask.query} == {"2"}
@@ -0,0 +1,149 @@
+import json
+from http.server import BaseHTTPRequestHandler
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from giges.handlers.asana import discard_duplicated_events
+from giges.models.asana import Event, Project, Task
+from giges.tasks.sync import sync_projects
+
+
+def _task_event(gid, created_at):
+    return {
+        "action": "changed",
+        "created_at": created_at,
+        "change": {"field": "name", "action": "changed"},
+        "resource": {"gid": gid, "resource_type": "task"},
+    }
+
+
+# Events stream of a project, by sync token
+EVENTS = {
+    "t1": {
+        "data": [
+            _task_event("1", "2021-09-28T18:39:13.594Z"),
+            _task_event("2", "2021-09-28T18:40:13.594Z"),
+        ],
+        "sync": "t2",
+        "has_more": True,
+    },
+    "t2": {
+        "data": [_task_event("2", "2021-09-28T18:41:13.594Z")],
+        "sync": "t3",
+        "has_more": False,
+    },
+    "t3": {"data": [], "sync": "t3", "has_more": False},
+}
+
+
+class AsanaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def _respond(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.requests.append((url.path, query))
+        if query.get("sync") not in EVENTS:
+            self._respond(412, {"errors": [], "sync": "t1"})
+        else:
+            self._respond(200, EVENTS[query["sync"]])
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        actions = json.loads(self.rfile.read(length))["data"]["actions"]
+        self.requests.append((self.path, actions))
+        self._respond(
+            200,
+            {
+                "data": [
+                    {
+                        "status_code": 200,
+                        "headers": {},
+                        "body": {
+                            "data": {
+                                "gid": action["relative_path"].split("/")[-1],
+                                "name": "Synchronized",
+                                "memberships": [],
+                                "custom_fields": [],
+                            }
+                        },
+                    }
+                    for action in actions
+                ]
+            },
+        )
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def asana_server(serve_asana):
+    AsanaHandler.requests = []
+    serve_asana(AsanaHandler)
+    return AsanaHandler.requests
+
+
+def test_asana_sync_projects(asana_server, project):
+    project_id = project.id
+
+    assert sync_projects() == 0
+    assert Project.query.get(project_id).sync_token == "t1"
+    assert Task.query.count() == 0
+
+    assert sync_projects([project.external_id]) == 3
+    assert Project.query.get(project_id).sync_token == "t3"
+    assert Event.query.count() == 2
+    assert {t.external_id for t in Task.query} == {"1", "2"}
+
+    asana_server.clear()
+    assert sync_projects() == 0
+    assert [path for path, _ in asana_server] == ["/events"]
+
+
+def test_asana_sync_expired_token(asana_server, project):
+    project.sync_token = "expired"
+
+    assert sync_projects() == 0
+    assert project.sync_token == "t1"
+    assert Task.query.count() == 0
+
+
+def test_asana_sync_skips_webhook_events(asana_server, project):
+    project.sync_token = "t2"
+    events = EVENTS["t2"]["data"]
+    # Already received by the task webhook
+    discard_duplicated_events(b"delivery", events, "handle_task_events")
+
+    assert sync_projects() == 0
+    assert project.sync_token == "t3"
+    assert [path for path, _ in asana_server] == ["/events"]
+
+    # Still new to the customer workflow
+    assert discard_duplicated_events(
+        b"delivery", events, "handle_customer_workflow"
+    )
+
+
+def test_asana_sync_failed_project(project_factory):
+    projects = [project_factory(name=name) for name in ("A", "B")]
+
+    with patch(
+        "giges.tasks.sync.sync_project",
+        side_effect=[requests.ConnectionError("Down"), 2],
+    ) as sync_project:
+        assert sync_projects() == 2
+
+    assert [call.args[0] for call in sync_project.call_args_list] == projects
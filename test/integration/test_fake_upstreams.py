@@ -0,0 +1,145 @@
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from giges.asana import create_client
+from giges.db import db
+from giges.handlers.asana import retrieve_tasks_information
+from giges.models.asana import Task
+from giges.models.team import Tessera
+from giges.tasks.asana import stick_teams
+from giges.tasks.backfill import backfill_project
+from giges.tasks.sync import sync_projects
+
+
+def _project(fake_upstreams, project_factory):
+    external_id = next(iter(fake_upstreams.asana.projects))
+    return project_factory(external_id=external_id)
+
+
+def test_fake_asana_backfill(fake_upstreams, project_factory):
+    project_id = _project(fake_upstreams, project_factory).external_id
+
+    assert sum(backfill_project(project_id, batch_size=50)) == 150
+
+    assert Task.query.count() == 150
+    assert Task.query.filter(Task.section.is_(None)).count() == 0
+    # Two pages of tasks
+    requests = fake_upstreams.requests
+    assert requests[f"GET /api/1.0/projects/{project_id}/tasks"] == 2
+
+
+def test_fake_asana_batch_and_subtasks(fake_upstreams):
+    asana = fake_upstreams.asana
+    gids = [gid for gid, task in asana.tasks.items() if not task.parent]
+
+    tasks = retrieve_tasks_information(gids[:25])
+
+    assert len(tasks) == 25
+    assert fake_upstreams.requests["POST /api/1.0/batch"] == 3
+    subtasks = list(
+        create_client().tasks.subtasks(gids[0], fields=["name", "parent"])
+    )
+    assert subtasks[0]["parent"]["gid"] == gids[0]
+
+
+def test_fake_asana_events_sync(fake_upstreams, project_factory):
+    project = _project(fake_upstreams, project_factory)
+    gid = fake_upstreams.asana.project_tasks[project.external_id][0]
+
+    assert sync_projects() == 0
+    create_client().tasks.update(gid, {"name": "Renamed"})
+    assert sync_projects() == 1
+
+    assert Task.query.filter_by(external_id=gid).one().name == "Renamed"
+
+
+def test_fake_stick(app, fake_upstreams, project_factory, team, monkeypatch):
+    monkeypatch.setitem(app.config, "SLACK_BLOCKS_CHANNEL", "C1")
+    asana = fake_upstreams.asana
+    project = _project(fake_upstreams, project_factory)
+    team.projects.append(project)
+    for n, user in enumerate(asana.users):
+        team.tesseras.append(
+            Tessera(
+                name=f"Human {n}",
+                asana_id=user,
+                github_handle=f"human{n}",
+                slack_id=f"U{n}",
+            )
+        )
+    db.session.commit()
+
+    assert stick_teams([team]) == 4
+
+    assert len(fake_upstreams.slack.messages) == 4
+    searches = [r for r in fake_upstreams.requests if "search" in r]
+    assert sum(fake_upstreams.requests[r] for r in searches) == 1
+
+
+def test_fake_injected_faults(fake_upstreams):
+    fake_upstreams.random.seed(1)
+    fake_upstreams.error_rate = 0.2
+    fake_upstreams.throttle_rate = 0.1
+
+    with patch("giges.ratelimit.sleep"):
+        for gid in list(fake_upstreams.asana.tasks)[:10]:
+            assert create_client().tasks.find_by_id(gid)["gid"] == gid
+
+    assert sum(fake_upstreams.requests.values()) > 10
+
+
+class HookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    deliveries = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        if "X-Hook-Secret" in self.headers:
+            self.send_header("X-Hook-Secret", self.headers["X-Hook-Secret"])
+        else:
+            self.deliveries.append((self.headers["X-Hook-Signature"], body))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def hook_target():
+    HookHandler.deliveries = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), HookHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/asana/projects/1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fake_asana_webhooks(fake_upstreams, hook_target):
+    asana = fake_upstreams.asana
+    project = next(iter(asana.projects))
+    client = create_client()
+
+    webhook = client.webhooks.create(resource=project, target=hook_target)
+    task = client.tasks.create_in_workspace(
+        asana.workspace, {"name": "Hooked", "projects": [project]}
+    )
+
+    secret = asana.webhooks[webhook["gid"]]["secret"]
+    for _ in range(100):
+        if HookHandler.deliveries:
+            break
+        threading.Event().wait(0.05)
+    signature, body = HookHandler.deliveries[0]
+    assert hmac.compare_digest(
+        signature,
+        hmac.new(secret.encode(), body, hashlib.sha256).hexdigest(),
+    )
+    assert json.loads(body)["events"][0]["resource"]["gid"] == task["gid"]
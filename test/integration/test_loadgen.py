@@ -0,0 +1,106 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+
+import pytest
+from werkzeug.serving import make_server
+
+from giges.loadgen import fire, load_test, percentile
+from giges.models.asana import Event, ResourceTypeEnum
+from giges.tasks.backfill import backfill_project
+
+
+@pytest.fixture
+def giges_server(app):
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def seeded_webhook(
+    app, fake_upstreams, webhook_factory, project_factory, monkeypatch
+):
+    monkeypatch.setitem(app.config, "ASANA_RATE_LIMIT", 0)
+    project_id = next(iter(fake_upstreams.asana.projects))
+    webhook = webhook_factory(
+        project=project_factory(external_id=project_id),
+        resource_type=ResourceTypeEnum.task,
+        secret="pork_fillet",
+    )
+    list(backfill_project(project_id))
+    return webhook
+
+
+def test_loadgen_synthetic(giges_server, seeded_webhook):
+    report = load_test(giges_server, 20, rps=0, concurrency=4, max_events=3)
+
+    assert report["requests"] == 20
+    assert report["statuses"] == {204: 20}
+    assert report["error_rate"] == 0
+    assert report["rows"]["asana_event"] == 20
+    assert report["rows"]["asana_task"] == 0
+    # The fake tasks did not change since the backfill
+    assert report["rows"]["asana_task_change"] == 0
+    assert 0 < report["latency_ms"]["p50"] <= report["latency_ms"]["max"]
+
+
+def test_loadgen_replay(giges_server, seeded_webhook):
+    load_test(giges_server, 5, max_events=2)
+
+    report = load_test(giges_server, 10, replay=True, as_recorded=True)
+
+    # Only the stored deliveries, all of them already received
+    assert report["requests"] == 5
+    assert report["statuses"] == {204: 5}
+    assert report["rows"]["asana_event"] == 0
+
+    report = load_test(giges_server, 10, replay=True)
+    assert report["rows"]["asana_event"] == 5
+    assert Event.query.count() == 10
+
+
+def test_loadgen_latency_from_schedule():
+    class SlowHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            sleep(0.1)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    deliveries = iter([("/", b"{}", {})] * 4)
+    try:
+        report = fire(
+            f"http://127.0.0.1:{server.server_port}",
+            deliveries,
+            4,
+            rps=100,
+            concurrency=1,
+        )
+    finally:
+        server.shutdown()
+
+    # The last delivery waited for the three before it to be sent
+    assert report["statuses"] == {204: 4}
+    assert report["latency_ms"]["max"] >= 350
+
+
+def test_loadgen_without_webhooks(cli_runner):
+    result = cli_runner.invoke(args=["loadgen", "http://localhost:1"])
+
+    assert result.exit_code == 1
+    assert "No webhook with a secret" in result.output
+
+
+def test_loadgen_percentile():
+    values = [float(n) for n in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0
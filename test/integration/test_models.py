@@ -1,6 +1,9 @@
 from datetime import datetime
 
-from giges.models.asana import Project
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from giges.models.asana import Project, Task
 
 
 def test_asana_project(transactional_db):
@@ -16,3 +19,12 @@ def test_asana_project(transactional_db):
     transactional_db.commit()
 
     assert Project.query.count() == 1
+
+
+def test_asana_task_unique_external_id(transactional_db):
+    transactional_db.add(Task(external_id="1", name="Original"))
+    transactional_db.commit()
+
+    transactional_db.add(Task(external_id="1", name="Duplicated"))
+    with pytest.raises(IntegrityError):
+        transactional_db.commit()
@@ -0,0 +1,107 @@
+import json
+from http.server import BaseHTTPRequestHandler
+from unittest.mock import patch
+
+import pytest
+
+from giges.asana import create_client
+from giges.ratelimit import TokenBucket, throttle_stats
+from giges.slack import SlackClient
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Answer each request with the next status, the last one forever.
+    """
+
+    protocol_version = "HTTP/1.1"
+    statuses = []
+    requests = 0
+
+    def _respond(self):
+        type(self).requests += 1
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else 200
+        if status == 200:
+            content = {"ok": True, "data": {"gid": "1", "name": "Me"}}
+        else:
+            content = {"ok": False, "error": "ratelimited", "errors": []}
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "2")
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server(serve_asana):
+    FlakyHandler.requests = 0
+    FlakyHandler.statuses = []
+    FlakyHandler.url = serve_asana(FlakyHandler)
+    return FlakyHandler
+
+
+@pytest.fixture
+def sleeps():
+    with patch("giges.ratelimit.sleep") as sleep:
+        yield sleep
+
+
+def test_token_bucket_burst_then_rate(sleeps):
+    bucket = TokenBucket(rate=10, burst=2)
+
+    waits = [bucket.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0, 0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+    assert bucket.stats["throttled"] == 2
+
+
+def test_token_bucket_paused(sleeps):
+    bucket = TokenBucket(rate=0)
+    bucket.pause(3)
+
+    assert bucket.acquire() == pytest.approx(3, abs=0.01)
+    assert bucket.stats["rate_limited"] == 1
+
+
+def test_asana_client_retry_after(flaky_server, sleeps):
+    flaky_server.statuses = [429, 503, 200]
+    before = throttle_stats("asana")["asana"]
+
+    assert create_client().get("/users/me", {})["gid"] == "1"
+
+    after = throttle_stats("asana")["asana"]
+    assert flaky_server.requests == 3
+    assert after["rate_limited"] - before["rate_limited"] == 1
+    assert after["retries"] - before["retries"] == 1
+    assert sleeps.call_args_list[0].args[0] == pytest.approx(2, abs=0.1)
+
+
+def test_slack_client_retry_after(app, flaky_server, sleeps):
+    flaky_server.statuses = [429, 500, 200]
+    slack_client = SlackClient(base_url=f"{flaky_server.url}/")
+
+    assert slack_client.send_message("C1", "Hi")["ok"]
+
+    assert flaky_server.requests == 3
+    stats = throttle_stats("slack")["slack"]
+    assert stats["rate_limited"] >= 1
+    assert stats["retries"] >= 1
+
+
+def test_slack_client_gives_up(app, flaky_server, sleeps, monkeypatch):
+    monkeypatch.setitem(app.config, "RATE_LIMIT_MAX_RETRIES", 1)
+    flaky_server.statuses = [500, 500, 500]
+    slack_client = SlackClient(base_url=f"{flaky_server.url}/")
+
+    assert slack_client.send_message("C1", "Hi") is None
+    assert flaky_server.requests == 2
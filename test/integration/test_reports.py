@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from giges.models.asana import Task, TaskChange
+
+
+def _task(gid, project, progress, created_at, started=None, done=None):
+    task = Task(
+        external_id=gid,
+        name=f"Task {gid}",
+        class_of_service="Timebomb",
+        task_progress=progress,
+        project_external_id=project.external_id,
+        created_at=created_at,
+    )
+    changes = [
+        TaskChange(task=task, task_progress=task_progress, created_at=at)
+        for task_progress, at in (("In Progress", started), ("Done", done))
+        if at
+    ]
+    return [task, *changes]
+
+
+def test_reports(cli_runner, client, transactional_db, team, project):
+    team.projects.append(project)
+    monday = datetime(2021, 9, 27, 9)
+    transactional_db.add_all(
+        _task(
+            "1",
+            project,
+            "Done",
+            monday,
+            started=monday + timedelta(hours=2),
+            done=monday + timedelta(hours=10),
+        )
+        + _task(
+            "2",
+            project,
+            "Done",
+            monday,
+            started=monday + timedelta(hours=4),
+            done=monday + timedelta(hours=20),
+        )
+        + _task("3", project, "In Progress", monday, started=monday)
+        + _task("4", project, "Not Started", monday)
+    )
+    transactional_db.commit()
+    team_id = team.id
+
+    result = cli_runner.invoke(args=["report", "refresh"])
+    assert result.exit_code == 0
+
+    response = client.get(
+        "/reports/weekly-flow",
+        query_string={"team_id": team_id, "since": "2021-09-01"},
+    )
+    assert response.status_code == 200
+    assert response.json["weeks"] == [
+        {
+            "team_id": team_id,
+            "class_of_service": "Timebomb",
+            "week": "2021-09-27",
+            "throughput": 2,
+            "lead_time_hours": 15.0,
+            "lead_time_p85_hours": 18.5,
+            "cycle_time_hours": 12.0,
+        }
+    ]
+
+    response = client.get("/reports/work-in-progress")
+    assert response.status_code == 200
+    assert response.json["work_in_progress"] == [
+        {"team_id": team_id, "class_of_service": "Timebomb", "tasks": 1}
+    ]
+
+
+def test_reports_wrong_week(client):
+    response = client.get("/reports/weekly-flow", query_string={"since": "no"})
+    assert response.status_code == 400
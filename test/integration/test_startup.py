@@ -0,0 +1,75 @@
+import json
+import subprocess
+import sys
+
+from giges.spec import SOURCE_HASH_KEY, load_specification, source_hash
+from giges.startup import profile_startup
+
+# Seconds the imports of a cold start may take, about twice the current
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Packages only imported when used, not on every cold start
+LAZY_PACKAGES = (
+    "alembic",
+    "asana",
+    "flask_migrate",
+    "sentry_sdk",
+    "slack_sdk",
+)
+
+
+def test_startup_import_budget():
+    profile = profile_startup()
+
+    assert profile["import_seconds"] < IMPORT_BUDGET_SECONDS
+    assert not [
+        module
+        for module in profile["modules"]
+        if module.split(".")[0] in LAZY_PACKAGES
+        or module.startswith("giges.cli")
+    ]
+    assert {"import", "specification", "api", "database"} <= set(
+        profile["phases"]
+    )
+
+
+def test_startup_single_app():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from giges.app import create_flask_app\n"
+            "from giges.tasks.app import app\n"
+            "assert app is create_flask_app()\n",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_startup_profile_command(cli_runner):
+    result = cli_runner.invoke(args=["startup-profile", "--json"])
+
+    assert result.exit_code == 0
+    profile = json.loads(result.output)
+    assert profile["packages"]["giges"] > 0
+
+
+def test_parsed_specification_up_to_date():
+    specification = load_specification()
+
+    # Otherwise run: giges build-spec
+    assert specification[SOURCE_HASH_KEY] == source_hash()
+
+
+def test_outdated_specification_parsed(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "giges.spec.PARSED_SPECIFICATION", str(tmp_path / "api.json")
+    )
+
+    specification = load_specification()
+
+    assert SOURCE_HASH_KEY not in specification
+    assert "200" in specification["paths"]["/ping"]["get"]["responses"]
@@ -0,0 +1,156 @@
+import json
+from http.server import BaseHTTPRequestHandler
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from giges.db import db
+from giges.models.team import Tessera
+from giges.tasks.asana import stick, stick_teams
+
+
+def _task(gid, project_id, assignee):
+    return {
+        "gid": gid,
+        "name": f"Task {gid}",
+        "assignee": {"gid": assignee},
+        "created_at": f"2021-10-01T00:00:{int(gid) / 1000:06.3f}Z",
+        "memberships": [
+            {"project": {"gid": project_id}, "section": {"name": "Doing"}}
+        ],
+        "custom_fields": [
+            {
+                "gid": "1200760323623705",
+                "enum_value": {"gid": "1200760323624695", "name": "Urgent"},
+            }
+        ],
+    }
+
+
+class AsanaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+    # Tasks sorted by creation, newest first
+    tasks = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.requests.append((url.path, query))
+        assignees = query["assignee.any"].split(",")
+        tasks = [
+            t
+            for t in self.tasks
+            if t["assignee"]["gid"] in assignees
+            and t["created_at"] < query.get("created_at.before", "9")
+        ]
+        body = json.dumps({"data": tasks[: int(query["limit"])]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def asana_server(serve_asana):
+    AsanaHandler.requests = []
+    AsanaHandler.tasks = []
+    serve_asana(AsanaHandler)
+    return AsanaHandler
+
+
+@pytest.fixture
+def tech_team(team, project):
+    team.name = "Tech"
+    team.projects.append(project)
+    team.tesseras.extend(_tessera(n) for n in range(3))
+    db.session.commit()
+    return team
+
+
+def _tessera(n):
+    return Tessera(
+        name=f"Human {n}",
+        asana_id=str(n),
+        github_handle=f"human{n}",
+        slack_id=f"U{n}",
+    )
+
+
+def _messages(slack_client):
+    return sorted(
+        c.args[1]
+        for c in slack_client.return_value.send_message.call_args_list
+    )
+
+
+def test_stick_one_request_per_team(asana_server, tech_team, project):
+    asana_server.tasks = [
+        _task(str(gid), project.external_id, "0") for gid in range(30)
+    ] + [_task("100", project.external_id, "1")]
+
+    with patch("giges.slack.SlackClient") as slack_client:
+        stick(tech_team.id)
+
+    assert len(asana_server.requests) == 1
+    path, query = asana_server.requests[0]
+    assert path.endswith("/tasks/search")
+    assert query["assignee.any"] == "0,1,2"
+    assert "custom_fields.enum_value.name" in query["opt_fields"]
+
+    messages = _messages(slack_client)
+    assert len(messages) == 3
+    assert messages[0].count("\n\t - ") == 30
+    assert ":bomb:  Doing :dragon:" in messages[1]
+    assert "\n\t - " not in messages[2]
+
+
+def test_stick_all_teams(asana_server, tech_team, project, team_factory):
+    other_team = team_factory(projects=[project], tesseras=[_tessera(3)])
+    tasks = [_task(str(gid), project.external_id, "0") for gid in range(150)]
+    asana_server.tasks = sorted(
+        tasks + [_task("200", project.external_id, "3")],
+        key=lambda t: t["created_at"],
+        reverse=True,
+    )
+
+    with patch("giges.slack.SlackClient") as slack_client:
+        assert stick_teams([tech_team, other_team]) == 4
+
+    # The first team needs two pages
+    assert len(asana_server.requests) == 3
+    messages = _messages(slack_client)
+    assert messages[0].count("\n\t - ") == 150
+    assert messages[3].startswith("<@U3|Human 3>")
+
+
+def test_stick_tasks_created_at_once(asana_server, tech_team, project):
+    tasks = [_task(str(gid), project.external_id, "0") for gid in range(150)]
+    for task in tasks:
+        # Three by three, with a tie across the end of the first page
+        task["created_at"] = f"2021-10-01T00:00:{int(task['gid']) // 3:06.3f}Z"
+    asana_server.tasks = tasks[::-1]
+
+    with patch("giges.slack.SlackClient") as slack_client:
+        stick(tech_team.id)
+
+    assert _messages(slack_client)[0].count("\n\t - ") == 150
+
+
+def test_stick_whole_page_created_at_once(asana_server, tech_team, project):
+    tasks = [_task(str(gid), project.external_id, "0") for gid in range(150)]
+    for task in tasks:
+        task["created_at"] = "2021-10-01T00:00:00.000Z"
+    asana_server.tasks = tasks
+
+    with patch("giges.slack.SlackClient") as slack_client:
+        stick(tech_team.id)
+
+    # Only a whole page of ties is left behind, without paging forever
+    assert _messages(slack_client)[0].count("\n\t - ") == 100
+    assert len(asana_server.requests) == 3
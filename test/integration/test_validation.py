@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+import pytest
+from connexion.decorators.response import ResponseValidator
+from connexion.exceptions import BadRequestProblem
+
+from giges.spec import load_specification
+from giges.validation import EnvelopeRequestBodyValidator, envelope_schema
+
+
+@pytest.fixture
+def webhook_body_schema():
+    schemas = load_specification()["components"]["schemas"]
+    return schemas["AsanaEventWebhookBody"]
+
+
+def test_envelope_schema(webhook_body_schema):
+    envelope = envelope_schema(webhook_body_schema)
+
+    assert "items" not in envelope["properties"]["events"]
+    assert envelope["required"] == ["events"]
+    assert envelope_schema({"type": "array", "items": {}}) == {
+        "type": "array",
+        "items": {},
+    }
+
+
+def test_envelope_validation(app, webhook_body_schema, monkeypatch):
+    validator = EnvelopeRequestBodyValidator(
+        webhook_body_schema, ["application/json"], None
+    )
+    with pytest.raises(BadRequestProblem):
+        validator.validate_schema({"events": [1]}, "/")
+
+    monkeypatch.setitem(app.config, "WEBHOOK_ENVELOPE_VALIDATION", True)
+
+    validator.validate_schema({"events": [1]}, "/")
+    with pytest.raises(BadRequestProblem):
+        validator.validate_schema({"events": 1}, "/")
+
+
+@pytest.mark.parametrize("rate, validated", [(1, 3), (0.5, 2), (0, 0)])
+def test_sampled_response_validation(
+    app, client, monkeypatch, rate, validated
+):
+    monkeypatch.setitem(app.config, "RESPONSE_VALIDATION_RATE", rate)
+
+    with patch.object(
+        ResponseValidator, "validate_response", return_value=True
+    ) as validate, patch(
+        "giges.validation.random.random", side_effect=[0.2, 0.7, 0.4]
+    ):
+        for _ in range(3):
+            assert client.get("/ping").status_code == 200
+
+    assert validate.call_count == validated